@@ -0,0 +1,286 @@
+import argparse
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import wave
+import numpy as np
+
+# every asset is looked up by its path under the game folder, like 'tex/brick.png', through the one Resolver below.
+# it is served from assets.pack when the pack has it and from the loose file otherwise, absolute paths are always files
+# build the pack with: python assets.py build
+
+# PyInstaller --onefile unpacks data files next to the bundled modules, in sys._MEIPASS
+BASE_DIR = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
+PACK_PATH = os.environ.get('SKATEPY_PACK', os.path.join(BASE_DIR, 'assets.pack'))
+ASSET_DIRS = ('tex', 'html', 'bgm', 'sfx')
+
+# file layout: magic, version, index size, JSON index of name -> offset, length, format and format details, then the data
+MAGIC = b'SKPK'
+# version 2: entries record the mtime and size of the file they were built from
+VERSION = 2
+HEADER = struct.Struct('<4sBI')
+ALIGN = 64
+
+# textures as Scene3D loads them, stored already decoded and resized so startup only maps them
+TEXTURES = [
+    ('tex/brick.png', (64, 64), False),
+    ('tex/birb/thirdperson.gif', (64, 64), True),
+    ('tex/enemy.gif', (32, 64), True),
+]
+
+
+def texture_name(name, size, composite):
+    return f"{name}@{size[0]}x{size[1]}{'+composite' if composite else ''}"
+
+
+class PcmReader:
+    # the parts of wave.Wave_read that audio.py uses, over PCM frames already in memory
+    def __init__(self, data, channels, width, rate):
+        self.data = data
+        self.channels = channels
+        self.width = width
+        self.rate = rate
+        self.frame_size = channels * width
+        self.position = 0
+
+    def getnchannels(self):
+        return self.channels
+
+    def getsampwidth(self):
+        return self.width
+
+    def getframerate(self):
+        return self.rate
+
+    def getnframes(self):
+        return len(self.data) // self.frame_size
+
+    def readframes(self, count):
+        start = self.position * self.frame_size
+        end = min(len(self.data), start + count * self.frame_size)
+        self.position += (end - start) // self.frame_size
+        return self.data[start:end]
+
+    def rewind(self):
+        self.position = 0
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AssetPack:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, index_size = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a SkatePy asset pack")
+        if version != VERSION:
+            raise ValueError(f"unsupported asset pack version {version}")
+        self.index = json.loads(self.map[HEADER.size:HEADER.size + index_size])
+        self.view = memoryview(self.map)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def entry(self, name):
+        return self.index[name]
+
+    def data(self, name):
+        # a slice of the mapping, nothing is read or copied until it is used
+        entry = self.index[name]
+        return self.view[entry['offset']:entry['offset'] + entry['length']]
+
+    def close(self):
+        self.view.release()
+        self.map.close()
+
+
+class Resolver:
+    def __init__(self, base=BASE_DIR, pack_path=PACK_PATH):
+        self.base = base
+        self.pack = None
+        self.extracted = None
+        # name -> whether the packed copy is still what the loose file holds, checked once per name
+        self.fresh = {}
+        if pack_path and os.path.exists(pack_path):
+            try:
+                self.pack = AssetPack(pack_path)
+            except (OSError, ValueError) as e:
+                print(f"Error opening asset pack {pack_path}, using loose files: {e}")
+
+    def file(self, name):
+        if os.path.isabs(name):
+            return name
+        return os.path.join(self.base, *name.split('/'))
+
+    def packed(self, name):
+        if self.pack is None or name not in self.pack:
+            return False
+        fresh = self.fresh.get(name)
+        if fresh is None:
+            fresh = self.fresh[name] = self.unchanged(name)
+        return fresh
+
+    def unchanged(self, name):
+        # like texcache's keys, an edited file no longer matches and is used instead of the stale packed copy
+        entry = self.pack.entry(name)
+        try:
+            stat = os.stat(self.file(entry['source']))
+        except OSError:
+            # shipped without the loose files, the pack is all there is
+            return True
+        if (stat.st_mtime_ns, stat.st_size) == (entry['mtime_ns'], entry['size']):
+            return True
+        print(f"{entry['source']} changed since the asset pack was built, using the file")
+        return False
+
+    def exists(self, name):
+        return self.packed(name) or os.path.exists(self.file(name))
+
+    def data(self, name):
+        if self.packed(name):
+            return self.pack.data(name)
+        with open(self.file(name), 'rb') as f:
+            return f.read()
+
+    def frames(self, name, size, composite=False):
+        # (frames, height, width, 4) uint8 RGBA, a read-only view of the pack when it was preconverted
+        key = texture_name(name, size, composite)
+        if self.packed(key):
+            return np.frombuffer(self.pack.data(key), dtype=np.uint8).reshape(self.pack.entry(key)['shape'])
+        import texcache
+        if self.packed(name):
+            # decoded from the packed file, extracting it would put a new temp path in texcache's key every run
+            return texcache.decode(io.BytesIO(self.pack.data(name)), size, composite)
+        return texcache.load_frames(self.file(name), size, composite)
+
+    def pixmap(self, name):
+        from PyQt5.QtGui import QPixmap
+        if not self.packed(name):
+            return QPixmap(self.file(name))
+        pixmap = QPixmap()
+        pixmap.loadFromData(bytes(self.pack.data(name)))
+        return pixmap
+
+    def image(self, name):
+        # unlike a QPixmap, a QImage can be made on a loader thread
+        from PyQt5.QtGui import QImage
+        if not self.packed(name):
+            return QImage(self.file(name))
+        image = QImage()
+        image.loadFromData(bytes(self.pack.data(name)))
+        return image
+
+    def wave(self, name):
+        if self.packed(name):
+            entry = self.pack.entry(name)
+            if entry['format'] == 'pcm':
+                return PcmReader(self.pack.data(name), entry['channels'], entry['width'], entry['rate'])
+            return wave.open(io.BytesIO(self.pack.data(name)), 'rb')
+        return wave.open(self.file(name), 'rb')
+
+    def path(self, name):
+        # for things that need a real file, like the web view. packed assets are written out once per run,
+        # into a directory that is deleted when the resolver goes away or at exit
+        if not self.packed(name):
+            return self.file(name)
+        if self.extracted is None:
+            self.extracted = tempfile.TemporaryDirectory(prefix='skatepy-assets-')
+            for packed, entry in self.pack.index.items():
+                if entry['format'] == 'raw':
+                    target = os.path.join(self.extracted.name, *packed.split('/'))
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    with open(target, 'wb') as f:
+                        f.write(self.pack.data(packed))
+        return os.path.join(self.extracted.name, *name.split('/'))
+
+
+resolver = Resolver()
+
+
+def source(path, name):
+    # what Resolver.unchanged compares against the loose file
+    stat = os.stat(path)
+    return {'source': name, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def build(out, base=BASE_DIR):
+    import texcache
+    entries = []
+    for folder in ASSET_DIRS:
+        for root, _, files in sorted(os.walk(os.path.join(base, folder))):
+            for filename in sorted(files):
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, base).replace(os.sep, '/')
+                if filename.lower().endswith('.wav'):
+                    # stored as the PCM frames, so streaming reads straight out of the mapping
+                    try:
+                        with wave.open(path, 'rb') as f:
+                            details = {'channels': f.getnchannels(), 'width': f.getsampwidth(), 'rate': f.getframerate()}
+                            entries.append((name, 'pcm', dict(details, **source(path, name)), f.readframes(f.getnframes())))
+                        continue
+                    except (EOFError, wave.Error) as e:
+                        print(f"Error reading {name}, packing it as is: {e}")
+                with open(path, 'rb') as f:
+                    entries.append((name, 'raw', source(path, name), f.read()))
+    for name, size, composite in TEXTURES:
+        path = os.path.join(base, *name.split('/'))
+        if os.path.exists(path):
+            frames = np.ascontiguousarray(texcache.decode(path, size, composite))
+            details = dict(source(path, name), shape=list(frames.shape))
+            entries.append((texture_name(name, size, composite), 'rgba', details, frames.tobytes()))
+
+    # offsets depend on the index size, so lay it out until it stops growing
+    index_size = 0
+    while True:
+        index = {}
+        offset = HEADER.size + index_size
+        for name, kind, details, data in entries:
+            offset += -offset % ALIGN
+            index[name] = dict(details, offset=offset, length=len(data), format=kind)
+            offset += len(data)
+        encoded = json.dumps(index, separators=(',', ':')).encode()
+        if len(encoded) <= index_size:
+            break
+        index_size = len(encoded) + 256
+    encoded = encoded.ljust(index_size)
+
+    tmp = out + f'.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, index_size))
+        f.write(encoded)
+        for name, kind, details, data in entries:
+            f.seek(index[name]['offset'])
+            f.write(data)
+    os.replace(tmp, out)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SkatePy asset pack")
+    parser.add_argument('command', choices=('build', 'list'))
+    parser.add_argument('--out', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets.pack'))
+    args = parser.parse_args()
+    if args.command == 'build':
+        index = build(args.out)
+        print(f"packed {len(index)} assets into {args.out}, {os.path.getsize(args.out) / 1024:.0f} KB")
+    else:
+        pack = AssetPack(args.out)
+        for name, entry in pack.index.items():
+            print(f"{entry['length']:>10}  {entry['format']:<5} {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+import numpy as np
+
+
+class Atlas:
+    # shelf packer, frames go left to right and a new shelf starts when the row is full
+    def __init__(self, width=256, padding=1):
+        self.width = width
+        self.padding = padding
+        self.sprites = {}
+        self.regions = {}
+        self.pixels = None
+
+    def add(self, name, frames):
+        self.sprites[name] = [np.asarray(frame, dtype=np.uint8) for frame in frames]
+        self.pixels = None
+
+    def frame_count(self, name):
+        return len(self.sprites.get(name, ()))
+
+    def pack(self):
+        placements = []
+        x = y = shelf_height = 0
+        for name, frames in self.sprites.items():
+            for frame in frames:
+                h, w = frame.shape[:2]
+                if w + 2 * self.padding > self.width:
+                    raise ValueError(f"{name} is wider than the atlas")
+                if x + w + 2 * self.padding > self.width:
+                    x = 0
+                    y += shelf_height
+                    shelf_height = 0
+                placements.append((name, frame, x + self.padding, y + self.padding))
+                x += w + 2 * self.padding
+                shelf_height = max(shelf_height, h + 2 * self.padding)
+
+        height = 1
+        while height < y + shelf_height:
+            height *= 2
+        self.pixels = np.zeros((height, self.width, 4), dtype=np.uint8)
+        self.regions = {name: [] for name in self.sprites}
+        for name, frame, px, py in placements:
+            h, w = frame.shape[:2]
+            self.pixels[py:py + h, px:px + w] = frame
+            if self.padding:
+                self.bleed(px, py, w, h)
+            self.regions[name].append((px / self.width, py / height, (px + w) / self.width, (py + h) / height))
+        return self.pixels
+
+    def bleed(self, px, py, w, h):
+        # repeat the edge pixels into the padding so NEAREST sampling at the border never picks up a neighbour
+        self.pixels[py:py + h, px - 1] = self.pixels[py:py + h, px]
+        self.pixels[py:py + h, px + w] = self.pixels[py:py + h, px + w - 1]
+        self.pixels[py - 1, px - 1:px + w + 1] = self.pixels[py, px - 1:px + w + 1]
+        self.pixels[py + h, px - 1:px + w + 1] = self.pixels[py + h - 1, px - 1:px + w + 1]
+
+    def uv(self, name, frame):
+        if self.pixels is None:
+            self.pack()
+        return self.regions[name][frame]
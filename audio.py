@@ -0,0 +1,161 @@
+import os
+import threading
+import time
+import wave
+from collections import deque
+import numpy as np
+import pygame
+from assets import resolver
+
+FREQUENCY = 44100
+BUFFER = int(os.environ.get('SKATEPY_AUDIO_BUFFER', 512))
+# seconds of music decoded per queued chunk, the thread keeps one chunk queued behind the playing one
+CHUNK_SECONDS = 0.25
+SFX = ('ollie', 'manual', 'combo')
+MUSIC_CHANNEL = 0
+
+
+def to_stereo16(frames, channels, width, rate, frequency=FREQUENCY):
+    # WAV frames as the mixer's signed 16 bit stereo at its rate
+    if width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.int16) - 128) << 8
+    elif width == 2:
+        samples = np.frombuffer(frames, dtype='<i2')
+    else:
+        raise ValueError(f"{width * 8} bit WAV is not supported")
+    samples = samples.reshape(-1, channels)
+    if channels == 1:
+        samples = np.repeat(samples, 2, axis=1)
+    samples = samples[:, :2]
+    if rate != frequency and len(samples):
+        positions = np.arange(0, len(samples), rate / frequency)
+        samples = np.column_stack([np.interp(positions, np.arange(len(samples)), samples[:, c]) for c in range(2)])
+    return np.ascontiguousarray(samples, dtype=np.int16)
+
+
+def synth(name, frequency=FREQUENCY):
+    # stand-in effects for when sfx/<name>.wav is not there
+    t = np.arange(int(frequency * 0.12)) / frequency
+    if name == 'ollie':
+        signal = np.random.default_rng(1).uniform(-1, 1, len(t)) * np.exp(-t * 40)
+    elif name == 'manual':
+        signal = np.sign(np.sin(2 * np.pi * 880 * t)) * np.exp(-t * 60)
+    else:
+        signal = np.sin(2 * np.pi * (660 + 2000 * t) * t) * np.exp(-t * 15)
+    mono = (signal * 0.4 * 32767).astype(np.int16)
+    return np.column_stack((mono, mono))
+
+
+def decode_sfx(name, frequency=FREQUENCY):
+    try:
+        with resolver.wave(f'sfx/{name}.wav') as f:
+            return to_stereo16(f.readframes(f.getnframes()), f.getnchannels(), f.getsampwidth(), f.getframerate(), frequency)
+    except (OSError, EOFError, wave.Error, ValueError):
+        return synth(name, frequency)
+
+
+def decode_effects(frequency=FREQUENCY):
+    # no pygame calls, so this can run on a loader thread before the mixer exists
+    return {name: decode_sfx(name, frequency) for name in SFX}
+
+
+class Audio:
+    def __init__(self, buffer=BUFFER, frequency=FREQUENCY, effects=None):
+        pygame.mixer.pre_init(frequency, -16, 2, buffer)
+        pygame.mixer.init()
+        self.frequency, _, channels = pygame.mixer.get_init()
+        self.buffer = buffer
+        self.stereo = channels == 2
+        # channel 0 streams music, each effect gets its own channel so they never cut each other off
+        pygame.mixer.set_num_channels(1 + len(SFX))
+        pygame.mixer.set_reserved(1 + len(SFX))
+        self.music_channel = pygame.mixer.Channel(MUSIC_CHANNEL)
+        self.channels = {name: pygame.mixer.Channel(1 + i) for i, name in enumerate(SFX)}
+        # decoded samples are only usable if the mixer gave the rate they were resampled to
+        effects = effects if effects is not None and self.frequency == frequency else {}
+        self.sounds = {name: self.sound(effects[name]) if name in effects else self.load_sfx(name) for name in SFX}
+        self.music_thread = None
+        self.music_stop = threading.Event()
+        self.latency = {'music': deque(maxlen=64), 'sfx': deque(maxlen=64)}
+
+    @property
+    def buffer_ms(self):
+        return self.buffer / self.frequency * 1000
+
+    @property
+    def music_playing(self):
+        return self.music_thread is not None
+
+    def sound(self, samples):
+        if not self.stereo:
+            samples = samples[:, 0]
+        return pygame.sndarray.make_sound(np.ascontiguousarray(samples))
+
+    def load_sfx(self, name):
+        return self.sound(decode_sfx(name, self.frequency))
+
+    def play(self, name, pressed=None):
+        pressed = time.perf_counter() if pressed is None else pressed
+        self.channels[name].play(self.sounds[name])
+        self.latency['sfx'].append((time.perf_counter() - pressed) * 1000 + self.buffer_ms)
+
+    def play_music(self, path, pressed=None):
+        # the WAV is opened and decoded on the thread, the key press only starts it
+        self.stop_music()
+        self.music_stop.clear()
+        pressed = time.perf_counter() if pressed is None else pressed
+        self.music_thread = threading.Thread(target=self.stream, args=(path, pressed), daemon=True)
+        self.music_thread.start()
+
+    def stop_music(self):
+        if self.music_thread is None:
+            return
+        self.music_stop.set()
+        self.music_thread.join()
+        self.music_thread = None
+        self.music_channel.stop()
+
+    def toggle_music(self, path, pressed=None):
+        if self.music_playing:
+            self.stop_music()
+        else:
+            self.play_music(path, pressed)
+
+    def stream(self, path, pressed):
+        try:
+            f = resolver.wave(path)
+        except (OSError, EOFError, wave.Error) as e:
+            print(f"Error opening music {path}: {e}")
+            return
+        with f:
+            chunk_frames = max(1, int(f.getframerate() * CHUNK_SECONDS))
+            started = False
+            while not self.music_stop.is_set():
+                if started and self.music_channel.get_queue() is not None:
+                    self.music_stop.wait(CHUNK_SECONDS / 4)
+                    continue
+                frames = f.readframes(chunk_frames)
+                if not frames:
+                    # loop forever, like play(-1) did
+                    f.rewind()
+                    continue
+                try:
+                    chunk = self.sound(to_stereo16(frames, f.getnchannels(), f.getsampwidth(), f.getframerate(), self.frequency))
+                except ValueError as e:
+                    print(f"Error streaming music {path}: {e}")
+                    return
+                if not started:
+                    self.music_channel.play(chunk)
+                    self.latency['music'].append((time.perf_counter() - pressed) * 1000 + self.buffer_ms)
+                    started = True
+                else:
+                    self.music_channel.queue(chunk)
+
+    def stats(self):
+        def median(values):
+            return f"{np.median(values):.1f} ms" if values else "-"
+        return f"Audio: music {median(self.latency['music'])}, sfx {median(self.latency['sfx'])}, buffer {self.buffer}"
+
+    def quit(self):
+        self.stop_music()
+        pygame.mixer.quit()
@@ -0,0 +1,311 @@
+import numpy as np
+import sim
+from sim import SkaterParams, SkaterState, GROUND_HEIGHT, MANUAL_WINDOW
+from entities import Collisions, SpatialHash, SKATER_RADIUS
+from world import Chunk, CHUNK_SIZE, MAX_CRATES, MAX_ENEMIES
+from scoring import TrickTrie, TRICK_POINTS, COMBO_WINDOW
+
+# structure-of-arrays version of course.Course.step, every operation mirrors the scalar code so results match bit for bit
+
+# most entities one chunk can hold: crates, a rail, a ramp and enemies
+CHUNK_ENTITIES = MAX_CRATES + MAX_ENEMIES + 2
+# chunk coordinates packed into one integer, so a sorted array can stand in for the dict World keeps
+CHUNK_STRIDE = 1 << 32
+
+
+class SkaterBatch:
+    def __init__(self, n, params=None, seed=0):
+        self.n = n
+        self.params = params or SkaterParams()
+        self.collisions = BatchCollisions(n, seed)
+        self.scoring = BatchScoring(n)
+        self.x = np.zeros(n)
+        self.y = np.full(n, float(GROUND_HEIGHT))
+        self.z = np.full(n, 5.0)
+        self.pitch = np.zeros(n)
+        self.yaw = np.zeros(n)
+        self.move_speed = np.zeros(n)
+        self.is_ollying = np.zeros(n, dtype=bool)
+        self.ollie_timer = np.zeros(n)
+        self.time = np.zeros(n)
+        self.inputs = np.zeros(n, dtype=np.int64)
+
+        self.last_move_key = np.zeros(n, dtype=np.int64)
+        self.last_move_key_time = np.full(n, np.nan)
+
+    def state(self, i):
+        state = SkaterState(self.params)
+        state.pos = [float(self.x[i]), float(self.y[i]), float(self.z[i])]
+        state.rot = [float(self.pitch[i]), float(self.yaw[i]), 0.0]
+        state.move_speed = float(self.move_speed[i])
+        state.is_ollying = bool(self.is_ollying[i])
+        state.ollie_timer = float(self.ollie_timer[i])
+        state.time = float(self.time[i])
+        state.inputs = int(self.inputs[i])
+        state.last_move_key = int(self.last_move_key[i]) or None
+        state.last_move_key_time = None if np.isnan(self.last_move_key_time[i]) else float(self.last_move_key_time[i])
+        return state
+
+
+class BatchCollisions:
+    # Collisions.check for a whole batch. a vectorised test against the entity boxes of the chunks around each skater
+    # picks out the few near something, only those go through the scalar check. chunks are never unloaded,
+    # every skater has its own part of the world to be in
+    def __init__(self, n, seed=0, chunk_size=CHUNK_SIZE):
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.grid = SpatialHash()
+        # sorted chunk codes, and each chunk's entity boxes as x0, z0, x1, z1 rows padded with boxes nothing overlaps
+        self.codes = np.zeros(0, dtype=np.int64)
+        self.boxes = np.zeros((0, 4, CHUNK_ENTITIES))
+        self.collisions = [None] * n
+        self.touching = np.zeros(n, dtype=bool)
+        self.checked = 0
+
+    def load(self, cx, cz):
+        chunk = Chunk(cx, cz, self.chunk_size, self.seed)
+        boxes = np.empty((4, CHUNK_ENTITIES))
+        boxes[:2] = np.inf
+        boxes[2:] = -np.inf
+        for i, entity in enumerate(chunk.entities):
+            self.grid.insert(entity)
+            boxes[:, i] = entity.x, entity.z, entity.x + entity.width, entity.z + entity.depth
+        at = np.searchsorted(self.codes, cx * CHUNK_STRIDE + cz)
+        self.codes = np.insert(self.codes, at, cx * CHUNK_STRIDE + cz)
+        self.boxes = np.insert(self.boxes, at, boxes, axis=0)
+
+    def rows(self, cx, cz):
+        codes = cx * CHUNK_STRIDE + cz
+        rows = np.searchsorted(self.codes, codes)
+        found = rows < len(self.codes)
+        found[found] = self.codes[rows[found]] == codes[found]
+        if found.all():
+            return rows
+        missing = np.flatnonzero(~found)
+        _, first = np.unique(codes[missing], return_index=True)
+        for i in missing[first]:
+            self.load(int(cx[i]), int(cz[i]))
+        return self.rows(cx, cz)
+
+    def check(self, batch, px, py, pz):
+        r = SKATER_RADIUS
+        x0, x1 = np.minimum(px, batch.x) - r, np.maximum(px, batch.x) + r
+        z0, z1 = np.minimum(pz, batch.z) - r, np.maximum(pz, batch.z) + r
+        size = self.chunk_size
+        cx0, cx1 = np.floor(x0 / size).astype(np.int64), np.floor(x1 / size).astype(np.int64)
+        cz0, cz1 = np.floor(z0 / size).astype(np.int64), np.floor(z1 / size).astype(np.int64)
+        # skaters still inside something have to be checked to find out when they leave it
+        near = self.touching.copy()
+        # every skater against its own chunk, the few whose box reaches into another chunk against that one too
+        for cx, cz, index in ((cx0, cz0, slice(None)), (cx1, cz0, np.flatnonzero(cx1 != cx0)),
+                              (cx0, cz1, np.flatnonzero(cz1 != cz0)), (cx1, cz1, np.flatnonzero((cx1 != cx0) & (cz1 != cz0)))):
+            if isinstance(index, np.ndarray) and not len(index):
+                continue
+            # rows() may load chunks, which replaces self.boxes
+            rows = self.rows(cx[index], cz[index])
+            boxes = self.boxes[rows]
+            near[index] |= ((boxes[:, 0] <= x1[index, None]) & (x0[index, None] <= boxes[:, 2]) &
+                            (boxes[:, 1] <= z1[index, None]) & (z0[index, None] <= boxes[:, 3])).any(axis=1)
+
+        events = {}
+        for i in np.flatnonzero(near):
+            collisions = self.collisions[i]
+            if collisions is None:
+                collisions = self.collisions[i] = Collisions(self.grid)
+            # only what Collisions.check reads and writes
+            state = SkaterState.__new__(SkaterState)
+            state.pos = [float(batch.x[i]), float(batch.y[i]), float(batch.z[i])]
+            state.move_speed = batch.move_speed[i]
+            state.is_ollying = bool(batch.is_ollying[i])
+            state.ollie_timer = batch.ollie_timer[i]
+            found = collisions.check(state, (float(px[i]), float(py[i]), float(pz[i])))
+            batch.x[i], batch.y[i], batch.z[i] = state.pos
+            batch.move_speed[i] = state.move_speed
+            batch.is_ollying[i] = state.is_ollying
+            batch.ollie_timer[i] = state.ollie_timer
+            self.touching[i] = bool(collisions.touching)
+            if found:
+                events[i] = found
+        self.checked += int(near.sum())
+        return events
+
+
+class BatchScoring:
+    # scoring.Scoring's totals for a whole batch. the trie's live partial matches are a set of nodes and few enough sets
+    # are reachable to number them all, so matching a trick is a lookup in a (set, trick) table per skater
+    def __init__(self, n, trie=None, points=TRICK_POINTS, window=COMBO_WINDOW):
+        trie = trie or TrickTrie()
+        self.tricks = list(points)
+        self.points = np.array([points[trick] for trick in self.tricks], dtype=np.int64)
+        self.window = window
+        matches = [[]]
+        numbers = {frozenset(): 0}
+        following, bonuses = [], []
+        for active in matches:
+            following.append([])
+            bonuses.append([])
+            for trick in self.tricks:
+                nodes, match = trie.advance(active, trick)
+                key = frozenset(map(id, nodes))
+                if key not in numbers:
+                    numbers[key] = len(matches)
+                    matches.append(nodes)
+                following[-1].append(numbers[key])
+                bonuses[-1].append(0 if match is None else match.bonus)
+        self.following = np.array(following, dtype=np.int64)
+        self.bonuses = np.array(bonuses, dtype=np.int64)
+
+        self.matches = np.zeros(n, dtype=np.int64)
+        self.total = np.zeros(n, dtype=np.int64)
+        self.combo_score = np.zeros(n, dtype=np.int64)
+        self.best_combo = np.zeros(n, dtype=np.int64)
+        self.deadline = np.full(n, np.inf)
+
+    def end_combo(self, mask):
+        self.matches[mask] = 0
+        self.combo_score[mask] = 0
+        self.deadline[mask] = np.inf
+
+    def expire(self, now):
+        # once per tick is enough, a trick always pushes its combo's deadline past the tick it happened in
+        self.end_combo(self.deadline <= now)
+
+    def trick(self, mask, name, now):
+        code = self.tricks.index(name)
+        points = self.points[code] + self.bonuses[self.matches, code]
+        self.matches = np.where(mask, self.following[self.matches, code], self.matches)
+        self.combo_score = np.where(mask, self.combo_score + points, self.combo_score)
+        self.total = np.where(mask, self.total + points, self.total)
+        self.best_combo = np.maximum(self.best_combo, self.combo_score)
+        self.deadline = np.where(mask, now + self.window, self.deadline)
+
+    def event(self, i, name, now):
+        # one skater's event, for the few the scalar collision check produces
+        if name in self.tricks:
+            code = self.tricks.index(name)
+            points = self.points[code] + self.bonuses[self.matches[i], code]
+            self.matches[i] = self.following[self.matches[i], code]
+            self.combo_score[i] += points
+            self.total[i] += points
+            self.best_combo[i] = max(self.best_combo[i], self.combo_score[i])
+            self.deadline[i] = now + self.window
+        elif name == 'Bail':
+            self.end_combo(i)
+
+
+def add_events(events, mask, event):
+    for i in np.flatnonzero(mask):
+        events.setdefault(i, []).append(event)
+
+
+def step_batch(batch, inputs, dt):
+    # returns each skater's events, in the order sim.step and Collisions.check give them, for the skaters that had any
+    events = {}
+    params = batch.params
+    scale = dt * sim.BASE_TICK_RATE
+    inputs = np.asarray(inputs, dtype=np.int64)
+    pressed = inputs & ~batch.inputs
+    batch.inputs = inputs.copy()
+    # events are stamped with the time after the tick, like sim.run does
+    now = batch.time + dt
+    batch.scoring.expire(now)
+
+    for key in (sim.LEFT, sim.RIGHT):
+        key_pressed = (pressed & key) != 0
+        manual = key_pressed & (batch.last_move_key != 0) & (batch.last_move_key != key) & (batch.time - batch.last_move_key_time < MANUAL_WINDOW)
+        batch.scoring.trick(manual, 'Manual', now)
+        add_events(events, manual, 'Manual')
+        held = ~key_pressed & ((inputs & key) != 0) & (batch.last_move_key == key)
+        batch.last_move_key[key_pressed] = key
+        batch.last_move_key_time = np.where(key_pressed | held, batch.time, batch.last_move_key_time)
+
+    ollie = ((pressed & sim.OLLIE) != 0) & ~batch.is_ollying
+    batch.is_ollying |= ollie
+    batch.ollie_timer[ollie] = 0
+    batch.scoring.trick(ollie, 'Ollie', now)
+    add_events(events, ollie, 'Ollie')
+
+    angle = np.radians(-batch.yaw)
+    sin_a = np.sin(angle)
+    cos_a = np.cos(angle)
+    forward_x, forward_z = -sin_a, -cos_a
+    right_x, right_z = cos_a, -sin_a
+    x, y, z = batch.x, batch.y, batch.z
+
+    forward = ((inputs & sim.FORWARD) != 0) & ((inputs & sim.BRAKE) == 0)
+    brake = ~forward & ((inputs & sim.BRAKE) != 0)
+    coast = ~forward & ~brake
+    cruise = coast & (batch.move_speed == params.max_move_speed)
+    slow = coast & ~cruise
+
+    speed = np.where(forward & (batch.move_speed == 0), params.start_speed, batch.move_speed)
+    speed = np.where(forward, np.minimum(speed + params.acceleration * scale, params.max_move_speed), speed)
+    speed = np.where(brake | slow, np.maximum(speed - params.deceleration * scale, 0), speed)
+    batch.move_speed = speed
+
+    moving = forward | cruise | (slow & (speed > 0))
+    distance = np.where(cruise, params.auto_forward_speed * scale, speed * scale)
+    x = np.where(moving, x + forward_x * distance, x)
+    z = np.where(moving, z + forward_z * distance, z)
+
+    timer = np.where(batch.is_ollying, batch.ollie_timer + scale, batch.ollie_timer)
+    half = params.ollie_duration // 2
+    rising = GROUND_HEIGHT + (params.ollie_height - GROUND_HEIGHT) * (timer / half)
+    falling = params.ollie_height - (params.ollie_height - GROUND_HEIGHT) * ((timer - (half + params.ollie_hang)) / half)
+    height = np.where(timer <= half, rising, np.where(timer <= half + params.ollie_hang, params.ollie_height, falling))
+    y = np.where(batch.is_ollying, height, y)
+    landed = batch.is_ollying & (timer >= params.ollie_duration + params.ollie_hang)
+    batch.ollie_timer = np.where(landed, 0, timer)
+    batch.is_ollying = batch.is_ollying & ~landed
+    add_events(events, landed, 'ollie_end')
+    y = np.where(landed, float(GROUND_HEIGHT), y)
+
+    yaw = batch.yaw
+    left = (inputs & sim.LEFT) != 0
+    side = params.side_move_speed * scale
+    x = np.where(left, x - right_x * side, x)
+    z = np.where(left, z - right_z * side, z)
+    yaw = np.where(left, yaw - params.turn_speed * scale, yaw)
+    right = (inputs & sim.RIGHT) != 0
+    x = np.where(right, x + right_x * side, x)
+    z = np.where(right, z + right_z * side, z)
+    yaw = np.where(right, yaw + params.turn_speed * scale, yaw)
+
+    px, py, pz = batch.x, batch.y, batch.z
+    batch.x, batch.y, batch.z = x.astype(np.float64), y.astype(np.float64), z.astype(np.float64)
+
+    look = params.rot_speed * scale
+    yaw = np.where((inputs & sim.LOOK_LEFT) != 0, yaw - look, yaw)
+    yaw = np.where((inputs & sim.LOOK_RIGHT) != 0, yaw + look, yaw)
+    pitch = batch.pitch
+    pitch = np.where((inputs & sim.LOOK_UP) != 0, np.maximum(pitch - look, -89.0), pitch)
+    pitch = np.where((inputs & sim.LOOK_DOWN) != 0, np.minimum(pitch + look, 89.0), pitch)
+    batch.yaw, batch.pitch = yaw, pitch
+
+    batch.time = now
+
+    for i, found in batch.collisions.check(batch, px, py, pz).items():
+        for event in found:
+            batch.scoring.event(i, event, now[i])
+        events.setdefault(i, []).extend(found)
+    return events
+
+
+def run_batch(batch, scripts, dt=1.0 / sim.BASE_TICK_RATE):
+    # scripts is (ticks, n), one input mask per skater per tick. returns each skater's (time, event) pairs like sim.run
+    events = [[] for _ in range(batch.n)]
+    for inputs in scripts:
+        for i, found in step_batch(batch, inputs, dt).items():
+            now = float(batch.time[i])
+            events[i] += [(now, event) for event in found]
+    return events
+
+
+def mismatches(batch, states):
+    bad = []
+    for i, state in enumerate(states):
+        expected = dict(state.__dict__, params=None)
+        actual = dict(batch.state(i).__dict__, params=None)
+        if expected != actual:
+            bad.append(i)
+    return bad
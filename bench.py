@@ -0,0 +1,1208 @@
+import argparse
+import math
+import sys
+import time
+import numpy as np
+
+# run with: python bench.py <name> [options]
+# benchmarks that need GL use an offscreen context, so QT_QPA_PLATFORM=offscreen works on machines with no display
+
+BENCHMARKS = {}
+# game time simulated when --seconds is not given, the batch steps every skater so it gets a minute instead of an hour
+SECONDS = 3600
+BATCH_SECONDS = 60
+# how much RSS the lifecycle benchmark lets the reused scene grow by over its round trips
+LEAK_MB = 4
+
+
+def benchmark(name):
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def gl_context(width=640, height=480, core=False):
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtGui import QOffscreenSurface, QOpenGLContext, QOpenGLFramebufferObject, QOpenGLFramebufferObjectFormat
+    from pipeline import surface_format, is_core
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    fmt = surface_format(legacy=not core)
+    if not core:
+        fmt.setVersion(2, 1)
+    context = QOpenGLContext()
+    context.setFormat(fmt)
+    if not context.create() or (core and not is_core(context)):
+        raise RuntimeError("could not create an OpenGL context")
+    surface = QOffscreenSurface()
+    surface.setFormat(context.format())
+    surface.create()
+    if not context.makeCurrent(surface):
+        raise RuntimeError("could not make the OpenGL context current")
+    fbo_format = QOpenGLFramebufferObjectFormat()
+    fbo_format.setAttachment(QOpenGLFramebufferObject.CombinedDepthStencil)
+    fbo = QOpenGLFramebufferObject(width, height, fbo_format)
+    fbo.bind()
+    return app, context, surface, fbo
+
+
+class CallCounter:
+    def __init__(self, *modules):
+        self.modules = modules
+        self.count = 0
+        self.saved = []
+
+    def __enter__(self):
+        for module in self.modules:
+            for name in dir(module):
+                func = getattr(module, name)
+                if name.startswith('gl') and callable(func):
+                    self.saved.append((module, name, func))
+                    setattr(module, name, self.wrap(func))
+        return self
+
+    def __exit__(self, *exc):
+        for module, name, func in self.saved:
+            setattr(module, name, func)
+        self.saved = []
+
+    def wrap(self, func):
+        def counted(*args, **kwargs):
+            self.count += 1
+            return func(*args, **kwargs)
+        return counted
+
+
+def report(name, rows):
+    print(name)
+    for label, value in rows:
+        print(f"  {label:<28} {value}")
+
+
+def draw_immediate(floor_texture, birb_texture, camera_pos):
+    from OpenGL.GL import glBindTexture, glBegin, glEnd, glTexCoord2f, glVertex3f, GL_TEXTURE_2D, GL_QUADS
+    glBindTexture(GL_TEXTURE_2D, floor_texture)
+    glBegin(GL_QUADS)
+    glTexCoord2f(0, 0); glVertex3f(-1000, 0, -1000)
+    glTexCoord2f(100, 0); glVertex3f(1000, 0, -1000)
+    glTexCoord2f(100, 100); glVertex3f(1000, 0, 1000)
+    glTexCoord2f(0, 100); glVertex3f(-1000, 0, 1000)
+    glEnd()
+    glBindTexture(GL_TEXTURE_2D, birb_texture)
+    glBegin(GL_QUADS)
+    glTexCoord2f(0, 0); glVertex3f(camera_pos[0] - 5, 20, camera_pos[2])
+    glTexCoord2f(1, 0); glVertex3f(camera_pos[0] + 5, 20, camera_pos[2])
+    glTexCoord2f(1, 1); glVertex3f(camera_pos[0] + 5, 0, camera_pos[2])
+    glTexCoord2f(0, 1); glVertex3f(camera_pos[0] - 5, 0, camera_pos[2])
+    glEnd()
+
+
+def draw_retained(geometry, floor_texture, birb_texture, camera_pos):
+    from OpenGL.GL import glBindTexture, glPushMatrix, glPopMatrix, glTranslatef, GL_TEXTURE_2D
+    geometry.begin()
+    glBindTexture(GL_TEXTURE_2D, floor_texture)
+    geometry.draw('floor')
+    glBindTexture(GL_TEXTURE_2D, birb_texture)
+    glPushMatrix()
+    glTranslatef(camera_pos[0], 0, camera_pos[2])
+    geometry.draw('birb')
+    glPopMatrix()
+    geometry.end()
+
+
+@benchmark('geometry')
+def bench_geometry(args):
+    import OpenGL.GL as gl
+    import geometry
+    from geometry import Geometry, quad
+    app, context, surface, fbo = gl_context()
+    textures = gl.glGenTextures(2)
+    camera_pos = np.array([0.0, 20.0, 5.0])
+
+    results = []
+    for label, use_vbo in (('immediate', None), ('vbo', True), ('display lists', False)):
+        geo = None
+        if use_vbo is not None:
+            geo = Geometry()
+            geo.add('floor', quad(-1000, 0, -1000, 1000, 0, 1000, uv=(0, 0, 100, 100)))
+            geo.add('birb', quad(-5, 20, 0, 5, 0, 0))
+            geo.upload(use_vbo)
+
+        def frame():
+            if geo is None:
+                draw_immediate(textures[0], textures[1], camera_pos)
+            else:
+                draw_retained(geo, textures[0], textures[1], camera_pos)
+
+        with CallCounter(gl, geometry) as counter:
+            frame()
+        calls = counter.count
+        start = time.perf_counter()
+        for _ in range(args.frames):
+            frame()
+        gl.glFinish()
+        elapsed = time.perf_counter() - start
+        results.append((label, calls, elapsed / args.frames * 1e6))
+        if geo is not None:
+            geo.delete()
+
+    report('geometry', [(label, f"{calls} GL calls/frame, {us:.1f} us/frame") for label, calls, us in results])
+
+
+def random_script(rng, ticks, hold=30):
+    import sim
+    keys = np.array([sim.FORWARD, sim.BRAKE, sim.LEFT, sim.RIGHT, sim.LOOK_LEFT, sim.LOOK_RIGHT, sim.OLLIE])
+    changes = rng.integers(0, 1 << len(keys), size=ticks // hold + 1)
+    masks = np.array([int(np.bitwise_or.reduce(keys[[b for b in range(len(keys)) if c >> b & 1]], initial=0)) for c in changes])
+    return np.repeat(masks, hold)[:ticks]
+
+
+@benchmark('sim')
+def bench_sim(args):
+    import sim
+    from sim import SkaterState
+    from course import Course
+    from scoring import Scoring
+    rng = np.random.default_rng(args.seed)
+    ticks = int(args.seconds * sim.BASE_TICK_RATE)
+    script = [int(i) for i in random_script(rng, ticks)]
+    state = SkaterState()
+    start = time.perf_counter()
+    events = Course().run(state, script)
+    elapsed = time.perf_counter() - start
+    scoring = Scoring()
+    scoring.run(events)
+    report('sim', [
+        ('ticks', ticks),
+        ('wall time', f"{elapsed:.3f} s"),
+        ('simulated s / wall s', f"{args.seconds / elapsed:.0f}"),
+        ('us / tick', f"{elapsed / ticks * 1e6:.2f}"),
+        ('events', len(events)),
+        ('score', scoring.total),
+        ('best combo', scoring.best_combo),
+    ])
+
+
+@benchmark('batch')
+def bench_batch(args):
+    import sim
+    from course import Course
+    from scoring import Scoring
+    from batch import SkaterBatch, run_batch, mismatches
+    rng = np.random.default_rng(args.seed)
+    ticks = int(args.seconds * sim.BASE_TICK_RATE)
+    scripts = np.stack([random_script(rng, ticks, hold=int(rng.integers(1, 40))) for _ in range(args.skaters)], axis=1)
+
+    skaters = SkaterBatch(args.skaters)
+    start = time.perf_counter()
+    events = run_batch(skaters, scripts)
+    elapsed = time.perf_counter() - start
+
+    checked = min(args.skaters, 32)
+    states = [sim.SkaterState() for _ in range(checked)]
+    start = time.perf_counter()
+    scalar_events = [Course().run(state, [int(inputs) for inputs in scripts[:, i]]) for i, state in enumerate(states)]
+    scalar_elapsed = time.perf_counter() - start
+    bad = mismatches(skaters, states)
+    bad += [i for i, expected in enumerate(scalar_events) if events[i] != expected and i not in bad]
+    for i, expected in enumerate(scalar_events):
+        scoring = Scoring()
+        scoring.run(expected)
+        if (scoring.total, scoring.best_combo) != (skaters.scoring.total[i], skaters.scoring.best_combo[i]) and i not in bad:
+            bad.append(i)
+
+    report('batch', [
+        ('skaters x ticks', f"{args.skaters} x {ticks}"),
+        ('batch skater-ticks / s', f"{args.skaters * ticks / elapsed:,.0f}"),
+        ('scalar skater-ticks / s', f"{checked * ticks / scalar_elapsed:,.0f}"),
+        ('total score', int(skaters.scoring.total.sum())),
+        ('best combo', int(skaters.scoring.best_combo.max())),
+        ('collision checks', f"{skaters.collisions.checked / (args.skaters * ticks):.1%} of skater-ticks"),
+        ('scalar mismatches', f"{len(bad)} of {checked}"),
+    ])
+    if bad:
+        sys.exit(1)
+
+
+@benchmark('replay')
+def bench_replay(args):
+    import sim
+    from course import Course
+    from replay import Recorder, Replay
+    rng = np.random.default_rng(args.seed)
+    ticks = int(args.seconds * sim.BASE_TICK_RATE)
+    script = [int(i) for i in random_script(rng, ticks, hold=8)]
+
+    start = time.perf_counter()
+    recorder = Recorder()
+    for inputs in script:
+        recorder.record(inputs)
+    data = recorder.finish()
+    encode = time.perf_counter() - start
+
+    replay = Replay(data)
+    start = time.perf_counter()
+    state, events = replay.run()
+    elapsed = time.perf_counter() - start
+
+    live = sim.SkaterState()
+    live_events = Course().run(live, script)
+    report('replay', [
+        ('ticks', ticks),
+        ('size', f"{len(data)} bytes ({len(data) / ticks:.2f} bytes/tick, {ticks * 2} raw)"),
+        ('encode', f"{encode:.3f} s"),
+        ('headless replay speed', f"{args.seconds / elapsed:.0f}x real time"),
+        ('matches live run', events == live_events and state.pos == live.pos),
+    ])
+
+
+@benchmark('scoring')
+def bench_scoring(args):
+    import sim
+    from replay import Recorder, Replay
+    from scoring import Scoring, TableScan, TRICK_POINTS
+    rng = np.random.default_rng(args.seed)
+    ticks = int(args.seconds * sim.BASE_TICK_RATE)
+    rows = []
+
+    # recorded runs, scored offline from their event streams
+    events = []
+    for _ in range(args.runs):
+        recorder = Recorder()
+        for inputs in random_script(rng, ticks, hold=8):
+            recorder.record(int(inputs))
+        events.append(Replay(recorder.finish()).run()[1])
+    start = time.perf_counter()
+    totals = []
+    for run in events:
+        scoring = Scoring()
+        scoring.run(run)
+        totals.append(scoring.total)
+    elapsed = time.perf_counter() - start
+    count = sum(len(run) for run in events)
+    rows.append((f"{args.runs} replays", f"{count} events, {count / elapsed:,.0f} events/s, "
+                 f"{args.runs * args.seconds / elapsed:,.0f}x real time, best total {max(totals)}"))
+
+    # every trick kind plus bails, spaced so combos both chain and expire
+    names = np.array(list(TRICK_POINTS) + ['Bail'])
+    kinds = rng.choice(len(names), size=args.frames * 500, p=[0.3, 0.2, 0.2, 0.2, 0.1])
+    times = np.cumsum(rng.exponential(2.0, size=len(kinds)))
+    stream = [(float(when), str(names[kind])) for when, kind in zip(times, kinds)]
+    results = []
+    for label, matcher in (('trie', None), ('table scan', TableScan())):
+        scoring = Scoring(matcher)
+        start = time.perf_counter()
+        scored = scoring.run(stream)
+        elapsed = time.perf_counter() - start
+        results.append((scoring.total, scored))
+        rows.append((label, f"{len(stream) / elapsed:,.0f} events/s, {sum(1 for _, e in scored if e != 'combo_end')} sequences, "
+                     f"total {scoring.total}, best combo {scoring.best_combo}"))
+    rows.append(('same results', results[0] == results[1]))
+    report('scoring', rows)
+
+
+@benchmark('hud')
+def bench_hud(args):
+    import os
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtCore import QObject, QEvent, QTimer
+    from PyQt5.QtWidgets import QApplication, QWidget, QLabel
+    import sim
+    from hud import Hud
+    from scoring import Scoring
+    from sprites import SpriteCache
+    from skate import SIDE_POSE_SECONDS
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+
+    class PaintCounter(QObject):
+        def __init__(self):
+            super(PaintCounter, self).__init__()
+            self.paints = 0
+
+        def eventFilter(self, watched, event):
+            if event.type() == QEvent.Paint:
+                self.paints += 1
+            return False
+
+    def labels():
+        window = QWidget()
+        window.resize(800, 600)
+        score, preview = QLabel(window), QLabel(window)
+        score.setGeometry(662, 332, 128, 130)
+        preview.setGeometry(662, 462, 128, 128)
+        counter = PaintCounter()
+        score.installEventFilter(counter)
+        preview.installEventFilter(counter)
+        window.show()
+        return window, score, preview, counter
+
+    def score_text(scoring):
+        if scoring.combo_score > 0:
+            return f"{scoring.last_move} (+{scoring.score})\nCombo: {scoring.combo_score}"
+        return None
+
+    rng = np.random.default_rng(args.seed)
+    ticks = min(int(args.seconds * sim.BASE_TICK_RATE), args.frames * 10)
+    script = [int(i) for i in random_script(rng, ticks, hold=20)]
+    sprites = SpriteCache()
+    rows = []
+    for label in ('per-call widgets', 'dirty-flag HUD'):
+        window, score, preview, counter = labels()
+        state, scoring = sim.SkaterState(), Scoring()
+        side_timer = QTimer()
+        side_timer.setSingleShot(True)
+        hud = Hud(sprites)
+        hud.add('score', score)
+        hud.add('preview', preview)
+        side_pose, side_until, calls = 'forward', 0.0, 0
+        shown = [None]
+
+        def show(pose):
+            # only a pose already on the label was skipped, everything else went to the widget
+            if shown[0] == pose:
+                return 0
+            preview.setPixmap(sprites.get(pose))
+            shown[0] = pose
+            return 1
+
+        app.processEvents()
+        counter.paints = 0
+        start = time.perf_counter()
+        for inputs in script:
+            events = sim.step(state, inputs, 1.0 / sim.BASE_TICK_RATE)
+            events += scoring.feed(state.time, events)
+            if label == 'per-call widgets':
+                # what update_hud did before: every call goes to the widget, the pixmap is only deduplicated by SpriteCache
+                for event in events:
+                    if event == 'Ollie':
+                        calls += show('ollie')
+                    elif event == 'ollie_end':
+                        calls += show('forward')
+                if events:
+                    text = score_text(scoring)
+                    if text is None:
+                        score.hide()
+                    else:
+                        score.setText(text)
+                        score.show()
+                        calls += 1
+                    calls += 1
+                for key, pose in ((sim.LEFT, 'left'), (sim.RIGHT, 'right')):
+                    if state.inputs & key:
+                        calls += show(pose) + 1
+                        side_timer.start(500)
+            else:
+                if events:
+                    text = score_text(scoring)
+                    if text is None:
+                        hud.set('score', visible=False)
+                    else:
+                        hud.set('score', text=text, visible=True)
+                if state.inputs & (sim.LEFT | sim.RIGHT):
+                    side_pose = 'right' if state.inputs & sim.RIGHT else 'left'
+                    side_until = state.time + SIDE_POSE_SECONDS
+                hud.set('preview', pose=side_pose if state.time < side_until else ('ollie' if state.is_ollying else 'forward'))
+                hud.apply()
+                calls = hud.applied
+            app.processEvents()
+        elapsed = time.perf_counter() - start
+        rows.append((label, f"{calls} widget calls, {counter.paints} label repaints, {elapsed / ticks * 1e6:.0f} us/tick"
+                     + (f", {hud.saved} saved" if label == 'dirty-flag HUD' else "")))
+        window.close()
+    report('hud', rows)
+
+
+@benchmark('input')
+def bench_input(args):
+    import sim
+    from controls import Bindings, InputQueue
+    from loop import FixedTimestep
+    rng = np.random.default_rng(args.seed)
+    duration = min(args.seconds, 600)
+    bits = {'a': sim.LEFT, 'd': sim.RIGHT, 'space': sim.OLLIE}
+
+    # steering taps 5-60 ms long, mostly alternating A and D the way manuals are done, and the odd ollie
+    presses = []
+    released = dict.fromkeys(bits, 0.0)
+    when = 0.0
+    while when < duration:
+        when += rng.exponential(0.12)
+        source = 'space' if rng.random() < 0.1 else ('a', 'd')[len(presses) % 2]
+        # a key has to come up before it can go down again
+        down = max(when, released[source] + 0.001)
+        released[source] = down + rng.uniform(0.005, 0.06)
+        presses.append((down, released[source], source))
+    key_events = sorted([(down, source, True) for down, up, source in presses] + [(up, source, False) for down, up, source in presses])
+
+    def ideal(start, end):
+        # what the skater had down at the end of the tick, plus anything pressed during it
+        inputs = 0
+        for down, up, source in presses:
+            if down <= end and (up > end or down > start):
+                inputs |= bits[source]
+        return inputs
+
+    # frames mostly on time, with the occasional hitch that makes the loop catch up several ticks at once
+    frame_times = np.cumsum(np.where(rng.random(int(duration * 70)) < 0.05, 0.05, rng.normal(1 / 60, 0.002, int(duration * 70)).clip(0.005)))
+    rows = []
+    for label in ('sampled per frame', 'timestamped queue'):
+        clock = [0.0]
+        loop = FixedTimestep(clock=lambda: clock[0])
+        queue = InputQueue(Bindings({}, {source: name for source, name in (('a', 'left'), ('d', 'right'), ('space', 'ollie'))}))
+        keys, tapped, index = set(), [0], 0
+        masks, expected = [], []
+
+        def tick(dt):
+            if label == 'sampled per frame':
+                inputs = tapped[0]
+                for key in keys:
+                    inputs |= bits[key]
+                tapped[0] = 0
+            else:
+                inputs = queue.drain(loop.tick_end)
+            end = loop.tick_end
+            masks.append(inputs)
+            expected.append(ideal(end - loop.dt, end))
+
+        for now in frame_times:
+            if now > duration:
+                break
+            # Qt hands over every key event that happened before the frame's timer fires
+            while index < len(key_events) and key_events[index][0] <= now:
+                when, source, down = key_events[index]
+                index += 1
+                if down:
+                    keys.add(source)
+                    tapped[0] |= bits[source]
+                    queue.press(source, when)
+                else:
+                    keys.discard(source)
+                    queue.release(source, when)
+            clock[0] = now
+            loop.advance(tick)
+
+        wrong = sum(1 for a, b in zip(masks, expected) if a != b)
+        manuals = sum(event == 'Manual' for _, event in sim.run(sim.SkaterState(), masks))
+        ideal_manuals = sum(event == 'Manual' for _, event in sim.run(sim.SkaterState(), expected))
+        rows.append((label, f"{wrong} of {len(masks)} ticks with the wrong inputs, {manuals} manuals ({ideal_manuals} with exact timing)"))
+    report('input', rows)
+
+
+@benchmark('pacing')
+def bench_pacing(args):
+    from pacing import FramePacer
+    rng = np.random.default_rng(args.seed)
+    # a laptop that cannot quite hold 60 Hz: CPU work plus a GPU fill cost that shrinks with the pixel count
+    refresh = 60.0
+    period = 1 / refresh
+    frames = args.frames
+    cpu = rng.normal(0.005, 0.001, frames).clip(0.002)
+    fill = np.where(rng.random(frames) < 0.02, 0.03, rng.normal(0.016, 0.002, frames)).clip(0.005)
+    rows = []
+    for mode, cap in (('vsync', None), ('uncapped', None), ('cap', 30), ('adaptive', None)):
+        pacer = FramePacer(mode, cap, refresh)
+        now = 0.0
+        scales, presents = [], []
+        for i in range(frames):
+            now += pacer.delay_ms(now) / 1000
+            scales.append(pacer.scale)
+            done = now + cpu[i] + fill[i] * pacer.scale ** 2
+            # with vsync the swap waits for the next refresh boundary
+            now = math.ceil(done / period - 1e-9) * period if pacer.swap_interval else done
+            pacer.presented(now)
+            presents.append(now)
+        intervals = np.diff(presents) * 1000
+        p50, p95, p99 = np.percentile(intervals, (50, 95, 99))
+        name = f"cap {cap}" if mode == 'cap' else mode
+        rows.append((name, f"{1000 / intervals.mean():.1f} fps, present p50 {p50:.1f} p95 {p95:.1f} p99 {p99:.1f} ms, "
+                     f"stddev {intervals.std():.2f} ms, {pacer.missed} missed, mean scale {np.mean(scales):.0%}"))
+    report('pacing', rows)
+
+
+def startup_probe(mode):
+    import resource
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QCoreApplication, QEventLoop, QTimer, Qt
+    # as skate.py's __main__ does, the web title imports QtWebEngine after the app exists
+    QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
+    app = QApplication(sys.argv[:1])
+    import skate
+    window = skate.MainWindow(web_title=mode == 'web')
+    window.show()
+    if window.web_view is not None:
+        loop = QEventLoop()
+        window.web_view.loadFinished.connect(loop.quit)
+        QTimer.singleShot(10000, loop.quit)
+        loop.exec_()
+    app.processEvents()
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    print(f"rss {rss}")
+
+
+@benchmark('startup')
+def bench_startup(args):
+    import subprocess
+    rows = []
+    for mode in ('native', 'web'):
+        times = []
+        rss = None
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            result = subprocess.run([sys.executable, __file__, 'startup', '--probe', mode], capture_output=True, text=True)
+            times.append(time.perf_counter() - start)
+            if result.returncode != 0:
+                rss = None
+                break
+            rss = int(result.stdout.split('rss ')[-1].split()[0])
+        if rss is None:
+            rows.append((mode, f"failed: {result.stderr.strip().splitlines()[-1] if result.stderr.strip() else result.returncode}"))
+        else:
+            rows.append((mode, f"{min(times) * 1000:.0f} ms to title (best of {len(times)}), max RSS {rss / 1024:.0f} MB"))
+    report('startup', rows)
+
+
+def assets_probe(mode):
+    # everything the game reads from tex/, bgm/ and sfx/ before the first frame, in a fresh process
+    start = time.perf_counter()
+    import os
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtGui import QGuiApplication
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv[:1])
+    from assets import resolver, TEXTURES
+    from audio import SFX
+    from sprites import BIRB_POSES
+    imported = time.perf_counter()
+    if (resolver.pack is not None) != (mode == 'pack'):
+        raise RuntimeError(f"asset pack {'missing' if mode == 'pack' else 'in use'}")
+    pixmaps = [resolver.pixmap('tex/HTML/title.png')] + [resolver.pixmap(name) for name in BIRB_POSES.values()]
+    frames = [resolver.frames(name, size, composite) for name, size, composite in TEXTURES]
+    sounds = []
+    for name in SFX:
+        if resolver.exists(f'sfx/{name}.wav'):
+            with resolver.wave(f'sfx/{name}.wav') as f:
+                sounds.append(f.readframes(f.getnframes()))
+    if resolver.exists('bgm/theme.wav'):
+        with resolver.wave('bgm/theme.wav') as f:
+            sounds.append(f.readframes(f.getnframes()))
+    loaded = time.perf_counter()
+    print(f"imports {(imported - start) * 1000:.1f} assets {(loaded - imported) * 1000:.1f} "
+          f"count {len(pixmaps) + len(frames) + len(sounds)}")
+
+
+@benchmark('assets')
+def bench_assets(args):
+    import os
+    import subprocess
+    import tempfile
+    from assets import build
+    work = tempfile.mkdtemp(prefix='skatepy-assets-')
+    pack = os.path.join(work, 'assets.pack')
+    start = time.perf_counter()
+    index = build(pack)
+    rows = [('build', f"{len(index)} assets, {os.path.getsize(pack) / 1024:.0f} KB in {(time.perf_counter() - start) * 1000:.0f} ms")]
+    # loose files with an empty texture cache, then with the cache filled by the first run, then the pack
+    cache = os.path.join(work, 'texcache')
+    for label, mode, env in (('loose, cold texture cache', 'loose', {'SKATEPY_PACK': '', 'SKATEPY_CACHE': cache}),
+                             ('loose, warm texture cache', 'loose', {'SKATEPY_PACK': '', 'SKATEPY_CACHE': cache}),
+                             ('pack', 'pack', {'SKATEPY_PACK': pack})):
+        totals, loads = [], []
+        runs = 1 if 'cold' in label else args.runs
+        for _ in range(runs):
+            started = time.perf_counter()
+            result = subprocess.run([sys.executable, __file__, 'assets', '--probe', mode], capture_output=True, text=True,
+                                    env=dict(os.environ, **env))
+            totals.append(time.perf_counter() - started)
+            if result.returncode != 0:
+                break
+            loads.append(float(result.stdout.split('assets ')[-1].split()[0]))
+        if result.returncode != 0:
+            rows.append((label, f"failed: {result.stderr.strip().splitlines()[-1] if result.stderr.strip() else result.returncode}"))
+        else:
+            rows.append((label, f"{min(loads):.1f} ms loading assets, {min(totals) * 1000:.0f} ms for the whole process (best of {runs})"))
+    report('assets', rows)
+
+
+@benchmark('textures')
+def bench_textures(args):
+    import os
+    import tempfile
+    import texcache
+    textures = [
+        (os.path.join('tex', 'brick.png'), (64, 64), False),
+        (os.path.join('tex', 'birb', 'thirdperson.gif'), (64, 64), True),
+    ]
+    texcache.CACHE_DIR = tempfile.mkdtemp(prefix='skatepy-textures-')
+
+    def timed(label):
+        start = time.perf_counter()
+        for path, size, composite in textures:
+            texcache.load_frames(path, size, composite)
+        return label, f"{(time.perf_counter() - start) * 1000:.2f} ms"
+
+    rows = [timed('PIL decode + disk write')]
+    texcache.clear_memory_cache()
+    rows.append(timed('disk cache (memmap)'))
+    rows.append(timed('memory cache'))
+    start = time.perf_counter()
+    for path, size, composite in textures:
+        texcache.decode(path, size, composite)
+    rows.append(('PIL decode only', f"{(time.perf_counter() - start) * 1000:.2f} ms"))
+    report('textures', rows)
+
+
+@benchmark('world')
+def bench_world(args):
+    import sim
+    from sim import SkaterState
+    from world import World
+    rng = np.random.default_rng(args.seed)
+    ticks = int(args.seconds * sim.BASE_TICK_RATE)
+    script = [int(i) for i in random_script(rng, ticks)]
+    # render once per tick at the game's aspect ratio, walking the same run for every view distance
+    aspect = 800 / 550
+
+    rows = []
+    for view_distance in (2, 4, 8, 16):
+        world = World(view_distance=view_distance, seed=args.seed)
+        state = SkaterState()
+        most_loaded = visible = draws = 0
+        elapsed = 0.0
+        for inputs in script:
+            sim.step(state, inputs, 1.0 / sim.BASE_TICK_RATE)
+            start = time.perf_counter()
+            world.update(state.pos)
+            chunks = world.visible(state.pos, state.rot, 45, aspect)
+            elapsed += time.perf_counter() - start
+            most_loaded = max(most_loaded, len(world.chunks))
+            visible += len(chunks)
+            draws += sum(1 + len(chunk.entities) for chunk in chunks)
+        rows.append((f"distance {view_distance} ({world.far} units)",
+                     f"{most_loaded} chunks max, {visible / ticks:.1f} visible, {draws / ticks:.1f} draws/frame, "
+                     f"{elapsed / ticks * 1e6:.1f} us/frame, {world.loaded} loads, {world.unloaded} unloads"))
+    rows.append(('distance skated', f"{math.hypot(state.pos[0], state.pos[2]):.0f} units"))
+    report('world', rows)
+
+
+@benchmark('pipeline')
+def bench_pipeline(args):
+    import OpenGL.GL as gl
+    import billboards
+    import geometry
+    import pipeline
+    from billboards import Billboards
+    from entities import ENEMY
+    from geometry import Geometry, quad
+    from matrices import Camera
+    from pipeline import ShaderManager, FixedPipeline, CorePipeline
+    from world import World, tile_mesh, crate_mesh, rail_mesh, ramp_mesh, ENEMY_WIDTH, TALLEST
+    width, height = 800, 550
+    # skate forward while turning, stopping every other second so the camera is sometimes still
+    path = np.cumsum(np.arange(args.frames) // 60 % 2 == 0)
+
+    rows = []
+    for label, core in (('fixed function', False), ('core 3.3', True)):
+        try:
+            app, context, surface, fbo = gl_context(width, height, core=core)
+        except RuntimeError as e:
+            rows.append((label, f"skipped: {e}"))
+            continue
+        texture = gl.glGenTextures(1)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, texture)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_NEAREST)
+        gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_RGBA, 64, 64, 0, gl.GL_RGBA, gl.GL_UNSIGNED_BYTE, np.full((64, 64, 4), 255, np.uint8))
+        world = World(seed=args.seed)
+        geo = Geometry()
+        geo.add('tile', tile_mesh(world.chunk_size))
+        geo.add('crate', crate_mesh())
+        geo.add('rail/x', rail_mesh(along_x=True))
+        geo.add('rail/z', rail_mesh(along_x=False))
+        geo.add('ramp', ramp_mesh())
+        geo.add('birb', quad(-5, 20, 0, 5, 0, 0))
+        geo.upload(core=core)
+        shaders = ShaderManager()
+        renderer = CorePipeline(geo, shaders) if core else FixedPipeline(geo)
+        renderer.setup()
+        enemies = Billboards([(0, 0, 1, 1)], (ENEMY_WIDTH, TALLEST))
+        enemies.upload(shaders, core=core)
+        camera = Camera(45)
+
+        def frame(t):
+            pos = (math.sin(t / 200) * 300, 20, -t * 1.5)
+            rot = (0, math.degrees(t / 200) * 0.3)
+            world.update(pos)
+            camera.set(pos, rot, width / height, world.far)
+            renderer.begin_frame(camera)
+            chunks = world.cull(camera.view_projection)
+            geo.begin()
+            renderer.draw_chunks(chunks, texture)
+            renderer.draw('birb', pos[0], 0, pos[2])
+            geo.end()
+            enemies.set([(e.x + e.width / 2, 0, e.z + e.depth / 2) for c in chunks for e in c.entities if e.kind == ENEMY], 0)
+            enemies.draw(texture, camera)
+
+        with CallCounter(gl, geometry, pipeline, billboards) as counter:
+            frame(0)
+        calls = counter.count
+        cpu = time.process_time()
+        wall = time.perf_counter()
+        for t in path:
+            frame(t)
+        cpu = time.process_time() - cpu
+        gl.glFinish()
+        wall = time.perf_counter() - wall
+        rows.append((label, f"{calls} GL calls/frame, {cpu / args.frames * 1e6:.0f} us CPU/frame, "
+                     f"{wall / args.frames * 1e6:.0f} us wall/frame, camera changed {camera.version} times"))
+        enemies.delete()
+        renderer.delete()
+        geo.delete()
+        context.doneCurrent()
+    report('pipeline', rows)
+
+
+@benchmark('frames')
+def bench_frames(args):
+    from headless import HeadlessRenderer, PATHS, SCRIPTS
+    rows = []
+    for core in (True, False):
+        try:
+            renderer = HeadlessRenderer(800, 600, core=core)
+        except RuntimeError as e:
+            rows.append(('core' if core else 'legacy', f"skipped: {e}"))
+            continue
+        label = 'core' if renderer.core else 'legacy'
+        for name in sorted(PATHS) + sorted(SCRIPTS):
+            if name in SCRIPTS:
+                frames, timings = renderer.render_inputs(SCRIPTS[name](args.frames), capture=False)
+            else:
+                frames, timings = renderer.render(PATHS[name](args.frames), capture=False)
+            total = timings.sum(axis=1)
+            p50, p95, p99 = np.percentile(total, (50, 95, 99))
+            rows.append((f"{label} {name}", f"p50 {p50:.2f} ms, p95 {p95:.2f} ms, p99 {p99:.2f} ms, "
+                         f"paint {np.median(timings[:, 0]):.2f} ms, finish {np.median(timings[:, 1]):.2f} ms"))
+        renderer.close()
+    report('frames', rows)
+
+
+@benchmark('entities')
+def bench_entities(args):
+    from entities import Entity, SpatialHash, SKATER_RADIUS, OBSTACLE, brute_force
+    rng = np.random.default_rng(args.seed)
+    rows = []
+    for count in (1000, 10000, 50000):
+        # same density at every size, one entity per 20x20 units, so only the brute-force scan should slow down
+        side = math.sqrt(count) * 20
+        entities = [Entity(OBSTACLE, x, z, 10, 10, 10) for x, z in rng.uniform(-side / 2, side / 2, size=(count, 2))]
+        grid = SpatialHash()
+        start = time.perf_counter()
+        for entity in entities:
+            grid.insert(entity)
+        build = time.perf_counter() - start
+        # a skater-sized box plus one tick of movement, like Collisions.check asks for
+        reach = SKATER_RADIUS + 2
+        centers = rng.uniform(-side / 2, side / 2, size=(args.frames, 2))
+        boxes = [(x - reach, z - reach, x + reach, z + reach) for x, z in centers]
+
+        start = time.perf_counter()
+        hashed = [grid.query(*box) for box in boxes]
+        hashed_us = (time.perf_counter() - start) / len(boxes) * 1e6
+        start = time.perf_counter()
+        scanned = [brute_force(entities, *box) for box in boxes]
+        scanned_us = (time.perf_counter() - start) / len(boxes) * 1e6
+        same = all({id(e) for e in a} == {id(e) for e in b} for a, b in zip(hashed, scanned))
+        nearby = sum(len(found) for found in hashed) / len(boxes)
+        rows.append((f"{count} entities", f"hash {hashed_us:.2f} us/query, brute force {scanned_us:.0f} us/query, "
+                     f"{scanned_us / hashed_us:.0f}x, {nearby:.2f} nearby, build {build * 1000:.0f} ms, "
+                     f"{'same' if same else 'DIFFERENT'} results"))
+    report('entities', rows)
+
+
+@benchmark('billboards')
+def bench_billboards(args):
+    import OpenGL.GL as gl
+    from OpenGL.GLU import gluPerspective
+    from billboards import Billboards, instancing_supported
+    from matrices import Camera
+    from pipeline import ShaderManager
+    app, context, surface, fbo = gl_context(800, 550)
+    shaders = ShaderManager()
+    camera = Camera(45)
+    camera.set((0, 20, 0), (0, 0), 800 / 550, 2000)
+    texture = gl.glGenTextures(1)
+    gl.glBindTexture(gl.GL_TEXTURE_2D, texture)
+    gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_NEAREST)
+    gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_NEAREST)
+    gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_RGBA, 64, 64, 0, gl.GL_RGBA, gl.GL_UNSIGNED_BYTE, np.full((64, 64, 4), 255, np.uint8))
+    gl.glEnable(gl.GL_TEXTURE_2D)
+    gl.glEnable(gl.GL_DEPTH_TEST)
+    gl.glMatrixMode(gl.GL_PROJECTION)
+    gluPerspective(45, 800 / 550, 0.1, 2000)
+    gl.glMatrixMode(gl.GL_MODELVIEW)
+    gl.glTranslatef(0, -20, 0)
+    regions = [(0, 0, 0.5, 1), (0.5, 0, 1, 1)]
+    rng = np.random.default_rng(args.seed)
+
+    def per_sprite(positions, frames):
+        # one translate and one quad per sprite, how the birb is drawn
+        for (x, y, z), frame in zip(positions, frames):
+            gl.glPushMatrix()
+            gl.glTranslatef(x, y, z)
+            u0, v0, u1, v1 = regions[frame % 2]
+            gl.glBegin(gl.GL_QUADS)
+            gl.glTexCoord2f(u0, v1); gl.glVertex3f(-4, 0, 0)
+            gl.glTexCoord2f(u1, v1); gl.glVertex3f(4, 0, 0)
+            gl.glTexCoord2f(u1, v0); gl.glVertex3f(4, 16, 0)
+            gl.glTexCoord2f(u0, v0); gl.glVertex3f(-4, 16, 0)
+            gl.glEnd()
+            gl.glPopMatrix()
+
+    modes = [('per sprite', None), ('cpu expanded', False)]
+    if instancing_supported():
+        modes.append(('instanced', True))
+    rows = []
+    for label, instanced in modes:
+        sprites = Billboards(regions, (8, 16))
+        if instanced is not None:
+            sprites.upload(shaders, instanced=instanced)
+        count = 1024
+        while count <= args.sprites:
+            # spawn in front of the camera, then move them a little every frame so the buffer is refilled each time
+            positions = np.column_stack((rng.uniform(-500, 500, count), np.zeros(count), rng.uniform(-1500, -10, count)))
+            frames = rng.integers(0, 2, count)
+            drawn = 0
+            start = time.perf_counter()
+            while drawn < args.frames and time.perf_counter() - start < 2:
+                positions[:, 0] += rng.normal(0, 0.1, count)
+                gl.glClear(gl.GL_COLOR_BUFFER_BIT | gl.GL_DEPTH_BUFFER_BIT)
+                if instanced is None:
+                    per_sprite(positions, frames)
+                else:
+                    sprites.set(positions, frames + drawn)
+                    sprites.draw(texture, camera)
+                gl.glFinish()
+                drawn += 1
+            fps = drawn / (time.perf_counter() - start)
+            rows.append((f"{label} x {count}", f"{fps:.1f} fps"))
+            # once a mode is below 10 fps, larger counts only take longer to say the same thing
+            if fps < 10:
+                break
+            count *= 4
+        sprites.delete()
+    report('billboards', rows)
+
+
+@benchmark('audio')
+def bench_audio(args):
+    import os
+    import tempfile
+    import wave
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import pygame
+    from audio import Audio, FREQUENCY
+    # a minute of stereo noise, big enough that loading it all at once shows up
+    samples = (np.random.default_rng(args.seed).uniform(-0.2, 0.2, (FREQUENCY * 60, 2)) * 32767).astype('<i2')
+    path = os.path.join(tempfile.mkdtemp(), 'theme.wav')
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(FREQUENCY)
+        f.writeframes(samples.tobytes())
+
+    # what the P key used to do on the GUI thread
+    pygame.mixer.init()
+    start = time.perf_counter()
+    pygame.mixer.music.load(path)
+    pygame.mixer.music.play(-1)
+    blocked = (time.perf_counter() - start) * 1000
+    pygame.mixer.music.stop()
+    pygame.mixer.quit()
+    rows = [('music.load', f"key press blocks {blocked:.2f} ms")]
+
+    for buffer in (256, 512, 1024, 2048, 4096):
+        audio = Audio(buffer)
+        for _ in range(args.runs * 20):
+            audio.play('ollie')
+        blocks = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            audio.play_music(path, start)
+            blocks.append((time.perf_counter() - start) * 1000)
+            while len(audio.latency['music']) < len(blocks) and audio.music_playing:
+                time.sleep(0.001)
+            audio.stop_music()
+        rows.append((f"buffer {buffer}", f"key press blocks {np.median(blocks):.2f} ms, "
+                     f"music {np.median(audio.latency['music']):.1f} ms, sfx {np.median(audio.latency['sfx']):.1f} ms "
+                     f"({audio.buffer_ms:.1f} ms of it is the buffer)"))
+        audio.quit()
+    os.remove(path)
+    report('audio', rows)
+
+
+def lifecycle_probe(mode):
+    # title screen -> game -> pause dialog -> title screen, over and over in one process
+    import gc
+    import os
+    import resource
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    mode, cycles = mode.split(':')
+    cycles = int(cycles)
+    from PyQt5.QtCore import QEvent, QTimer, Qt
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication(sys.argv[:1])
+    import skate
+    window = skate.MainWindow()
+    window.show()
+    # Play waits for the loader, the first start_game() has to find it done or there is no scene yet
+    while not window.loader.done:
+        app.processEvents()
+        time.sleep(0.005)
+    app.processEvents()
+
+    def rss():
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * resource.getpagesize()
+        except OSError:
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def active_timers():
+        active = 0
+        for obj in gc.get_objects():
+            if isinstance(obj, QTimer):
+                try:
+                    active += obj.isActive()
+                except RuntimeError:
+                    pass
+        return active
+
+    def settle():
+        app.processEvents()
+        app.sendPostedEvents(None, QEvent.DeferredDelete)
+
+    scenes = []
+    start = time.perf_counter()
+    for cycle in range(1, cycles + 1):
+        if mode == 'reuse':
+            window.start_game()
+            scene = window.scene
+        else:
+            # what Play and Title Screen did before the scene was kept: a new Scene3D each run, deleteLater on the way out
+            window.close_web_view()
+            window.title_screen.hide()
+            window.play_button.hide()
+            scene = skate.Scene3D(window)
+            window.layout.addWidget(scene)
+            scene.resume()
+            scene.show()
+            scene.setFocus()
+        settle()
+        gl = scene.gl_objects() if scene.context() is not None and scene.context().isValid() else None
+        dialog = skate.PauseDialog(scene)
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+        if mode == 'reuse':
+            dialog.go_to_title_screen()
+        else:
+            dialog.accept()
+            scene.pause()
+            scene.hide()
+            window.layout.removeWidget(scene)
+            scene.deleteLater()
+            window.show_title_screen()
+        settle()
+        if cycle == 1 or cycle % max(1, cycles // 10) == 0:
+            gc.collect()
+            print(f"sample {cycle} rss {rss()} widgets {len(app.allWidgets())} timers {active_timers()} "
+                  f"gl {'-' if gl is None else gl}", flush=True)
+    print(f"elapsed {time.perf_counter() - start}")
+    window.close()
+
+
+@benchmark('lifecycle')
+def bench_lifecycle(args):
+    import subprocess
+    rows = []
+    failed = False
+    for mode, label in (('rebuild', 'new scene per run'), ('reuse', 'one scene, paused')):
+        result = subprocess.run([sys.executable, __file__, 'lifecycle', '--probe', f'{mode}:{args.cycles}'], capture_output=True, text=True)
+        if result.returncode != 0:
+            rows.append((label, f"failed: {result.stderr.strip().splitlines()[-1] if result.stderr.strip() else result.returncode}"))
+            failed = True
+            continue
+        samples = [line.split() for line in result.stdout.splitlines() if line.startswith('sample ')]
+        elapsed = float(result.stdout.split('elapsed ')[-1].split()[0])
+        samples = [dict(zip(sample[::2], sample[1::2])) for sample in samples]
+        # Qt's own caches for showing and hiding widgets grow over the first few hundred round trips and then level off,
+        # so a leak is growth over the second half
+        start, first, last = samples[0], samples[len(samples) // 2], samples[-1]
+        mb = lambda sample: int(sample['rss']) / 1024 / 1024
+        growth = mb(last) - mb(first)
+        rows.append((label, f"{elapsed / args.cycles * 1000:.2f} ms per round trip"))
+        rows.append(('', f"RSS {mb(start):.1f} / {mb(first):.1f} / {mb(last):.1f} MB after {start['sample']} / {first['sample']} / {last['sample']} round trips"))
+        rows.append(('', f"widgets {first['widgets']} -> {last['widgets']}, active timers {first['timers']} -> {last['timers']}, "
+                         f"GL objects {first['gl']} -> {last['gl']}"))
+        if mode == 'reuse' and (growth > LEAK_MB or first['widgets'] != last['widgets'] or first['timers'] != last['timers']
+                                or first['gl'] != last['gl']):
+            failed = True
+            rows.append(('', f"leak: reuse is expected to stay flat (RSS within {LEAK_MB} MB)"))
+    report('lifecycle', rows)
+    if failed:
+        sys.exit(1)
+
+
+def loading_probe(mode):
+    # from pressing Play to a scene that can draw, and the longest the GUI thread went without handling events
+    import os
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    import skate
+    from loader import AssetLoader
+    try:
+        from pipeline import is_core
+        _, context, _, _ = gl_context(core=True)
+        core = is_core(context)
+    except RuntimeError:
+        context = None
+    start = time.perf_counter()
+    stalls = []
+    if mode == 'sync':
+        # what Play used to do: build the scene, then initializeGL decodes and uploads everything in one go
+        scene = skate.Scene3D()
+        if context is not None:
+            scene.setup_gl(core)
+        else:
+            skate.decode_textures()
+        stalls.append(time.perf_counter() - start)
+    else:
+        loader = AssetLoader(skate.startup_jobs())
+        last = time.perf_counter()
+        while not loader.done:
+            app.processEvents()
+            time.sleep(0.001)
+            now = time.perf_counter()
+            stalls.append(now - last)
+            last = now
+        built = time.perf_counter()
+        scene = skate.Scene3D(loader=loader)
+        if context is not None:
+            scene.setup_gl(core, budgeted=True)
+        stalls.append(time.perf_counter() - built)
+        while len(scene.uploads):
+            frame = time.perf_counter()
+            scene.uploads.run()
+            stalls.append(time.perf_counter() - frame)
+    ready = time.perf_counter() - start
+    print(f"ready {ready * 1000:.1f} stall {max(stalls) * 1000:.1f} gl {'yes' if context is not None else 'no'}")
+
+
+@benchmark('loading')
+def bench_loading(args):
+    import os
+    import subprocess
+    import tempfile
+    from assets import build
+    work = tempfile.mkdtemp(prefix='skatepy-loading-')
+    pack = os.path.join(work, 'assets.pack')
+    build(pack)
+    rows = []
+    # loose files with an empty texture cache are the worst case, the pack the best
+    for source, env in (('loose', {'SKATEPY_PACK': ''}), ('pack', {'SKATEPY_PACK': pack})):
+        for mode, label in (('sync', 'GUI thread'), ('async', 'loader')):
+            ready, stalls, gl = [], [], None
+            for run in range(args.runs):
+                cache = os.path.join(work, f'cache-{mode}-{run}')
+                result = subprocess.run([sys.executable, __file__, 'loading', '--probe', mode], capture_output=True, text=True,
+                                        env=dict(os.environ, SKATEPY_CACHE=cache, **env))
+                if result.returncode != 0:
+                    break
+                fields = result.stdout.split('ready ')[-1].split()
+                ready.append(float(fields[0]))
+                stalls.append(float(fields[2]))
+                gl = fields[4]
+            if result.returncode != 0:
+                rows.append((f"{source}, {label}", f"failed: {result.stderr.strip().splitlines()[-1] if result.stderr.strip() else result.returncode}"))
+                continue
+            rows.append((f"{source}, {label}", f"ready in {min(ready):.1f} ms, longest GUI stall {min(stalls):.1f} ms"
+                                               f"{'' if gl == 'yes' else ' (no GL context, decode only)'}"))
+    report('loading', rows)
+
+
+def busy(seconds):
+    # a stall that holds the GIL, like slow Python in a paint or event handler
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+@benchmark('threading')
+def bench_threading(args):
+    import os
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    import skate
+    from controls import qt_key
+    period = 1 / 60
+    frames = max(60, args.frames // 4)
+    rows = []
+    # a frame renders for 4 ms and every 30th frame stalls for 40 ms more. driver stalls (GL calls, swaps) let other
+    # Python threads run, stalls in Python code do not
+    for stall_name, stall in (('driver stall', time.sleep), ('Python stall', busy)):
+        for threaded in (False, True):
+            scene = skate.Scene3D(threaded=threaded)
+            scene.resume()
+            scene.input.press(qt_key('W'), time.perf_counter())
+            next_frame = time.perf_counter()
+            for frame in range(frames):
+                if not threaded:
+                    scene.loop.advance(scene.tick)
+                scene.hud.apply()
+                snapshot, alpha = scene.latest_state()
+                scene.render_state(snapshot, alpha)
+                stall(0.004 + (0.04 if frame % 30 == 29 else 0))
+                # vsync: presented at the next refresh after the frame is done
+                next_frame += period
+                now = time.perf_counter()
+                if now < next_frame:
+                    time.sleep(next_frame - now)
+                else:
+                    next_frame += (now - next_frame) // period * period + period
+                    time.sleep(next_frame - time.perf_counter())
+                scene.tick_stats.presented(time.perf_counter(), snapshot.published)
+            scene.pause()
+            stats = scene.tick_stats
+            late = np.percentile(stats.lateness, (95, 100))
+            latency = np.percentile(stats.latency, (50, 95))
+            rows.append((f"{stall_name}, {'thread' if threaded else 'GUI thread'}",
+                         f"tick jitter {stats.jitter():.2f} ms (longest gap {max(stats.intervals):.1f}), "
+                         f"late p95 {late[0]:.1f} max {late[1]:.1f} ms, state to present p50 {latency[0]:.1f} p95 {latency[1]:.1f} ms, "
+                         f"{scene.loop.ticks} ticks"))
+            scene.audio.quit()
+            scene.deleteLater()
+    report('threading', rows)
+
+
+PROBES = {'startup': startup_probe, 'assets': assets_probe, 'lifecycle': lifecycle_probe, 'loading': loading_probe}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SkatePy benchmarks")
+    parser.add_argument('name', choices=sorted(BENCHMARKS))
+    parser.add_argument('--frames', type=int, default=2000)
+    parser.add_argument('--seconds', type=float)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--skaters', type=int, default=1024)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--sprites', type=int, default=262144)
+    parser.add_argument('--cycles', type=int, default=1000)
+    parser.add_argument('--probe', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.seconds is None:
+        args.seconds = BATCH_SECONDS if args.name == 'batch' else SECONDS
+    if args.probe:
+        PROBES[args.name](args.probe)
+        return
+    BENCHMARKS[args.name](args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+import ctypes
+import math
+import numpy as np
+from OpenGL.GL import *
+
+# per instance: x, y, z of the bottom middle, scale, then the atlas rect u0, v0, u1, v1
+INSTANCE_SIZE = 8
+INSTANCE_STRIDE = INSTANCE_SIZE * 4
+# unit quad as a fan, (0, 0) is the bottom left
+CORNERS = np.array([(0, 0), (1, 0), (1, 1), (0, 1)], dtype=np.float32)
+
+BILLBOARD_MAIN = """
+uniform mat4 view_projection;
+uniform vec2 size;
+uniform vec3 right;
+void main() {
+    vec2 offset = (corner - vec2(0.5, 0.0)) * size * instance.w;
+    vec3 world = instance.xyz + right * offset.x + vec3(0.0, offset.y, 0.0);
+    gl_Position = view_projection * vec4(world, 1.0);
+    uv = mix(region.xy, region.zw, vec2(corner.x, 1.0 - corner.y));
+}
+"""
+
+VERTEX_SHADER = """
+#version 120
+attribute vec2 corner;
+attribute vec4 instance;
+attribute vec4 region;
+varying vec2 uv;
+""" + BILLBOARD_MAIN
+
+FRAGMENT_SHADER = """
+#version 120
+uniform sampler2D atlas;
+varying vec2 uv;
+void main() {
+    vec4 color = texture2D(atlas, uv);
+    if (color.a < 0.01)
+        discard;
+    gl_FragColor = color;
+}
+"""
+
+CORE_VERTEX_SHADER = """
+#version 330 core
+layout(location = 0) in vec2 corner;
+layout(location = 1) in vec4 instance;
+layout(location = 2) in vec4 region;
+out vec2 uv;
+""" + BILLBOARD_MAIN
+
+CORE_FRAGMENT_SHADER = """
+#version 330 core
+uniform sampler2D atlas;
+in vec2 uv;
+out vec4 color;
+void main() {
+    color = texture(atlas, uv);
+    if (color.a < 0.01)
+        discard;
+}
+"""
+
+
+def instancing_supported():
+    try:
+        return bool(glDrawArraysInstanced) and bool(glVertexAttribDivisor) and bool(glCreateShader)
+    except Exception:
+        return False
+
+
+class Billboards:
+    # upright sprites that turn to face the camera, all drawn with one call whatever the count
+    def __init__(self, regions, size, capacity=256):
+        self.regions = np.asarray(regions, dtype=np.float32).reshape(-1, 4)
+        self.size = size
+        self.instances = np.zeros((capacity, INSTANCE_SIZE), dtype=np.float32)
+        self.count = 0
+        self.program = None
+        self.camera_version = None
+        self.vao = None
+        self.corner_vbo = None
+        self.instance_vbo = None
+        self.instanced = False
+
+    def set(self, positions, frames, scales=1.0):
+        positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+        count = len(positions)
+        if count > len(self.instances):
+            capacity = len(self.instances)
+            while capacity < count:
+                capacity *= 2
+            self.instances = np.zeros((capacity, INSTANCE_SIZE), dtype=np.float32)
+        rows = self.instances[:count]
+        rows[:, 0:3] = positions
+        rows[:, 3] = scales
+        rows[:, 4:8] = self.regions[np.asarray(frames, dtype=np.intp) % len(self.regions)]
+        self.count = count
+
+    def upload(self, shaders, core=False, instanced=None):
+        self.delete()
+        if instanced is None:
+            instanced = core or instancing_supported()
+        if instanced:
+            try:
+                if core:
+                    self.program = shaders.program('billboards/core', CORE_VERTEX_SHADER, CORE_FRAGMENT_SHADER)
+                else:
+                    self.program = shaders.program('billboards', VERTEX_SHADER, FRAGMENT_SHADER)
+                self.attributes = {name: glGetAttribLocation(self.program, name) for name in ('corner', 'instance', 'region')}
+                self.uniforms = {name: shaders.location(self.program, name) for name in ('view_projection', 'size', 'right', 'atlas')}
+                self.corner_vbo, self.instance_vbo = glGenBuffers(2)
+                glBindBuffer(GL_ARRAY_BUFFER, self.corner_vbo)
+                glBufferData(GL_ARRAY_BUFFER, CORNERS.nbytes, CORNERS, GL_STATIC_DRAW)
+                glBindBuffer(GL_ARRAY_BUFFER, 0)
+                if core:
+                    self.vao = glGenVertexArrays(1)
+                    glBindVertexArray(self.vao)
+                    self.bind_attributes()
+                    glBindVertexArray(0)
+                    glBindBuffer(GL_ARRAY_BUFFER, 0)
+            except Exception as e:
+                if core:
+                    raise
+                print(f"Instanced billboards unavailable, expanding on the CPU: {e}")
+                self.delete()
+                instanced = False
+        self.instanced = instanced
+
+    def draw(self, texture, camera):
+        if not self.count:
+            return
+        glBindTexture(GL_TEXTURE_2D, texture)
+        # camera right vector in world space, the first row of the yaw rotation the view matrix applies
+        yaw = math.radians(camera.rot[1])
+        right = (math.cos(yaw), 0.0, math.sin(yaw))
+        if self.instanced:
+            self.draw_instanced(right, camera)
+        else:
+            self.draw_expanded(right)
+
+    def bind_attributes(self):
+        corner, instance, region = self.attributes['corner'], self.attributes['instance'], self.attributes['region']
+        glBindBuffer(GL_ARRAY_BUFFER, self.corner_vbo)
+        glEnableVertexAttribArray(corner)
+        glVertexAttribPointer(corner, 2, GL_FLOAT, GL_FALSE, 0, ctypes.c_void_p(0))
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        glEnableVertexAttribArray(instance)
+        glVertexAttribPointer(instance, 4, GL_FLOAT, GL_FALSE, INSTANCE_STRIDE, ctypes.c_void_p(0))
+        glVertexAttribDivisor(instance, 1)
+        glEnableVertexAttribArray(region)
+        glVertexAttribPointer(region, 4, GL_FLOAT, GL_FALSE, INSTANCE_STRIDE, ctypes.c_void_p(16))
+        glVertexAttribDivisor(region, 1)
+
+    def unbind_attributes(self):
+        glVertexAttribDivisor(self.attributes['instance'], 0)
+        glVertexAttribDivisor(self.attributes['region'], 0)
+        for location in self.attributes.values():
+            glDisableVertexAttribArray(location)
+
+    def draw_instanced(self, right, camera):
+        data = self.instances[:self.count]
+        glUseProgram(self.program)
+        if camera.version != self.camera_version:
+            self.camera_version = camera.version
+            glUniformMatrix4fv(self.uniforms['view_projection'], 1, GL_TRUE, camera.view_projection)
+        glUniform2f(self.uniforms['size'], *self.size)
+        glUniform3f(self.uniforms['right'], *right)
+        glUniform1i(self.uniforms['atlas'], 0)
+
+        # orphan the buffer every frame so the driver never waits on the previous frame's instances
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STREAM_DRAW)
+        if self.vao is not None:
+            glBindVertexArray(self.vao)
+            glDrawArraysInstanced(GL_TRIANGLE_FAN, 0, 4, self.count)
+            glBindVertexArray(0)
+        else:
+            self.bind_attributes()
+            glDrawArraysInstanced(GL_TRIANGLE_FAN, 0, 4, self.count)
+            self.unbind_attributes()
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glUseProgram(0)
+
+    def expand(self, right):
+        # the vertex shader's work done with NumPy: four x, y, z, u, v vertices per sprite
+        data = self.instances[:self.count]
+        offsets = (CORNERS - (0.5, 0.0)) * self.size
+        scale = data[:, None, 3:4]
+        vertices = np.empty((self.count, 4, 5), dtype=np.float32)
+        vertices[:, :, 0:3] = data[:, None, 0:3] + scale * offsets[None, :, 0:1] * np.asarray(right, dtype=np.float32)
+        vertices[:, :, 1] += scale[:, :, 0] * offsets[None, :, 1]
+        vertices[:, :, 3] = np.where(CORNERS[:, 0] > 0, data[:, None, 6], data[:, None, 4])
+        vertices[:, :, 4] = np.where(CORNERS[:, 1] > 0, data[:, None, 5], data[:, None, 7])
+        return vertices.reshape(-1, 5)
+
+    def draw_expanded(self, right):
+        vertices = self.expand(right)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        # raw addresses into the one interleaved array, a sliced view would be copied and lose the stride
+        address = vertices.ctypes.data
+        glVertexPointer(3, GL_FLOAT, 20, ctypes.c_void_p(address))
+        glTexCoordPointer(2, GL_FLOAT, 20, ctypes.c_void_p(address + 12))
+        glDrawArrays(GL_QUADS, 0, len(vertices))
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+    def delete(self):
+        # the program belongs to the ShaderManager, which deletes it with the context
+        self.program = None
+        self.camera_version = None
+        if self.vao is not None:
+            glDeleteVertexArrays(1, [self.vao])
+            self.vao = None
+        if self.corner_vbo is not None:
+            glDeleteBuffers(2, [self.corner_vbo, self.instance_vbo])
+            self.corner_vbo = self.instance_vbo = None
+        self.instanced = False
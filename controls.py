@@ -0,0 +1,200 @@
+import json
+import os
+from collections import deque
+import numpy as np
+import sim
+
+# set SKATEPY_BINDINGS to use another file, entries there replace the defaults below
+BINDINGS_PATH = os.environ.get('SKATEPY_BINDINGS', os.path.join(os.path.expanduser('~'), '.config', 'skatepy', 'bindings.json'))
+
+ACTIONS = {
+    'forward': sim.FORWARD,
+    'brake': sim.BRAKE,
+    'left': sim.LEFT,
+    'right': sim.RIGHT,
+    'look_left': sim.LOOK_LEFT,
+    'look_right': sim.LOOK_RIGHT,
+    'look_up': sim.LOOK_UP,
+    'look_down': sim.LOOK_DOWN,
+    'ollie': sim.OLLIE,
+}
+
+# Qt key names, without the Key_ prefix
+DEFAULT_KEYS = {
+    'W': 'forward',
+    'S': 'brake',
+    'A': 'left',
+    'D': 'right',
+    'Left': 'look_left',
+    'J': 'look_left',
+    'Right': 'look_right',
+    'L': 'look_right',
+    'Up': 'look_up',
+    'I': 'look_up',
+    'Down': 'look_down',
+    'K': 'look_down',
+    'Space': 'ollie',
+}
+
+# SDL's layout for an Xbox style pad: left stick moves, right stick looks, A ollies
+DEFAULT_GAMEPAD = {
+    'button 0': 'ollie',
+    'axis 1-': 'forward',
+    'axis 1+': 'brake',
+    'axis 0-': 'left',
+    'axis 0+': 'right',
+    'axis 3-': 'look_left',
+    'axis 3+': 'look_right',
+    'axis 4-': 'look_up',
+    'axis 4+': 'look_down',
+    'hat left': 'look_left',
+    'hat right': 'look_right',
+    'hat up': 'look_up',
+    'hat down': 'look_down',
+}
+
+
+def qt_key(name):
+    from PyQt5.QtCore import Qt
+    key = getattr(Qt, f'Key_{name}', None)
+    if key is None:
+        raise ValueError(f"unknown key {name}")
+    return int(key)
+
+
+class Bindings:
+    # keyboard sources are Qt key codes, gamepad sources are strings like 'button 0' or 'axis 1-'
+    def __init__(self, keys=DEFAULT_KEYS, gamepad=DEFAULT_GAMEPAD):
+        self.sources = {}
+        for name, action in keys.items():
+            self.bind(qt_key(name), action)
+        for source, action in gamepad.items():
+            self.bind(source, action)
+
+    def bind(self, source, action):
+        if not action:
+            self.sources.pop(source, None)
+            return
+        if action not in ACTIONS:
+            raise ValueError(f"unknown action {action}")
+        self.sources[source] = ACTIONS[action]
+
+    def lookup(self, source):
+        return self.sources.get(source, 0)
+
+    def load(self, path=BINDINGS_PATH):
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            for name, action in data.get('keys', {}).items():
+                self.bind(qt_key(name), action)
+            for source, action in data.get('gamepad', {}).items():
+                self.bind(source, action)
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"Error loading key bindings from {path}: {e}")
+            return False
+        return True
+
+
+class InputQueue:
+    # press and release events with the clock time they happened, applied to the tick whose time span holds them
+    def __init__(self, bindings):
+        self.bindings = bindings
+        self.events = deque()
+        self.held = {}
+        # presses the simulation has used but the screen has not shown yet, a deque so the two ends can be on different threads
+        self.unseen = deque()
+        self.latency = deque(maxlen=120)
+        # when each input bit was last pressed, for effects that want to time themselves from the press
+        self.pressed_at = {}
+
+    def press(self, source, when):
+        bit = self.bindings.lookup(source)
+        if bit:
+            self.events.append((when, source, bit, True))
+        return bool(bit)
+
+    def release(self, source, when):
+        self.events.append((when, source, 0, False))
+
+    def release_all(self, when):
+        for source in list(self.held):
+            self.release(source, when)
+
+    def drain(self, until):
+        # a key pressed and let go inside one tick still reaches it, like the old tapped mask
+        taps = 0
+        while self.events and self.events[0][0] <= until:
+            when, source, bit, down = self.events.popleft()
+            if not down:
+                self.held.pop(source, None)
+            elif source not in self.held:
+                self.held[source] = bit
+                taps |= bit
+                self.pressed_at[bit] = when
+                self.unseen.append(when)
+        inputs = taps
+        for bit in self.held.values():
+            inputs |= bit
+        return inputs
+
+    def presented(self, when):
+        # called when a frame reaches the screen, everything drained before it is now visible
+        while self.unseen:
+            self.latency.append((when - self.unseen.popleft()) * 1000)
+
+    def stats(self):
+        if not self.latency:
+            return "Input: -"
+        p50, p95 = np.percentile(self.latency, (50, 95))
+        return f"Input to swap: {p50:.1f} ms p50, {p95:.1f} ms p95"
+
+
+class Gamepad:
+    # the first SDL joystick, polled once per frame so its events are stamped with the poll time
+    def __init__(self, joystick, deadzone=0.4):
+        self.joystick = joystick
+        self.deadzone = deadzone
+        self.down = set()
+
+    @classmethod
+    def open(cls, index=0):
+        try:
+            import pygame
+            pygame.joystick.init()
+            if pygame.joystick.get_count() <= index:
+                return None
+            # SDL only updates joysticks from its event pump, which needs the video subsystem but no window
+            pygame.display.init()
+            joystick = pygame.joystick.Joystick(index)
+            joystick.init()
+        except Exception as e:
+            print(f"Error opening gamepad: {e}")
+            return None
+        return cls(joystick)
+
+    def sources(self):
+        import pygame
+        pygame.event.pump()
+        pad = self.joystick
+        down = {f'button {i}' for i in range(pad.get_numbuttons()) if pad.get_button(i)}
+        for i in range(pad.get_numaxes()):
+            value = pad.get_axis(i)
+            if value <= -self.deadzone:
+                down.add(f'axis {i}-')
+            elif value >= self.deadzone:
+                down.add(f'axis {i}+')
+        if pad.get_numhats():
+            x, y = pad.get_hat(0)
+            down.update(name for name, on in (('hat left', x < 0), ('hat right', x > 0), ('hat up', y > 0), ('hat down', y < 0)) if on)
+        return down
+
+    def poll(self, queue, when):
+        down = self.sources()
+        for source in sorted(down - self.down):
+            queue.press(source, when)
+        for source in sorted(self.down - down):
+            queue.release(source, when)
+        self.down = down
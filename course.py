@@ -0,0 +1,33 @@
+import sim
+from world import World
+from entities import Collisions
+
+
+class Course:
+    # the skater moving through the generated world: physics, then chunk streaming, then collisions.
+    # Scene3D ticks through this and so do replays and benchmarks, so a run headless matches the same run in game
+    def __init__(self, seed=0, world=None):
+        # entities stay MARGIN away from chunk edges, so only the skater's own chunk can be hit
+        # and the smallest world is enough when nothing is drawn
+        self.world = world or World(view_distance=1, seed=seed)
+        self.collisions = Collisions(self.world.entities)
+
+    @property
+    def seed(self):
+        return self.world.seed
+
+    def reset(self, state):
+        self.world.update(state.pos)
+        self.collisions.reset()
+
+    def step(self, state, inputs, dt):
+        prev_pos = list(state.pos)
+        events = sim.step(state, inputs, dt)
+        self.world.update(state.pos)
+        # broad phase against the spatial hash, then the ollie arc against whatever is near
+        events += self.collisions.check(state, prev_pos)
+        return events
+
+    def run(self, state, script, dt=1.0 / sim.BASE_TICK_RATE):
+        self.reset(state)
+        return sim.run(state, script, dt, self.step)
@@ -0,0 +1,147 @@
+import math
+from sim import GROUND_HEIGHT
+
+OBSTACLE = 'obstacle'
+RAIL = 'rail'
+RAMP = 'ramp'
+ENEMY = 'enemy'
+
+CELL_SIZE = 50
+SKATER_RADIUS = 3
+# how far below the top of a rail the board can be and still catch it on the way down
+RAIL_SNAP = 3
+
+
+class Entity:
+    # axis aligned box on the XZ plane from (x, z) to (x + width, z + depth), standing height units off the ground
+    def __init__(self, kind, x, z, width, depth, height, mesh=None):
+        self.kind = kind
+        self.x = x
+        self.z = z
+        self.width = width
+        self.depth = depth
+        self.height = height
+        self.mesh = mesh
+
+    def overlaps(self, x0, z0, x1, z1):
+        return self.x <= x1 and x0 <= self.x + self.width and self.z <= z1 and z0 <= self.z + self.depth
+
+
+class SpatialHash:
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def keys(self, x0, z0, x1, z1):
+        size = self.cell_size
+        for cx in range(math.floor(x0 / size), math.floor(x1 / size) + 1):
+            for cz in range(math.floor(z0 / size), math.floor(z1 / size) + 1):
+                yield cx, cz
+
+    def insert(self, entity):
+        for key in self.keys(entity.x, entity.z, entity.x + entity.width, entity.z + entity.depth):
+            self.cells.setdefault(key, []).append(entity)
+        self.count += 1
+
+    def remove(self, entity):
+        for key in self.keys(entity.x, entity.z, entity.x + entity.width, entity.z + entity.depth):
+            bucket = self.cells[key]
+            bucket.remove(entity)
+            if not bucket:
+                del self.cells[key]
+        self.count -= 1
+
+    def query(self, x0, z0, x1, z1):
+        # entities spanning several cells show up once, in the order they were inserted
+        found = {}
+        for key in self.keys(x0, z0, x1, z1):
+            for entity in self.cells.get(key, ()):
+                if entity.overlaps(x0, z0, x1, z1):
+                    found[id(entity)] = entity
+        return list(found.values())
+
+
+def brute_force(entities, x0, z0, x1, z1):
+    return [entity for entity in entities if entity.overlaps(x0, z0, x1, z1)]
+
+
+def sweep(entity, x0, z0, x1, z1, radius):
+    # when the segment from (x0, z0) to (x1, z1) enters the box grown by radius, as a fraction of the segment
+    enter, leave = 0.0, 1.0
+    for start, end, low, high in ((x0, x1, entity.x, entity.x + entity.width), (z0, z1, entity.z, entity.z + entity.depth)):
+        low -= radius
+        high += radius
+        delta = end - start
+        if delta == 0:
+            if start < low or start > high:
+                return None
+            continue
+        t0, t1 = (low - start) / delta, (high - start) / delta
+        if t0 > t1:
+            t0, t1 = t1, t0
+        enter, leave = max(enter, t0), min(leave, t1)
+        if enter > leave:
+            return None
+    return enter
+
+
+class Collisions:
+    def __init__(self, grid):
+        self.grid = grid
+        # entities the skater is inside this tick, by id, with how the contact started
+        self.touching = {}
+
+    def reset(self):
+        self.touching = {}
+
+    def check(self, state, prev_pos):
+        events = []
+        px, py, pz = prev_pos
+        x, y, z = state.pos
+        r = SKATER_RADIUS
+        nearby = self.grid.query(min(px, x) - r, min(pz, z) - r, max(px, x) + r, max(pz, z) + r)
+
+        touching = {}
+        for entity in nearby:
+            key = id(entity)
+            contact = self.touching.get(key, (None, None))[1]
+            if contact is not None:
+                if sweep(entity, x, z, x, z, r) is None:
+                    continue
+                if contact == 'over' and y - GROUND_HEIGHT < entity.height:
+                    contact = 'landed'
+                touching[key] = (entity, contact)
+                continue
+
+            t = sweep(entity, px, pz, x, z, r)
+            if t is None:
+                continue
+            feet = py + (y - py) * t - GROUND_HEIGHT
+            if feet >= entity.height:
+                contact = 'over'
+            elif entity.kind == RAMP:
+                if not state.is_ollying:
+                    state.is_ollying = True
+                    state.ollie_timer = 0
+                    events.append('Ollie')
+                contact = 'ramp'
+            elif entity.kind == RAIL and state.is_ollying and y <= py and feet >= entity.height - RAIL_SNAP:
+                events.append('Grind')
+                contact = 'grind'
+            else:
+                # bail, back out to where this tick started so the next tick can steer around it
+                state.pos = [float(px), y, float(pz)]
+                state.move_speed = 0
+                events.append('Bail')
+                contact = 'bail'
+            touching[key] = (entity, contact)
+
+        for key, (entity, contact) in self.touching.items():
+            if key not in touching and contact == 'over' and entity.kind in (OBSTACLE, ENEMY):
+                events.append('Hop')
+        self.touching = touching
+        return events
@@ -0,0 +1,137 @@
+import ctypes
+import numpy as np
+from OpenGL.GL import *
+
+# every vertex is x, y, z, u, v packed as float32
+VERTEX_SIZE = 5
+STRIDE = VERTEX_SIZE * 4
+# attribute locations the core profile shaders declare
+POSITION = 0
+TEXCOORD = 1
+# core profile has no GL_QUADS, so quads are stored as two triangles each
+QUAD_TRIANGLES = np.array([0, 1, 2, 0, 2, 3])
+
+
+def quad(x0, y0, z0, x1, y1, z1, uv=(0, 0, 1, 1)):
+    if y0 == y1:
+        corners = [(x0, y0, z0), (x1, y0, z0), (x1, y0, z1), (x0, y0, z1)]
+    else:
+        corners = [(x0, y0, z0), (x1, y0, z1), (x1, y1, z1), (x0, y1, z0)]
+    u0, v0, u1, v1 = uv
+    uvs = [(u0, v0), (u1, v0), (u1, v1), (u0, v1)]
+    return [c + t for c, t in zip(corners, uvs)]
+
+
+def vbo_supported():
+    try:
+        if not (bool(glGenBuffers) and bool(glBindBuffer) and bool(glBufferData)):
+            return False
+        version = glGetString(GL_VERSION)
+        if not version:
+            return False
+        major, minor = version.decode(errors='ignore').split(' ')[0].split('.')[:2]
+        if (int(major), int(minor)) >= (1, 5):
+            return True
+        extensions = glGetString(GL_EXTENSIONS) or b''
+        return b'GL_ARB_vertex_buffer_object' in extensions
+    except Exception:
+        return False
+
+
+class Geometry:
+    def __init__(self):
+        self.meshes = {}
+        self.pending = []
+        self.vertex_count = 0
+        self.vbo = None
+        self.vao = None
+        self.lists = {}
+
+    def add(self, name, vertices, mode=GL_QUADS):
+        vertices = np.asarray(vertices, dtype=np.float32).reshape(-1, VERTEX_SIZE)
+        if mode == GL_QUADS:
+            vertices = vertices.reshape(-1, 4, VERTEX_SIZE)[:, QUAD_TRIANGLES].reshape(-1, VERTEX_SIZE)
+            mode = GL_TRIANGLES
+        self.meshes[name] = (mode, self.vertex_count, len(vertices))
+        self.pending.append(vertices)
+        self.vertex_count += len(vertices)
+
+    def upload(self, use_vbo=None, core=False):
+        self.delete()
+        data = np.ascontiguousarray(np.concatenate(self.pending)) if self.pending else np.zeros((0, VERTEX_SIZE), np.float32)
+        if core:
+            # generic attributes recorded once in a vertex array object, begin() only has to bind it
+            self.vao = glGenVertexArrays(1)
+            glBindVertexArray(self.vao)
+            self.vbo = glGenBuffers(1)
+            glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+            glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STATIC_DRAW)
+            glEnableVertexAttribArray(POSITION)
+            glVertexAttribPointer(POSITION, 3, GL_FLOAT, GL_FALSE, STRIDE, ctypes.c_void_p(0))
+            glEnableVertexAttribArray(TEXCOORD)
+            glVertexAttribPointer(TEXCOORD, 2, GL_FLOAT, GL_FALSE, STRIDE, ctypes.c_void_p(3 * 4))
+            glBindVertexArray(0)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+            return
+        if use_vbo is None:
+            use_vbo = vbo_supported()
+        if use_vbo:
+            try:
+                self.vbo = glGenBuffers(1)
+                glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+                glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STATIC_DRAW)
+                glBindBuffer(GL_ARRAY_BUFFER, 0)
+            except Exception as e:
+                print(f"VBO upload failed, using display lists: {e}")
+                self.vbo = None
+        if self.vbo is None:
+            for name, (mode, first, count) in self.meshes.items():
+                display_list = glGenLists(1)
+                glNewList(display_list, GL_COMPILE)
+                glBegin(mode)
+                for x, y, z, u, v in data[first:first + count]:
+                    glTexCoord2f(u, v)
+                    glVertex3f(x, y, z)
+                glEnd()
+                glEndList()
+                self.lists[name] = display_list
+
+    def begin(self):
+        if self.vao is not None:
+            glBindVertexArray(self.vao)
+            return
+        if self.vbo is None:
+            return
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        glVertexPointer(3, GL_FLOAT, STRIDE, ctypes.c_void_p(0))
+        glTexCoordPointer(2, GL_FLOAT, STRIDE, ctypes.c_void_p(3 * 4))
+
+    def draw(self, name):
+        if self.vbo is None:
+            glCallList(self.lists[name])
+        else:
+            mode, first, count = self.meshes[name]
+            glDrawArrays(mode, first, count)
+
+    def end(self):
+        if self.vao is not None:
+            glBindVertexArray(0)
+            return
+        if self.vbo is None:
+            return
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def delete(self):
+        if self.vao is not None:
+            glDeleteVertexArrays(1, [self.vao])
+            self.vao = None
+        if self.vbo is not None:
+            glDeleteBuffers(1, [self.vbo])
+            self.vbo = None
+        for display_list in self.lists.values():
+            glDeleteLists(display_list, 1)
+        self.lists = {}
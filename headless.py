@@ -0,0 +1,179 @@
+import argparse
+import math
+import os
+import sys
+import time
+import numpy as np
+from PIL import Image
+
+# renders Scene3D into an offscreen framebuffer, no window or GPU needed with QT_QPA_PLATFORM=offscreen and Mesa llvmpipe
+# run with: python headless.py --path orbit --golden goldens/ [--update]
+
+TIMINGS = ('paint', 'finish', 'readback')
+
+
+def straight_path(frames):
+    return [((0.0, 20.0, -2.0 * i), (0.0, 0.0)) for i in range(frames)]
+
+
+def orbit_path(frames):
+    return [((0.0, 20.0, 0.0), (0.0, i * 360.0 / max(frames, 1))) for i in range(frames)]
+
+
+def look_path(frames):
+    return [((0.0, 20.0, -i * 0.5), (math.sin(i / 20) * 45, i * 0.5)) for i in range(frames)]
+
+
+def skate_script(frames):
+    import sim
+    # hold forward, ollie every 1.5 s and carve left every other 2 s
+    return [sim.FORWARD | (sim.OLLIE if i % 90 < 5 else 0) | (sim.LEFT if i // 120 % 2 else 0) for i in range(frames)]
+
+
+PATHS = {'straight': straight_path, 'orbit': orbit_path, 'look': look_path}
+SCRIPTS = {'skate': skate_script}
+
+
+class HeadlessRenderer:
+    def __init__(self, width=800, height=600, core=True):
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+        from PyQt5.QtWidgets import QApplication
+        from PyQt5.QtGui import QOffscreenSurface, QOpenGLContext, QOpenGLFramebufferObject, QOpenGLFramebufferObjectFormat
+        from pipeline import surface_format, is_core
+        from skate import Scene3D
+        self.app = QApplication.instance() or QApplication(sys.argv[:1])
+        self.width = width
+        self.height = height
+
+        self.context = QOpenGLContext()
+        self.context.setFormat(surface_format(legacy=not core))
+        if not self.context.create():
+            raise RuntimeError("could not create an OpenGL context")
+        self.surface = QOffscreenSurface()
+        self.surface.setFormat(self.context.format())
+        self.surface.create()
+        if not self.context.makeCurrent(self.surface):
+            raise RuntimeError("could not make the OpenGL context current")
+        fbo_format = QOpenGLFramebufferObjectFormat()
+        fbo_format.setAttachment(QOpenGLFramebufferObject.CombinedDepthStencil)
+        self.fbo = QOpenGLFramebufferObject(width, height, fbo_format)
+        self.fbo.bind()
+
+        # the widget is never shown, it only supplies the game state and the paintGL that draws it
+        self.scene = Scene3D()
+        self.scene.resize(width, height)
+        self.scene.setup_gl(is_core(self.context))
+        self.core = self.scene.pipeline.core
+        self.scene.resizeGL(width, height)
+
+    def frame(self, capture):
+        from OpenGL.GL import glFinish, glReadPixels, GL_RGBA, GL_UNSIGNED_BYTE
+        start = time.perf_counter()
+        self.scene.paintGL()
+        painted = time.perf_counter()
+        glFinish()
+        finished = time.perf_counter()
+        image = None
+        if capture:
+            data = glReadPixels(0, 0, self.width, self.height, GL_RGBA, GL_UNSIGNED_BYTE)
+            # GL rows start at the bottom
+            image = np.frombuffer(data, dtype=np.uint8).reshape(self.height, self.width, 4)[::-1].copy()
+        timing = ((painted - start) * 1000, (finished - painted) * 1000, (time.perf_counter() - finished) * 1000)
+        return image, timing
+
+    def render(self, poses, capture=True):
+        # poses are (pos, rot) camera placements, one per frame
+        scene = self.scene
+        frames, timings = [], []
+        for pos, rot in poses:
+            scene.state.pos = [float(v) for v in pos]
+            scene.state.rot = [float(v) for v in rot]
+            scene.world.update(scene.state.pos)
+            scene.update_third_person_camera()
+            scene.store_previous_state()
+            image, timing = self.frame(capture)
+            frames.append(image)
+            timings.append(timing)
+        return (np.stack(frames) if capture and frames else None), np.array(timings).reshape(-1, len(TIMINGS))
+
+    def render_inputs(self, script, capture=True):
+        # one game tick per frame, so collisions, scoring and chunk streaming all run like a real session
+        scene = self.scene
+        scene.restart_run()
+        # fed through the replay hook, the same way F6 plays back a recording
+        scene.replay_inputs = iter(script)
+        frames, timings = [], []
+        for _ in script:
+            scene.tick(scene.loop.dt)
+            image, timing = self.frame(capture)
+            frames.append(image)
+            timings.append(timing)
+        scene.replay_inputs = None
+        return (np.stack(frames) if capture and frames else None), np.array(timings).reshape(-1, len(TIMINGS))
+
+    def close(self):
+        self.scene.release_gl()
+        self.fbo.release()
+        self.context.doneCurrent()
+
+
+def compare(image, golden, threshold=8):
+    # fraction of pixels where any channel is off by more than threshold, software GL differs a little between Mesa versions
+    diff = np.abs(image.astype(np.int16) - golden.astype(np.int16)).max(axis=2)
+    return float((diff > threshold).mean())
+
+
+def summary(timings):
+    lines = [f"{'ms':<10}{'p50':>8}{'p95':>8}{'p99':>8}"]
+    for i, name in enumerate(TIMINGS):
+        p50, p95, p99 = np.percentile(timings[:, i], (50, 95, 99))
+        lines.append(f"{name:<10}{p50:8.2f}{p95:8.2f}{p99:8.2f}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render SkatePy frames without a window")
+    parser.add_argument('--path', choices=sorted(PATHS) + sorted(SCRIPTS), default='orbit')
+    parser.add_argument('--frames', type=int, default=120)
+    parser.add_argument('--size', default='320x240')
+    parser.add_argument('--legacy-gl', action='store_true')
+    parser.add_argument('--golden', help="directory of golden PNGs to compare against")
+    parser.add_argument('--update', action='store_true', help="write the golden PNGs instead of comparing")
+    parser.add_argument('--every', type=int, default=30, help="compare every Nth frame")
+    parser.add_argument('--tolerance', type=float, default=0.01, help="fraction of pixels allowed to differ")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.split('x'))
+    renderer = HeadlessRenderer(width, height, core=not args.legacy_gl)
+    capture = args.golden is not None
+    if args.path in SCRIPTS:
+        frames, timings = renderer.render_inputs(SCRIPTS[args.path](args.frames), capture)
+    else:
+        frames, timings = renderer.render(PATHS[args.path](args.frames), capture)
+    print(f"{args.path}: {len(timings)} frames at {width}x{height}, {'core' if renderer.core else 'fixed-function'} pipeline")
+    print(summary(timings))
+
+    failed = 0
+    if capture:
+        os.makedirs(args.golden, exist_ok=True)
+        for i in range(0, len(frames), args.every):
+            path = os.path.join(args.golden, f"{args.path}-{'core' if renderer.core else 'legacy'}-{width}x{height}-{i:04d}.png")
+            if args.update:
+                Image.fromarray(frames[i]).save(path)
+                continue
+            if not os.path.exists(path):
+                print(f"Error: missing golden image {path}, run with --update")
+                failed += 1
+                continue
+            different = compare(frames[i], np.asarray(Image.open(path).convert('RGBA')))
+            if different > args.tolerance:
+                print(f"Error: frame {i} differs from {path} in {different:.2%} of pixels")
+                failed += 1
+        print(f"{'wrote' if args.update else 'checked'} {len(range(0, len(frames), args.every))} frames, {failed} failed")
+    renderer.close()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+import threading
+
+PROPERTIES = ('text', 'pose', 'visible')
+UNSET = object()
+
+
+class Hud:
+    # ticks say what the HUD should show, apply() touches a widget only where that differs from what it shows now
+    def __init__(self, sprites):
+        self.sprites = sprites
+        self.widgets = {}
+        self.shown = {}
+        self.pending = {}
+        self.applied = 0
+        self.saved = 0
+        # with the threaded simulation set() runs on its thread while apply() runs on the GUI thread
+        self.lock = threading.Lock()
+
+    def add(self, name, label):
+        self.widgets[name] = label
+        self.invalidate(name)
+
+    def invalidate(self, name):
+        # for when something outside the HUD changed the widget
+        for prop in PROPERTIES:
+            self.shown.pop((name, prop), None)
+
+    def set(self, name, text=UNSET, pose=UNSET, visible=UNSET):
+        for prop, value in (('text', text), ('pose', pose), ('visible', visible)):
+            if value is UNSET:
+                continue
+            key = (name, prop)
+            with self.lock:
+                # a later tick in the same frame overwrites the earlier one, which then never reaches the widget
+                if key in self.pending:
+                    self.saved += 1
+                self.pending[key] = value
+
+    def apply(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        for key, value in pending.items():
+            if self.shown.get(key, UNSET) == value:
+                self.saved += 1
+                continue
+            name, prop = key
+            widget = self.widgets[name]
+            if prop == 'text':
+                widget.setText(value)
+            elif prop == 'pose':
+                widget.setPixmap(self.sprites.get(value))
+            else:
+                widget.setVisible(value)
+            self.shown[key] = value
+            self.applied += 1
+
+    def stats(self):
+        return f"HUD: {self.applied} widget updates, {self.saved} saved"
@@ -0,0 +1,22 @@
+class SceneLifecycle:
+    # one scene for the whole session. the title screen pauses it and Play resumes it with a fresh run,
+    # so the GL context, textures, mixer and timers are made once instead of on every round trip
+    def __init__(self, factory):
+        self.factory = factory
+        self.scene = None
+
+    def acquire(self):
+        if self.scene is None:
+            self.scene = self.factory()
+        self.scene.resume()
+        return self.scene
+
+    def release(self):
+        if self.scene is not None:
+            self.scene.pause()
+
+    def shutdown(self):
+        # timers, music and GL objects are let go explicitly, not left for the garbage collector
+        if self.scene is not None:
+            self.scene.teardown()
+            self.scene = None
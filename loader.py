@@ -0,0 +1,68 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# GL work per frame while the scene is loading, a quarter of a 60 Hz frame
+UPLOAD_BUDGET_MS = 4.0
+
+
+class AssetLoader:
+    # decoding starts as soon as the loader exists, on worker threads, so the title screen keeps running meanwhile.
+    # jobs must not touch GL or QPixmap, those only work on the GUI thread
+    def __init__(self, jobs, workers=4):
+        self.pool = ThreadPoolExecutor(max_workers=max(1, min(workers, len(jobs))), thread_name_prefix='skatepy-loader')
+        self.futures = {name: self.pool.submit(job) for name, job in jobs.items()}
+        # the threads exit once the queued jobs are done
+        self.pool.shutdown(wait=False)
+
+    @property
+    def done(self):
+        return all(future.done() for future in self.futures.values())
+
+    def progress(self):
+        if not self.futures:
+            return 1.0
+        return sum(future.done() for future in self.futures.values()) / len(self.futures)
+
+    def result(self, name):
+        # waits if the job is still running, raises whatever the job raised
+        return self.futures[name].result()
+
+
+class UploadQueue:
+    # GL steps run on the GUI thread, as many per frame as fit in the budget and always at least one
+    def __init__(self, budget_ms=UPLOAD_BUDGET_MS):
+        self.budget_ms = budget_ms
+        self.steps = deque()
+        self.total = 0
+
+    def __len__(self):
+        return len(self.steps)
+
+    def add(self, name, step):
+        self.steps.append((name, step))
+        self.total += 1
+
+    def clear(self):
+        self.steps.clear()
+        self.total = 0
+
+    def run(self, budget_ms=None):
+        budget_ms = self.budget_ms if budget_ms is None else budget_ms
+        start = time.perf_counter()
+        ran = 0
+        while self.steps and (ran == 0 or (time.perf_counter() - start) * 1000 < budget_ms):
+            name, step = self.steps.popleft()
+            step()
+            ran += 1
+        return ran
+
+    def flush(self):
+        while self.steps:
+            self.run(float('inf'))
+
+    def progress(self):
+        return 1.0 if not self.total else 1 - len(self.steps) / self.total
+
+    def next_name(self):
+        return self.steps[0][0] if self.steps else None
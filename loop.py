@@ -0,0 +1,65 @@
+import time
+
+# physics constants in Scene3D were tuned per 16 ms timer tick, so speeds are scaled against this rate
+BASE_TICK_RATE = 60
+
+
+class FixedTimestep:
+    def __init__(self, tick_rate=BASE_TICK_RATE, max_catch_up=5, clock=time.perf_counter):
+        self.tick_rate = tick_rate
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+        self.accumulator = 0.0
+        self.last_time = None
+        self.alpha = 0.0
+        self.ticks = 0
+        self.dropped_time = 0.0
+        # >1 runs the simulation faster than real time, used for replays
+        self.speed = 1.0
+        # clock time the running tick simulates up to, infinite when a tick is called from outside advance()
+        self.tick_end = float('inf')
+
+    @property
+    def dt(self):
+        return 1.0 / self.tick_rate
+
+    def set_tick_rate(self, tick_rate):
+        self.tick_rate = tick_rate
+        self.accumulator = min(self.accumulator, self.dt)
+
+    def reset(self):
+        self.last_time = None
+        self.accumulator = 0.0
+        self.alpha = 0.0
+
+    def advance(self, tick):
+        now = self.clock()
+        if self.last_time is None:
+            self.last_time = now
+        self.accumulator += (now - self.last_time) * self.speed
+        self.last_time = now
+
+        dt = self.dt
+        steps = 0
+        max_steps = self.max_catch_up * max(1, int(self.speed + 0.5))
+        while self.accumulator >= dt and steps < max_steps:
+            self.tick_end = now - (self.accumulator - dt) / self.speed
+            tick(dt)
+            self.accumulator -= dt
+            steps += 1
+        self.tick_end = float('inf')
+        self.ticks += steps
+
+        # still behind after max_catch_up ticks, drop the backlog instead of spiralling
+        if self.accumulator >= dt:
+            self.dropped_time += self.accumulator - self.accumulator % dt
+            self.accumulator %= dt
+
+        self.alpha = self.accumulator / dt
+        return steps
+
+
+def lerp(previous, current, alpha, snap=None):
+    if snap is not None and abs(current - previous).max() > snap:
+        return current.copy()
+    return previous + (current - previous) * alpha
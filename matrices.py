@@ -0,0 +1,58 @@
+import math
+import numpy as np
+
+
+def perspective(fovy, aspect, near, far):
+    # same matrix gluPerspective builds
+    f = 1 / math.tan(math.radians(fovy) / 2)
+    return np.array([
+        [f / aspect, 0, 0, 0],
+        [0, f, 0, 0],
+        [0, 0, (far + near) / (near - far), 2 * far * near / (near - far)],
+        [0, 0, -1, 0],
+    ])
+
+
+def view_matrix(pos, rot):
+    # glRotatef(pitch, 1, 0, 0), glRotatef(yaw, 0, 1, 0), glTranslatef(-pos) as in paintGL
+    pitch, yaw = math.radians(rot[0]), math.radians(rot[1])
+    cp, sp, cy, sy = math.cos(pitch), math.sin(pitch), math.cos(yaw), math.sin(yaw)
+    rx = np.array([[1, 0, 0, 0], [0, cp, -sp, 0], [0, sp, cp, 0], [0, 0, 0, 1]])
+    ry = np.array([[cy, 0, sy, 0], [0, 1, 0, 0], [-sy, 0, cy, 0], [0, 0, 0, 1]])
+    translate = np.identity(4)
+    translate[:3, 3] = -np.asarray(pos, dtype=np.float64)
+    return rx @ ry @ translate
+
+
+class Camera:
+    # matrices are only rebuilt when what they depend on changes, version tells shader uniforms when to re-upload
+    def __init__(self, fovy=45, near=0.1):
+        self.fovy = fovy
+        self.near = near
+        self.pos = (0.0, 0.0, 0.0)
+        self.rot = (0.0, 0.0)
+        self.aspect = 1.0
+        self.far = 1000.0
+        self.projection_key = None
+        self.view_key = None
+        self.projection = None
+        self.view = None
+        self.view_projection = None
+        self.version = 0
+
+    def set(self, pos, rot, aspect, far):
+        projection_key = (aspect, far)
+        view_key = (float(pos[0]), float(pos[1]), float(pos[2]), float(rot[0]), float(rot[1]))
+        if projection_key == self.projection_key and view_key == self.view_key:
+            return False
+        if projection_key != self.projection_key:
+            self.projection_key = projection_key
+            self.aspect, self.far = aspect, far
+            self.projection = perspective(self.fovy, aspect, self.near, far)
+        if view_key != self.view_key:
+            self.view_key = view_key
+            self.pos, self.rot = view_key[:3], view_key[3:]
+            self.view = view_matrix(self.pos, self.rot)
+        self.view_projection = (self.projection @ self.view).astype(np.float32)
+        self.version += 1
+        return True
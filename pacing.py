@@ -0,0 +1,157 @@
+import os
+from collections import deque
+import numpy as np
+from OpenGL.GL import *
+
+# vsync: one frame per refresh, uncapped: as fast as it renders, cap: a fixed rate without vsync,
+# adaptive: vsync, and the 3D view renders at a lower resolution while frames miss the refresh
+MODES = ('vsync', 'uncapped', 'cap', 'adaptive')
+MIN_SCALE = 0.5
+SCALE_STEP = 0.1
+# frames in a row that have to make the budget before the resolution goes back up
+RECOVER_FRAMES = 180
+# present intervals this much over budget count as a missed frame
+MISS_FACTOR = 1.2
+
+
+def pacing_mode(argv):
+    # --pacing vsync|uncapped|adaptive|<fps>, SKATEPY_PACING takes the same values
+    value = os.environ.get('SKATEPY_PACING', 'vsync')
+    for i, arg in enumerate(argv):
+        if arg.startswith('--pacing='):
+            value = arg.split('=', 1)[1]
+        elif arg == '--pacing' and i + 1 < len(argv):
+            value = argv[i + 1]
+    if value.isdigit() and int(value) > 0:
+        return 'cap', int(value)
+    if value not in MODES:
+        print(f"Error: unknown pacing mode {value}, using vsync")
+        return 'vsync', None
+    return value, None
+
+
+def blit_supported():
+    try:
+        return bool(glBlitFramebuffer)
+    except Exception:
+        return False
+
+
+class FramePacer:
+    def __init__(self, mode='vsync', cap=None, refresh=60.0):
+        self.mode = mode
+        self.refresh = refresh
+        # with no rate given, cap mode caps at the refresh rate
+        self.requested_cap = cap
+        self.intervals = deque(maxlen=240)
+        self.last_present = None
+        self.next_frame = None
+        self.missed = 0
+        self.scale = 1.0
+        self.average = None
+        self.good_frames = 0
+        # set when the driver turns out to ignore the swap interval, the timer then paces at the refresh rate
+        self.throttle = False
+
+    @property
+    def swap_interval(self):
+        return 1 if self.mode in ('vsync', 'adaptive') else 0
+
+    @property
+    def cap(self):
+        return self.requested_cap or self.refresh
+
+    @property
+    def budget_ms(self):
+        return 1000 / (self.cap if self.mode == 'cap' else self.refresh)
+
+    def set_refresh(self, refresh):
+        if refresh > 0:
+            self.refresh = refresh
+
+    def presented(self, now):
+        if self.last_present is not None:
+            interval = (now - self.last_present) * 1000
+            self.intervals.append(interval)
+            if interval > self.budget_ms * MISS_FACTOR:
+                self.missed += 1
+            if self.mode == 'adaptive':
+                self.adapt(interval)
+            if self.swap_interval and not self.throttle and len(self.intervals) == 60 and np.median(self.intervals) < self.budget_ms / 2:
+                print(f"Error: the driver ignores the swap interval, pacing to {self.refresh:.0f} fps with a timer instead")
+                self.throttle = True
+        self.last_present = now
+
+    def adapt(self, interval):
+        # smoothed, so one hitch does not cost resolution
+        self.average = interval if self.average is None else self.average * 0.9 + interval * 0.1
+        if self.average > self.budget_ms * MISS_FACTOR:
+            if self.scale > MIN_SCALE:
+                self.scale = round(max(MIN_SCALE, self.scale - SCALE_STEP), 2)
+                # give the new size a chance before judging it
+                self.average = self.budget_ms
+            self.good_frames = 0
+        elif interval <= self.budget_ms * MISS_FACTOR:
+            self.good_frames += 1
+            if self.good_frames >= RECOVER_FRAMES and self.scale < 1:
+                self.scale = round(min(1.0, self.scale + SCALE_STEP), 2)
+                self.good_frames = 0
+        else:
+            self.good_frames = 0
+
+    def delay_ms(self, now):
+        # how long to wait before starting the next frame, vsync modes block in the swap instead
+        if self.mode != 'cap' and not self.throttle:
+            return 0
+        period = 1 / (self.cap if self.mode == 'cap' else self.refresh)
+        if self.next_frame is None or now - self.next_frame > period:
+            # too far behind to catch up, start counting again from now
+            self.next_frame = now
+        self.next_frame += period
+        return max(0, int(round((self.next_frame - now) * 1000)))
+
+    def reset(self):
+        self.last_present = None
+        self.next_frame = None
+        self.average = None
+        self.good_frames = 0
+
+    def percentiles(self, q=(50, 95, 99)):
+        if not self.intervals:
+            return [0.0] * len(q)
+        return np.percentile(self.intervals, q)
+
+    def stats(self):
+        name = f"cap {self.cap:.0f}" if self.mode == 'cap' else self.mode
+        p50, p95, p99 = self.percentiles()
+        return f"Pacing: {name}, present {p50:.1f}/{p95:.1f}/{p99:.1f} ms, {self.missed} missed, scale {self.scale:.0%}"
+
+
+class ScaledTarget:
+    # the 3D view rendered into a smaller framebuffer, then stretched over the widget with one blit
+    def __init__(self):
+        self.fbo = None
+        self.size = None
+
+    def begin(self, width, height, scale):
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        if size != self.size:
+            from PyQt5.QtGui import QOpenGLFramebufferObject, QOpenGLFramebufferObjectFormat
+            fbo_format = QOpenGLFramebufferObjectFormat()
+            fbo_format.setAttachment(QOpenGLFramebufferObject.CombinedDepthStencil)
+            self.fbo = QOpenGLFramebufferObject(size[0], size[1], fbo_format)
+            self.size = size
+        # the blit only covers the 3D view, so the rest of the widget is cleared here
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        self.fbo.bind()
+        glViewport(0, 0, *size)
+
+    def end(self, target, x, y, width, height):
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, self.fbo.handle())
+        glBindFramebuffer(GL_DRAW_FRAMEBUFFER, target)
+        glBlitFramebuffer(0, 0, self.size[0], self.size[1], x, y, x + width, y + height, GL_COLOR_BUFFER_BIT, GL_LINEAR)
+        glBindFramebuffer(GL_FRAMEBUFFER, target)
+
+    def delete(self):
+        self.fbo = None
+        self.size = None
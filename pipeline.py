@@ -0,0 +1,180 @@
+from OpenGL.GL import *
+from OpenGL.GLU import gluPerspective
+from entities import ENEMY
+
+CORE_VERSION = (3, 3)
+
+SCENE_VERTEX_SHADER = """
+#version 330 core
+layout(location = 0) in vec3 position;
+layout(location = 1) in vec2 texcoord;
+uniform mat4 view_projection;
+uniform vec3 offset;
+out vec2 uv;
+void main() {
+    gl_Position = view_projection * vec4(position + offset, 1.0);
+    uv = texcoord;
+}
+"""
+
+SCENE_FRAGMENT_SHADER = """
+#version 330 core
+uniform sampler2D sampler;
+in vec2 uv;
+out vec4 color;
+void main() {
+    color = texture(sampler, uv);
+    if (color.a < 0.01)
+        discard;
+}
+"""
+
+
+def surface_format(legacy=False, swap_interval=None):
+    from PyQt5.QtGui import QSurfaceFormat
+    fmt = QSurfaceFormat()
+    fmt.setDepthBufferSize(24)
+    if swap_interval is not None:
+        fmt.setSwapInterval(swap_interval)
+    if not legacy:
+        fmt.setVersion(*CORE_VERSION)
+        fmt.setProfile(QSurfaceFormat.CoreProfile)
+    return fmt
+
+
+def is_core(context):
+    from PyQt5.QtGui import QSurfaceFormat
+    fmt = context.format()
+    return fmt.profile() == QSurfaceFormat.CoreProfile and (fmt.majorVersion(), fmt.minorVersion()) >= CORE_VERSION
+
+
+class ShaderManager:
+    # programs are compiled and linked once per context, uniform locations are looked up once per program
+    def __init__(self):
+        self.programs = {}
+        self.locations = {}
+
+    def compile(self, source, kind):
+        shader = glCreateShader(kind)
+        glShaderSource(shader, source)
+        glCompileShader(shader)
+        if not glGetShaderiv(shader, GL_COMPILE_STATUS):
+            log = glGetShaderInfoLog(shader)
+            glDeleteShader(shader)
+            raise RuntimeError(f"shader compile failed: {log.decode(errors='ignore') if isinstance(log, bytes) else log}")
+        return shader
+
+    def program(self, name, vertex, fragment):
+        program = self.programs.get(name)
+        if program is not None:
+            return program
+        shaders = [self.compile(vertex, GL_VERTEX_SHADER), self.compile(fragment, GL_FRAGMENT_SHADER)]
+        program = glCreateProgram()
+        for shader in shaders:
+            glAttachShader(program, shader)
+        glLinkProgram(program)
+        for shader in shaders:
+            glDetachShader(program, shader)
+            glDeleteShader(shader)
+        if not glGetProgramiv(program, GL_LINK_STATUS):
+            log = glGetProgramInfoLog(program)
+            glDeleteProgram(program)
+            raise RuntimeError(f"shader link failed: {log.decode(errors='ignore') if isinstance(log, bytes) else log}")
+        self.programs[name] = program
+        return program
+
+    def location(self, program, uniform):
+        key = (program, uniform)
+        location = self.locations.get(key)
+        if location is None:
+            location = self.locations[key] = glGetUniformLocation(program, uniform)
+        return location
+
+    def delete(self):
+        for program in self.programs.values():
+            glDeleteProgram(program)
+        self.programs = {}
+        self.locations = {}
+
+
+class FixedPipeline:
+    # the original renderer, matrices are rebuilt by GL every frame
+    core = False
+
+    def __init__(self, geometry):
+        self.geometry = geometry
+
+    def setup(self):
+        glEnable(GL_DEPTH_TEST)
+        glEnable(GL_TEXTURE_2D)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glShadeModel(GL_SMOOTH)
+        glClearColor(0.2, 0.2, 0.2, 1.0)
+
+    def begin_frame(self, camera):
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        glMatrixMode(GL_PROJECTION)
+        glLoadIdentity()
+        gluPerspective(camera.fovy, camera.aspect, camera.near, camera.far)
+        glMatrixMode(GL_MODELVIEW)
+        glLoadIdentity()
+        glRotatef(camera.rot[0], 1, 0, 0)
+        glRotatef(camera.rot[1], 0, 1, 0)
+        glTranslatef(-camera.pos[0], -camera.pos[1], -camera.pos[2])
+
+    def draw(self, name, x=0, y=0, z=0):
+        glPushMatrix()
+        glTranslatef(x, y, z)
+        self.geometry.draw(name)
+        glPopMatrix()
+
+    def draw_chunks(self, chunks, texture):
+        glBindTexture(GL_TEXTURE_2D, texture)
+        for chunk in chunks:
+            self.draw('tile', chunk.x, 0, chunk.z)
+            for entity in chunk.entities:
+                if entity.kind != ENEMY:
+                    self.draw(entity.mesh, entity.x, 0, entity.z)
+
+    def delete(self):
+        pass
+
+
+class CorePipeline(FixedPipeline):
+    # one program for every mesh, the camera matrix is a uniform that is only re-sent when the camera moves
+    core = True
+
+    def __init__(self, geometry, shaders):
+        super(CorePipeline, self).__init__(geometry)
+        self.shaders = shaders
+        self.program = None
+        self.camera_version = None
+
+    def setup(self):
+        glEnable(GL_DEPTH_TEST)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glClearColor(0.2, 0.2, 0.2, 1.0)
+        self.program = self.shaders.program('scene', SCENE_VERTEX_SHADER, SCENE_FRAGMENT_SHADER)
+        self.view_projection = self.shaders.location(self.program, 'view_projection')
+        self.offset = self.shaders.location(self.program, 'offset')
+        glUseProgram(self.program)
+        glUniform1i(self.shaders.location(self.program, 'sampler'), 0)
+        glUseProgram(0)
+        self.camera_version = None
+
+    def begin_frame(self, camera):
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        glUseProgram(self.program)
+        if camera.version != self.camera_version:
+            self.camera_version = camera.version
+            glUniformMatrix4fv(self.view_projection, 1, GL_TRUE, camera.view_projection)
+
+    def draw(self, name, x=0, y=0, z=0):
+        glUniform3f(self.offset, x, y, z)
+        self.geometry.draw(name)
+
+    def delete(self):
+        self.shaders.delete()
+        self.program = None
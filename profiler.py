@@ -0,0 +1,54 @@
+import json
+import os
+import time
+from collections import deque
+import numpy as np
+
+PHASES = ('physics', 'widgets', 'gl', 'swap', 'events')
+
+
+class Profiler:
+    def __init__(self, window=600, trace_events=100000):
+        self.window = window
+        self.samples = {phase: np.zeros(window) for phase in PHASES}
+        self.frame = dict.fromkeys(PHASES, 0)
+        self.index = 0
+        self.count = 0
+        self.trace = deque(maxlen=trace_events)
+        self.origin = time.perf_counter_ns()
+
+    def add(self, phase, start, end):
+        self.frame[phase] += end - start
+        self.trace.append((phase, start, end))
+
+    def end_frame(self):
+        for phase in PHASES:
+            self.samples[phase][self.index] = self.frame[phase] / 1e6
+            self.frame[phase] = 0
+        self.index = (self.index + 1) % self.window
+        self.count = min(self.count + 1, self.window)
+
+    def percentiles(self, phase, q=(50, 95, 99)):
+        if not self.count:
+            return [0.0] * len(q)
+        return np.percentile(self.samples[phase][:self.count], q)
+
+    def summary(self):
+        lines = [f"{'ms':<8}{'p50':>7}{'p95':>7}{'p99':>7}"]
+        for phase in PHASES:
+            p50, p95, p99 = self.percentiles(phase)
+            lines.append(f"{phase:<8}{p50:7.2f}{p95:7.2f}{p99:7.2f}")
+        return '\n'.join(lines)
+
+    def export_chrome_trace(self, path):
+        events = [{
+            'name': phase,
+            'ph': 'X',
+            'ts': (start - self.origin) / 1000,
+            'dur': (end - start) / 1000,
+            'pid': os.getpid(),
+            'tid': 0,
+        } for phase, start, end in self.trace]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return len(events)
@@ -0,0 +1,126 @@
+import struct
+import sys
+import sim
+from course import Course
+from sim import SkaterParams, SkaterState
+
+# file layout: magic, version, tick rate, world seed, params as doubles, then (ticks since last change, inputs xor previous) varint pairs
+# a pair with xor 0 ends the stream, its tick count covers the ticks after the last change
+MAGIC = b'SKRP'
+# version 2: the world no longer wraps at the edges, so version 1 runs replay differently
+# version 3: runs collide with the world, so the header says which world
+VERSION = 3
+PARAM_FIELDS = ('max_move_speed', 'auto_forward_speed', 'acceleration', 'deceleration', 'start_speed',
+                'side_move_speed', 'turn_speed', 'rot_speed', 'ollie_duration', 'ollie_hang', 'ollie_height')
+
+
+def write_varint(out, value):
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def read_varint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+class Recorder:
+    def __init__(self, tick_rate=sim.BASE_TICK_RATE, params=None, seed=0):
+        params = params or SkaterParams()
+        self.data = bytearray(MAGIC)
+        self.data.append(VERSION)
+        write_varint(self.data, tick_rate)
+        write_varint(self.data, seed)
+        self.data += struct.pack(f'<{len(PARAM_FIELDS)}d', *(getattr(params, name) for name in PARAM_FIELDS))
+        self.previous = 0
+        self.gap = 0
+        self.ticks = 0
+
+    def record(self, inputs):
+        if inputs != self.previous:
+            write_varint(self.data, self.gap)
+            write_varint(self.data, inputs ^ self.previous)
+            self.previous = inputs
+            self.gap = 0
+        self.gap += 1
+        self.ticks += 1
+
+    def finish(self):
+        data = bytearray(self.data)
+        write_varint(data, self.gap)
+        write_varint(data, 0)
+        return bytes(data)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.finish())
+
+
+class Replay:
+    def __init__(self, data):
+        if data[:4] != MAGIC:
+            raise ValueError("not a SkatePy replay")
+        if data[4] != VERSION:
+            raise ValueError(f"unsupported replay version {data[4]}")
+        self.data = data
+        self.tick_rate, offset = read_varint(data, 5)
+        self.seed, offset = read_varint(data, offset)
+        size = struct.calcsize(f'<{len(PARAM_FIELDS)}d')
+        values = struct.unpack_from(f'<{len(PARAM_FIELDS)}d', data, offset)
+        self.params = SkaterParams(**dict(zip(PARAM_FIELDS, values)))
+        self.start = offset + size
+        self.ticks = sum(gap for gap, _ in self.changes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def changes(self):
+        offset = self.start
+        while True:
+            gap, offset = read_varint(self.data, offset)
+            change, offset = read_varint(self.data, offset)
+            yield gap, change
+            if not change:
+                return
+
+    def inputs(self):
+        current = 0
+        for gap, change in self.changes():
+            for _ in range(gap):
+                yield current
+            current ^= change
+
+    def __len__(self):
+        return self.ticks
+
+    def run(self, state=None):
+        state = state or SkaterState(self.params)
+        events = Course(self.seed).run(state, self.inputs(), 1.0 / self.tick_rate)
+        return state, events
+
+
+if __name__ == '__main__':
+    from scoring import Scoring
+    replay = Replay.load(sys.argv[1])
+    state, events = replay.run()
+    scoring = Scoring()
+    events = sorted(events + scoring.run(events), key=lambda event: event[0])
+    print(f"{len(replay)} ticks at {replay.tick_rate} Hz, {len(replay.data)} bytes")
+    for when, event in events:
+        print(f"  {when:8.3f}  {event}")
+    print(f"final position ({state.pos[0]:.2f}, {state.pos[1]:.2f}, {state.pos[2]:.2f}), score {scoring.total}, best combo {scoring.best_combo}")
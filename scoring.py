@@ -0,0 +1,179 @@
+import heapq
+
+# trick events come from sim.step and Collisions.check, this turns them into points and combos
+
+COMBO_WINDOW = 5
+
+TRICK_POINTS = {'Ollie': 100, 'Manual': 50, 'Grind': 75, 'Hop': 150}
+
+# (tricks in a row, name, bonus), matched against the end of the combo, the longest match wins
+TRICK_TABLE = [
+    (('Manual', 'Manual'), 'Manual Chain', 50),
+    (('Ollie', 'Ollie'), 'Double Ollie', 50),
+    (('Ollie', 'Manual'), 'Manual Catch', 75),
+    (('Ollie', 'Grind'), 'Boardslide', 100),
+    (('Ollie', 'Hop'), 'Kickflip', 100),
+    (('Grind', 'Hop'), 'Rail Transfer', 150),
+    (('Ollie', 'Grind', 'Hop'), 'Boardslide Transfer', 300),
+    (('Manual', 'Ollie', 'Grind'), 'Nollie Boardslide', 250),
+    (('Ollie', 'Hop', 'Ollie', 'Hop'), 'Double Kickflip', 500),
+]
+
+
+class TrickNode:
+    __slots__ = ('children', 'name', 'bonus', 'depth')
+
+    def __init__(self, depth=0):
+        self.children = {}
+        self.name = None
+        self.bonus = 0
+        self.depth = depth
+
+
+class TrickTrie:
+    def __init__(self, table=TRICK_TABLE):
+        self.root = TrickNode()
+        for sequence, name, bonus in table:
+            self.add(sequence, name, bonus)
+
+    def add(self, sequence, name, bonus):
+        node = self.root
+        for trick in sequence:
+            child = node.children.get(trick)
+            if child is None:
+                child = node.children[trick] = TrickNode(node.depth + 1)
+            node = child
+        node.name = name
+        node.bonus = bonus
+
+    def advance(self, active, trick):
+        # active holds the nodes of every partial match still alive, each trick also starts a new one from the root
+        following = []
+        best = None
+        for node in active + [self.root]:
+            child = node.children.get(trick)
+            if child is None:
+                continue
+            if child.children:
+                following.append(child)
+            if child.name is not None and (best is None or child.depth > best.depth):
+                best = child
+        return following, best
+
+
+class TableScan:
+    # what the trie replaces, every sequence in the table checked against the end of the combo on every trick
+    def __init__(self, table=TRICK_TABLE):
+        self.entries = []
+        for sequence, name, bonus in table:
+            node = TrickNode(len(sequence))
+            node.name = name
+            node.bonus = bonus
+            self.entries.append((tuple(sequence), node))
+
+    def advance(self, active, trick):
+        combo = active + [trick]
+        best = None
+        for sequence, node in self.entries:
+            if len(sequence) <= len(combo) and tuple(combo[-len(sequence):]) == sequence:
+                if best is None or node.depth > best.depth:
+                    best = node
+        return combo, best
+
+
+class Timers:
+    # deadlines in a heap, rescheduling a key leaves the old entry behind and it is skipped when it comes up
+    def __init__(self):
+        self.heap = []
+        self.deadlines = {}
+        self.counter = 0
+
+    def schedule(self, key, when):
+        self.counter += 1
+        self.deadlines[key] = (when, self.counter)
+        heapq.heappush(self.heap, (when, self.counter, key))
+
+    def cancel(self, key):
+        self.deadlines.pop(key, None)
+
+    def due(self, now):
+        fired = []
+        while self.heap and self.heap[0][0] <= now:
+            when, counter, key = heapq.heappop(self.heap)
+            if self.deadlines.get(key) == (when, counter):
+                del self.deadlines[key]
+                fired.append((when, key))
+        return fired
+
+    def clear(self):
+        self.heap = []
+        self.deadlines = {}
+
+
+class Scoring:
+    def __init__(self, trie=None, points=TRICK_POINTS, window=COMBO_WINDOW):
+        self.trie = trie or TrickTrie()
+        self.points = points
+        self.window = window
+        self.timers = Timers()
+        self.reset()
+
+    def reset(self):
+        self.timers.clear()
+        self.total = 0
+        self.score = 0
+        self.combo_score = 0
+        self.best_combo = 0
+        self.last_move = None
+        self.combo = []
+        self.active = []
+
+    def end_combo(self):
+        self.timers.cancel('combo')
+        self.combo_score = 0
+        self.last_move = None
+        self.combo = []
+        self.active = []
+
+    def expire(self, now):
+        # only the top of the heap is looked at, nothing is polled per trick
+        events = []
+        for when, key in self.timers.due(now):
+            if key == 'combo':
+                self.end_combo()
+                events.append((when, 'combo_end'))
+        return events
+
+    def trick(self, now, name):
+        points = self.points[name]
+        self.combo.append(name)
+        self.active, match = self.trie.advance(self.active, name)
+        self.last_move = name
+        if match is not None:
+            points += match.bonus
+            self.last_move = match.name
+        self.score = points
+        self.combo_score += points
+        self.total += points
+        self.best_combo = max(self.best_combo, self.combo_score)
+        self.timers.schedule('combo', now + self.window)
+        return match
+
+    def feed(self, now, events):
+        # events from one tick, returns the extra events scoring adds: combo_end and the names of matched sequences
+        # the timers have to be checked on quiet ticks too, that is one look at the top of the heap
+        scored = self.expire(now) + self.run((now, event) for event in events)
+        return [event for _, event in scored]
+
+    def run(self, events):
+        # offline scoring of (time, event) pairs as sim.run and Replay.run return them
+        scored = []
+        for when, event in events:
+            scored += self.expire(when)
+            if event in self.points:
+                match = self.trick(when, event)
+                if match is not None:
+                    scored.append((when, match.name))
+            elif event == 'Bail':
+                self.end_combo()
+        return scored
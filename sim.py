@@ -0,0 +1,158 @@
+import math
+from loop import BASE_TICK_RATE
+
+# input bits, Scene3D maps Qt keys onto these
+FORWARD = 1 << 0
+BRAKE = 1 << 1
+LEFT = 1 << 2
+RIGHT = 1 << 3
+LOOK_LEFT = 1 << 4
+LOOK_RIGHT = 1 << 5
+LOOK_UP = 1 << 6
+LOOK_DOWN = 1 << 7
+OLLIE = 1 << 8
+
+GROUND_HEIGHT = 20
+MANUAL_WINDOW = 1
+
+
+class SkaterParams:
+    def __init__(self, max_move_speed=1.5, auto_forward_speed=2.0, acceleration=0.05, deceleration=0.05,
+                 start_speed=0.5, side_move_speed=0.2, turn_speed=0.1, rot_speed=1,
+                 ollie_duration=60, ollie_hang=30, ollie_height=35.0):
+        self.max_move_speed = max_move_speed
+        self.auto_forward_speed = auto_forward_speed
+        self.acceleration = acceleration
+        self.deceleration = deceleration
+        self.start_speed = start_speed
+        self.side_move_speed = side_move_speed
+        self.turn_speed = turn_speed
+        self.rot_speed = rot_speed
+        self.ollie_duration = ollie_duration
+        self.ollie_hang = ollie_hang
+        self.ollie_height = ollie_height
+
+
+class SkaterState:
+    def __init__(self, params=None):
+        self.params = params or SkaterParams()
+        self.pos = [0.0, float(GROUND_HEIGHT), 5.0]
+        self.rot = [0.0, 0.0, 0.0]
+        self.move_speed = 0.0
+        self.is_ollying = False
+        self.ollie_timer = 0
+        self.time = 0.0
+        self.inputs = 0
+
+        # trick events are scored by scoring.Scoring, the state only keeps what detecting them needs
+        self.last_move_key = None
+        self.last_move_key_time = None
+
+    def copy(self):
+        state = SkaterState.__new__(SkaterState)
+        state.__dict__.update(self.__dict__)
+        state.pos = list(self.pos)
+        state.rot = list(self.rot)
+        return state
+
+
+def ollie_height(params, timer):
+    half = params.ollie_duration // 2
+    if timer <= half:
+        return GROUND_HEIGHT + (params.ollie_height - GROUND_HEIGHT) * (timer / half)
+    if timer <= half + params.ollie_hang:
+        return params.ollie_height
+    return params.ollie_height - (params.ollie_height - GROUND_HEIGHT) * ((timer - (half + params.ollie_hang)) / half)
+
+
+def step(state, inputs, dt):
+    params = state.params
+    events = []
+    scale = dt * BASE_TICK_RATE
+    pressed = inputs & ~state.inputs
+    state.inputs = inputs
+
+    for key in (LEFT, RIGHT):
+        if pressed & key:
+            if state.last_move_key is not None and key != state.last_move_key and state.time - state.last_move_key_time < MANUAL_WINDOW:
+                events.append('Manual')
+            state.last_move_key = key
+            state.last_move_key_time = state.time
+        elif inputs & key and key == state.last_move_key:
+            # holding the key keeps the manual window open, like keyboard autorepeat used to
+            state.last_move_key_time = state.time
+
+    if pressed & OLLIE and not state.is_ollying:
+        state.is_ollying = True
+        state.ollie_timer = 0
+        events.append('Ollie')
+
+    angle = math.radians(-state.rot[1])
+    sin_a = math.sin(angle)
+    cos_a = math.cos(angle)
+    forward_x, forward_z = -sin_a, -cos_a
+    right_x, right_z = cos_a, -sin_a
+    x, y, z = state.pos
+
+    if inputs & FORWARD and not inputs & BRAKE:
+        if state.move_speed == 0:
+            state.move_speed = params.start_speed
+        state.move_speed = min(state.move_speed + params.acceleration * scale, params.max_move_speed)
+        distance = state.move_speed * scale
+        x += forward_x * distance
+        z += forward_z * distance
+    elif inputs & BRAKE:
+        state.move_speed = max(state.move_speed - params.deceleration * scale, 0)
+    elif state.move_speed == params.max_move_speed:
+        distance = params.auto_forward_speed * scale
+        x += forward_x * distance
+        z += forward_z * distance
+    else:
+        state.move_speed = max(state.move_speed - params.deceleration * scale, 0)
+        if state.move_speed > 0:
+            distance = state.move_speed * scale
+            x += forward_x * distance
+            z += forward_z * distance
+
+    if state.is_ollying:
+        state.ollie_timer += scale
+        y = ollie_height(params, state.ollie_timer)
+        if state.ollie_timer >= params.ollie_duration + params.ollie_hang:
+            state.is_ollying = False
+            state.ollie_timer = 0
+            y = float(GROUND_HEIGHT)
+            events.append('ollie_end')
+
+    if inputs & LEFT:
+        distance = params.side_move_speed * scale
+        x -= right_x * distance
+        z -= right_z * distance
+        state.rot[1] -= params.turn_speed * scale
+    if inputs & RIGHT:
+        distance = params.side_move_speed * scale
+        x += right_x * distance
+        z += right_z * distance
+        state.rot[1] += params.turn_speed * scale
+
+    state.pos = [float(x), float(y), float(z)]
+
+    if inputs & LOOK_LEFT:
+        state.rot[1] -= params.rot_speed * scale
+    if inputs & LOOK_RIGHT:
+        state.rot[1] += params.rot_speed * scale
+    if inputs & LOOK_UP:
+        state.rot[0] = max(-89.0, state.rot[0] - params.rot_speed * scale)
+    if inputs & LOOK_DOWN:
+        state.rot[0] = min(89.0, state.rot[0] + params.rot_speed * scale)
+
+    state.time += dt
+    return events
+
+
+def run(state, script, dt=1.0 / BASE_TICK_RATE, step=step):
+    # the bare physics by default, course.Course.run passes its step to add the world and its collisions
+    events = []
+    for inputs in script:
+        for event in step(state, inputs, dt):
+            events.append((state.time, event))
+    return events
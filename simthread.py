@@ -0,0 +1,125 @@
+import threading
+import traceback
+from collections import deque
+import numpy as np
+
+# how often an idle simulation thread checks whether it should start ticking again
+IDLE_WAIT = 0.01
+
+
+class SnapshotBuffer:
+    # two slots, the writer fills the one readers are not looking at and then flips which one is current.
+    # snapshots are never changed after publish(), so a reader that grabbed one keeps a consistent state without a lock
+    def __init__(self):
+        self.slots = [None, None]
+        self.front = 0
+        self.published = 0
+
+    def publish(self, snapshot):
+        back = 1 - self.front
+        self.slots[back] = snapshot
+        self.front = back
+        self.published += 1
+
+    def latest(self):
+        return self.slots[self.front]
+
+    def clear(self):
+        self.slots = [None, None]
+
+
+class SimThread:
+    # ticks a FixedTimestep on its own thread. the GUI thread sends it commands, which run between ticks,
+    # and reads the snapshots the ticks publish
+    def __init__(self, loop, tick):
+        self.loop = loop
+        self.tick = tick
+        self.commands = deque()
+        # cleared by the GUI thread while the game should not advance, e.g. the window lost focus
+        self.active = True
+        self.stopping = threading.Event()
+        self.thread = None
+        # set when a tick or command raised, the thread has stopped and the owner should stop() it
+        self.failed = False
+
+    @property
+    def running(self):
+        return self.thread is not None
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.stopping.clear()
+        self.failed = False
+        self.loop.reset()
+        self.thread = threading.Thread(target=self.run, name='skatepy-sim', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.stopping.set()
+        self.thread.join()
+        self.thread = None
+        # commands sent after the last tick still happen, now on the calling thread
+        self.run_commands()
+
+    def call(self, command):
+        self.commands.append(command)
+
+    def run_commands(self):
+        while self.commands:
+            self.commands.popleft()()
+
+    def run(self):
+        try:
+            while not self.stopping.is_set():
+                self.run_commands()
+                if not self.active:
+                    self.loop.reset()
+                    self.stopping.wait(IDLE_WAIT)
+                    continue
+                self.loop.advance(self.tick)
+                # sleep until the next tick is due, advance() catches up if the wait overshoots
+                self.stopping.wait((1 - self.loop.alpha) * self.loop.dt / self.loop.speed)
+        except Exception as e:
+            # an exception would otherwise end the thread silently, leaving the game frozen on its last snapshot
+            print(f"Error in simulation thread, stopping it: {e}")
+            traceback.print_exc()
+            self.failed = True
+            self.stopping.set()
+
+
+class TickStats:
+    # how evenly ticks run in wall time, and how old the simulated state is when a frame showing it reaches the screen
+    def __init__(self, history=600):
+        self.intervals = deque(maxlen=history)
+        # ms from the clock time a tick simulates up to until it actually ran
+        self.lateness = deque(maxlen=history)
+        # ms from a tick finishing until the frame that shows it was presented
+        self.latency = deque(maxlen=history)
+        self.last = None
+
+    def tick(self, now, tick_end):
+        if self.last is not None:
+            self.intervals.append((now - self.last) * 1000)
+        self.last = now
+        if tick_end != float('inf'):
+            self.lateness.append((now - tick_end) * 1000)
+
+    def presented(self, when, published):
+        self.latency.append((when - published) * 1000)
+
+    def reset(self):
+        self.last = None
+
+    def jitter(self):
+        # standard deviation of the tick intervals, 0 for perfectly even ticks
+        return float(np.std(self.intervals)) if self.intervals else 0.0
+
+    def stats(self):
+        if not self.intervals or not self.latency:
+            return "Ticks: -"
+        late = np.percentile(self.lateness, 95) if self.lateness else 0.0
+        p50, p95 = np.percentile(self.latency, (50, 95))
+        return f"Ticks: jitter {self.jitter():.2f} ms, p95 late {late:.1f} ms, state to swap {p50:.1f}/{p95:.1f} ms"
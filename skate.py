@@ -1,21 +1,70 @@
 import sys
+from collections import namedtuple
 import numpy as np
-from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtWidgets import QApplication, QMainWindow, QOpenGLWidget, QLabel, QVBoxLayout, QWidget, QHBoxLayout, QPushButton, QDialog
-from PyQt5.QtGui import QFont, QPixmap
-from PyQt5.QtWebEngineWidgets import QWebEngineView
+from PyQt5.QtCore import Qt, QTimer, QCoreApplication
+from PyQt5.QtWidgets import QApplication, QMainWindow, QOpenGLWidget, QLabel, QVBoxLayout, QWidget, QHBoxLayout, QPushButton, QDialog, QProgressBar
+from PyQt5.QtGui import QFont, QSurfaceFormat
 from PyQt5.QtCore import QUrl, QEvent
 from OpenGL.GL import *
 from OpenGL.GLU import *
 from OpenGL.GLUT import *
-import math
 import os
-from PIL import Image
-import pygame
 import time
+from geometry import Geometry, quad
+from loop import FixedTimestep, BASE_TICK_RATE, lerp
+from sprites import SpriteCache, decode_sprites
+from hud import Hud
+import sim
+from sim import SkaterParams, SkaterState
+from replay import Recorder, Replay
+from telemetry import Telemetry
+from audio import Audio, decode_effects
+from profiler import Profiler
+from assets import resolver
+from atlas import Atlas
+from billboards import Billboards
+from matrices import Camera
+from pipeline import ShaderManager, FixedPipeline, CorePipeline, is_core, surface_format
+from world import World, tile_mesh, crate_mesh, rail_mesh, ramp_mesh, ENEMY_WIDTH, TALLEST
+from entities import ENEMY
+from course import Course
+from scoring import Scoring
+from controls import Bindings, InputQueue, Gamepad
+from pacing import FramePacer, ScaledTarget, pacing_mode, blit_supported
+from lifecycle import SceneLifecycle
+from loader import AssetLoader, UploadQueue
+from simthread import SimThread, SnapshotBuffer, TickStats
 
 # comment at the start of the file or something but do not delete it :3. Also give full code all the way to the end.
 
+REPLAY_DIR = os.path.join(os.path.dirname(__file__), 'replays')
+PROFILE_DIR = os.path.join(os.path.dirname(__file__), 'profiles')
+MUSIC = 'bgm/theme.wav'
+MAX_REPLAY_SPEED = 100
+FIELD_OF_VIEW = 45
+# how long the birb keeps looking left or right after the steering key is let go
+SIDE_POSE_SECONDS = 0.5
+
+# what paintGL needs from a tick, made fresh each tick and never changed after, so the threaded simulation can hand it over.
+# time is the clock time the tick simulated up to, published when it finished, dt is wall seconds per tick
+Snapshot = namedtuple('Snapshot', 'time dt published prev_pos pos prev_rot rot prev_view_pos view_pos prev_view_rot view_rot boxes '
+                                   'state tick_ms')
+
+
+def decode_textures():
+    # the CPU half of load_textures, safe on a loader thread
+    floor = resolver.frames('tex/brick.png', (64, 64))[0]
+    # every animated sprite shares one atlas texture, frames are picked with texture coordinates
+    atlas = Atlas()
+    atlas.add('birb', resolver.frames('tex/birb/thirdperson.gif', (64, 64), composite=True))
+    atlas.add('enemy', resolver.frames('tex/enemy.gif', (32, 64), composite=True))
+    return floor, atlas, atlas.pack()
+
+
+def startup_jobs():
+    # everything Scene3D decodes, started while the title screen is up
+    return {'textures': decode_textures, 'sprites': decode_sprites, 'effects': decode_effects}
+
 class PauseDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -57,32 +106,81 @@ class PauseDialog(QDialog):
             main_window.return_to_title_screen()
         self.accept()
 
-class Scene3D(QOpenGLWidget):
+class TitleScreen(QWidget):
     def __init__(self, parent=None):
+        super(TitleScreen, self).__init__(parent)
+        self.setFocusPolicy(Qt.StrongFocus)
+        self.setStyleSheet("background-color: black;")
+
+        layout = QVBoxLayout(self)
+        layout.addStretch(1)
+
+        self.image = QLabel()
+        self.image.setAlignment(Qt.AlignCenter)
+        self.pixmap = resolver.pixmap('tex/HTML/title.png')
+        layout.addWidget(self.image)
+
+        text = QLabel("Click the play button below.")
+        text.setFont(QFont("Times New Roman", 18))
+        text.setStyleSheet("color: #808080;")
+        text.setAlignment(Qt.AlignCenter)
+        layout.addWidget(text)
+        layout.addStretch(1)
+
+        self.help_button = QPushButton("Help")
+        self.help_button.setStyleSheet("background-color: #C0C0C0; color: black; padding: 10px 20px; border: 2px outset white;")
+        help_layout = QHBoxLayout()
+        help_layout.addWidget(self.help_button)
+        help_layout.addStretch(1)
+        layout.addLayout(help_layout)
+
+    def resizeEvent(self, event):
+        width = min(self.pixmap.width(), self.width())
+        self.image.setPixmap(self.pixmap.scaledToWidth(width, Qt.FastTransformation))
+        super(TitleScreen, self).resizeEvent(event)
+
+class Scene3D(QOpenGLWidget):
+    # class level so event() works for events sent while __init__ is still running
+    profiler = None
+
+    def __init__(self, parent=None, tick_rate=BASE_TICK_RATE, max_catch_up=5, loader=None, threaded=False, pacing=('vsync', None)):
         super(Scene3D, self).__init__(parent)
         self.setFocusPolicy(Qt.StrongFocus)
-        self.camera_pos = np.array([0.0, 20.0, 5.0])
-        self.camera_rot = np.array([0.0, 0.0, 0.0])
+        self.loader = loader
+        # GL setup runs a few steps per frame from paintGL, so showing the scene never blocks on it
+        self.uploads = UploadQueue()
+        self.params = SkaterParams()
+        self.state = SkaterState(self.params)
         self.third_person_camera_pos = np.array([0.0, 25.0, 15.0])
         self.third_person_camera_rot = np.array([0.0, 0.0, 0.0])
-        self.move_speed = 0.0
-        self.max_move_speed = 1.5
-        self.auto_forward_speed = 2.0
-        self.acceleration = 0.05
-        self.deceleration = 0.05
-        self.side_move_speed = 0.2
-        self.rot_speed = 1
-        self.keys = set()
+        self.tick_rate = tick_rate
+        self.loop = FixedTimestep(tick_rate, max_catch_up)
+        self.store_previous_state()
+        # --threaded-sim ticks on its own thread and paintGL draws the latest published snapshot
+        self.threaded = threaded
+        self.sim_thread = None
+        self.snapshots = SnapshotBuffer()
+        self.tick_stats = TickStats()
+        self.tick_done = time.perf_counter()
+        self.shown = None
+        self.bindings = Bindings()
+        self.bindings.load()
+        self.input = InputQueue(self.bindings)
+        self.gamepad = Gamepad.open()
         self.floor_texture = None
         self.wall_texture = None
-        
-        self.score = 0
-        self.combo_score = 0
-        self.last_move = None
-        self.last_move_time = 0
-        
-        self.last_move_key = None
-        self.last_move_key_time = 0
+        # every texture name this scene made, so they can be deleted with the rest of its GL objects
+        self.textures = []
+        self.geometry = Geometry()
+        self.camera = Camera(FIELD_OF_VIEW)
+        self.shaders = ShaderManager()
+        self.pipeline = None
+        self.world = World()
+        self.course = Course(world=self.world)
+        self.course.reset(self.state)
+        self.scoring = Scoring()
+        self.visible_chunks = []
+        self.enemy_billboards = None
         
         self.score_label = QLabel(self)
         w95fa_font = QFont("w95fa", 20)
@@ -93,336 +191,659 @@ class Scene3D(QOpenGLWidget):
         
         self.preview_image = QLabel(self)
         self.preview_image.setGeometry(self.width() - 128, self.height() - 128, 128, 128)
-        self.preview_image_path = os.path.join(os.path.dirname(__file__), 'tex', 'birb', 'forward.png')
-        pixmap = QPixmap(self.preview_image_path)
-        pixmap = pixmap.scaled(128, 128, Qt.KeepAspectRatio, Qt.FastTransformation)
-        self.preview_image.setPixmap(pixmap)
+        self.sprites = SpriteCache(images=self.preloaded('sprites'))
         self.preview_image.setStyleSheet("background-color: rgba(255, 255, 255, 100);")
         self.preview_image.hide()
+        self.hud = Hud(self.sprites)
+        self.hud.add('score', self.score_label)
+        self.hud.add('preview', self.preview_image)
+        self.hud.set('preview', pose='forward')
+        self.hud.apply()
+        self.side_pose = 'forward'
+        self.side_until = 0.0
+
+        self.loading_label = QLabel(self)
+        self.loading_label.setFont(w95fa_font)
+        self.loading_label.setStyleSheet("color: white;")
+        self.loading_label.setAlignment(Qt.AlignCenter)
+        self.loading_label.hide()
+
+        self.telemetry = None
+        self.telemetry_label = QLabel(self)
+        self.telemetry_label.setFont(QFont("Courier New", 10))
+        self.telemetry_label.setStyleSheet("color: white; background-color: rgba(0, 0, 0, 120);")
+        self.telemetry_label.setGeometry(10, 10, 480, 160)
+        self.telemetry_label.hide()
+        self.last_frame_time = None
+        self.last_tick_ms = 0.0
+        # whether ticks time themselves, the simulation's copy of telemetry being on
+        self.tick_timing = False
+        self.overlay_time = 0.0
+        # CSV file the telemetry is also logged to, every time F2 turns it on
+        self.telemetry_path = os.environ.get('SKATEPY_TELEMETRY') or None
+        if self.telemetry_path:
+            self.set_telemetry(True)
+
+        self.profiler = None
+        # the profiler ticks report to, only changed between ticks
+        self.tick_profiler = None
+        self.profiler_label = QLabel(self)
+        self.profiler_label.setFont(QFont("Courier New", 10))
+        self.profiler_label.setStyleSheet("color: white; background-color: rgba(0, 0, 0, 120);")
+        self.profiler_label.hide()
+        self.paint_end = 0
+        self.profiler_overlay_time = 0.0
+        self.frameSwapped.connect(self.on_frame_swapped)
 
         self.controls_layout = QHBoxLayout()
         self.controls_layout.setContentsMargins(10, 0, 10, 0)
 
-        self.timer = QTimer()
+        self.pacer = FramePacer(*pacing)
+        screen = QApplication.primaryScreen()
+        if screen is not None:
+            self.pacer.set_refresh(screen.refreshRate())
+        self.scaled_target = None
+        self.viewport_scaled = False
+        # one update_scene per presented frame, on_frame_swapped starts the next one when the pacer says so.
+        # parented, so they go with the scene, and nothing runs until resume()
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.PreciseTimer)
         self.timer.timeout.connect(self.update_scene)
-        self.timer.start(16)
-        pygame.mixer.init()
+        self.paused = True
+        self.audio = Audio(effects=self.preloaded('effects'))
 
-        self.side_timer = QTimer()
-        self.side_timer.setSingleShot(True)
-        self.side_timer.timeout.connect(self.reset_preview_image)
-
-        self.ollie_timer = 0
-        self.ollie_duration = 60
-        self.ollie_height = 35.0
-        self.is_ollying = False
-        self.ollie_preview_path = os.path.join(os.path.dirname(__file__), 'tex', 'birb', 'ollie.png')
-
-        self.is_music_playing = False
+        self.recorder = None
+        self.replay_inputs = None
+        self.last_recording = None
         
         self.is_third_person = False
-        self.third_person_textures = []
+        self.atlas = Atlas()
+        self.atlas_texture = None
         self.third_person_current_frame = 0
-        self.third_person_frame_timer = QTimer()
+        self.third_person_frame_timer = QTimer(self)
         self.third_person_frame_timer.timeout.connect(self.update_third_person_frame)
 
+    def resume(self):
+        # a fresh run on the scene that is already set up, GL objects and sounds are kept from last time
+        self.restart_run()
+        self.is_third_person = False
+        self.pacer.reset()
+        self.tick_stats.reset()
+        self.paused = False
+        if self.threaded:
+            self.snapshots.clear()
+            self.sim_thread = SimThread(self.loop, self.tick)
+            self.sim_thread.start()
+        self.timer.start(0)
+        self.third_person_frame_timer.start(1000)
+
+    def pause(self):
+        self.paused = True
+        # stopped first, everything below changes state the simulation thread owns
+        if self.sim_thread is not None:
+            self.sim_thread.stop()
+            self.sim_thread = None
+        self.timer.stop()
+        self.third_person_frame_timer.stop()
+        self.audio.stop_music()
+        self.input.release_all(time.perf_counter())
+        self.input.drain(float('inf'))
+        if self.recorder is not None:
+            print(f"Saved replay to {self.stop_recording()}")
+        self.stop_replay()
+
+    def teardown(self):
+        self.pause()
+        self.delete_gl()
+        self.set_telemetry(False)
+        self.audio.quit()
+
+    def preloaded(self, name):
+        # what the loader decoded on its threads, None means decode it here as before
+        if self.loader is None:
+            return None
+        try:
+            return self.loader.result(name)
+        except Exception as e:
+            print(f"Error loading {name} in the background: {e}")
+            return None
+
+    @property
+    def loading(self):
+        return self.pipeline is None or len(self.uploads) > 0
+
     def update_third_person_frame(self):
-        self.third_person_current_frame = (self.third_person_current_frame + 1) % len(self.third_person_textures)
+        self.third_person_current_frame = (self.third_person_current_frame + 1) % max(1, self.atlas.frame_count('birb'))
 
-    def update_score_label(self):
-        if self.combo_score > 0:
-            score_text = f"Combo: {self.combo_score}"
-            if self.last_move:
-                score_text = f"{self.last_move} (+{self.score})\n{score_text}"
-            self.score_label.setText(score_text)
-            self.score_label.show()
-        else:
-            self.score_label.hide()
+    @property
+    def camera_pos(self):
+        return np.array(self.state.pos)
 
-    def stop_music(self):
-        pygame.mixer.music.stop()
+    @property
+    def camera_rot(self):
+        return np.array(self.state.rot)
 
-    def reset_preview_image(self):
-        pixmap = QPixmap(self.preview_image_path)
-        pixmap = pixmap.scaled(128, 128, Qt.KeepAspectRatio, Qt.FastTransformation)
-        self.preview_image.setPixmap(pixmap)
+    def update_score_label(self):
+        if self.scoring.combo_score > 0:
+            score_text = f"Combo: {self.scoring.combo_score}"
+            if self.scoring.last_move:
+                score_text = f"{self.scoring.last_move} (+{self.scoring.score})\n{score_text}"
+            self.hud.set('score', text=score_text, visible=True)
+        else:
+            self.hud.set('score', visible=False)
+
+    def create_texture(self, pixels, wrap=GL_REPEAT):
+        texture = glGenTextures(1)
+        self.textures.append(texture)
+        glBindTexture(GL_TEXTURE_2D, texture)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, wrap)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, wrap)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, pixels.shape[1], pixels.shape[0], 
+                     0, GL_RGBA, GL_UNSIGNED_BYTE, np.ascontiguousarray(pixels))
+        return texture
 
     def load_textures(self):
-        floor_path = os.path.join(os.path.dirname(__file__), 'tex', 'brick.png')
-        third_person_path = os.path.join(os.path.dirname(__file__), 'tex', 'birb', 'thirdperson.gif')
         try:
-            floor_img = Image.open(floor_path)
-            floor_img = floor_img.convert("RGBA")
-            floor_img = floor_img.resize((64, 64), Image.NEAREST)
-            floor_data = floor_img.tobytes()
-            self.floor_texture = glGenTextures(1)
-            glBindTexture(GL_TEXTURE_2D, self.floor_texture)
-            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
-            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
-            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
-            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
-            glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, floor_img.width, floor_img.height, 
-                         0, GL_RGBA, GL_UNSIGNED_BYTE, floor_data)
-            
-            third_person_gif = Image.open(third_person_path)
-            self.third_person_textures = []
-            
-            for frame in range(third_person_gif.n_frames):
-                third_person_gif.seek(frame)
-                third_person_img = third_person_gif.convert("RGBA")
-                third_person_img = third_person_img.resize((64, 64), Image.NEAREST)
-                
-                background = Image.new('RGBA', third_person_img.size, (0, 0, 0, 0))
-                background.paste(third_person_img, (0, 0), third_person_img)
-                third_person_img = background
-                
-                third_person_data = third_person_img.tobytes()
-                
-                texture = glGenTextures(1)
-                glBindTexture(GL_TEXTURE_2D, texture)
-                glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
-                glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
-                glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
-                glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
-                glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, third_person_img.width, third_person_img.height, 
-                             0, GL_RGBA, GL_UNSIGNED_BYTE, third_person_data)
-                
-                self.third_person_textures.append(texture)
-            
-            self.third_person_frame_timer.start(1000)
-            
+            floor, self.atlas, pixels = self.preloaded('textures') or decode_textures()
+            self.floor_texture = self.create_texture(floor)
+            self.atlas_texture = self.create_texture(pixels, GL_CLAMP_TO_EDGE)
             return True
         except Exception as e:
             print(f"Error loading textures: {e}")
             return False
 
+    def load_geometry(self, core=False):
+        self.geometry = Geometry()
+        # every chunk draws the same tile and crate meshes at its own offset
+        self.geometry.add('tile', tile_mesh(self.world.chunk_size))
+        self.geometry.add('crate', crate_mesh())
+        self.geometry.add('rail/x', rail_mesh(along_x=True))
+        self.geometry.add('rail/z', rail_mesh(along_x=False))
+        self.geometry.add('ramp', ramp_mesh())
+        for frame in range(self.atlas.frame_count('birb')):
+            self.geometry.add(f'birb/{frame}', quad(-5, 20, 0, 5, 0, 0, uv=self.atlas.uv('birb', frame)))
+        self.geometry.upload(core=core)
+
+    def load_billboards(self):
+        frames = self.atlas.frame_count('enemy')
+        if not frames:
+            return
+        self.enemy_billboards = Billboards([self.atlas.uv('enemy', frame) for frame in range(frames)], (ENEMY_WIDTH, TALLEST))
+        self.enemy_billboards.upload(self.shaders, core=self.pipeline.core)
+
     def initializeGL(self):
-        glEnable(GL_DEPTH_TEST)
-        glEnable(GL_TEXTURE_2D)
-        glEnable(GL_BLEND)
-        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
-        glShadeModel(GL_SMOOTH)
-        glClearColor(0.2, 0.2, 0.2, 1.0)
-        self.load_textures()
+        # main() asks for a 3.3 core context, drivers that cannot give one get the fixed-function renderer.
+        # Qt makes a new context if the widget moves to another window, the old one's objects go with it
+        self.context().aboutToBeDestroyed.connect(self.delete_gl)
+        self.setup_gl(is_core(self.context()), budgeted=True)
+
+    def setup_gl(self, core, budgeted=False):
+        # budgeted leaves the steps for paintGL, otherwise they all run now
+        self.release_gl()
+        self.uploads.clear()
+        self.uploads.add('textures', self.load_textures)
+        self.uploads.add('geometry', lambda: self.load_geometry(core))
+        self.uploads.add('shaders', lambda: self.setup_pipeline(core))
+        self.uploads.add('billboards', self.load_billboards)
+        if not budgeted:
+            self.uploads.flush()
+
+    def setup_pipeline(self, core):
+        pipeline = CorePipeline(self.geometry, self.shaders) if core else FixedPipeline(self.geometry)
+        pipeline.setup()
+        if self.pacer.mode == 'adaptive':
+            if blit_supported():
+                self.scaled_target = ScaledTarget()
+            else:
+                print("Error: adaptive resolution needs glBlitFramebuffer, rendering at full size")
+        # set last, paintGL draws the scene once there is a pipeline
+        self.pipeline = pipeline
         self.preview_image.show()
 
+    def release_gl(self):
+        # needs this scene's context current
+        if self.textures:
+            glDeleteTextures(len(self.textures), self.textures)
+        self.textures = []
+        self.floor_texture = None
+        self.atlas_texture = None
+        if self.enemy_billboards is not None:
+            self.enemy_billboards.delete()
+            self.enemy_billboards = None
+        if self.pipeline is not None:
+            self.pipeline.delete()
+            self.pipeline = None
+        self.geometry.delete()
+        self.shaders.delete()
+        if self.scaled_target is not None:
+            self.scaled_target.delete()
+            self.scaled_target = None
+
+    def delete_gl(self):
+        if self.context() is None or not self.context().isValid():
+            return
+        self.makeCurrent()
+        self.release_gl()
+        self.doneCurrent()
+
+    def gl_objects(self):
+        # GL names this scene holds, the lifecycle bench checks they stay flat over title screen round trips
+        count = len(self.textures) + len(self.shaders.programs) + len(self.geometry.lists)
+        count += sum(name is not None for name in (self.geometry.vao, self.geometry.vbo))
+        if self.enemy_billboards is not None:
+            count += sum(name is not None for name in (self.enemy_billboards.vao, self.enemy_billboards.corner_vbo, self.enemy_billboards.instance_vbo))
+        if self.scaled_target is not None and self.scaled_target.fbo is not None:
+            count += 1
+        return count
+
     def resizeGL(self, width, height):
         glViewport(0, 50, width, height - 50)
-        glMatrixMode(GL_PROJECTION)
-        glLoadIdentity()
-        gluPerspective(90, width / (height - 50), 0.1, 1000.0)
         self.preview_image.setGeometry(width - 138, height - 138, 128, 128)
         self.score_label.setGeometry(width - 138, height - 268, 128, 130)
-
-    def update_stats(self):
-        stats = f"Position: ({self.camera_pos[0]:.2f}, {self.camera_pos[1]:.2f}, {self.camera_pos[2]:.2f}) | "
-        stats += f"Rotation: ({self.camera_rot[0]:.2f}, {self.camera_rot[1]:.2f})"
-        print(stats, end='\r')
+        self.profiler_label.setGeometry(width - 358, height - 138, 210, 128)
+        self.loading_label.setGeometry(0, 0, width, height)
+
+    def set_telemetry(self, enabled):
+        if enabled:
+            self.telemetry = Telemetry(path=self.telemetry_path)
+            self.last_frame_time = None
+            self.telemetry_label.show()
+        else:
+            if self.telemetry is not None:
+                self.telemetry.flush()
+            self.telemetry = None
+            self.telemetry_label.hide()
+        self.on_sim(lambda: setattr(self, 'tick_timing', enabled))
+
+    def record_telemetry(self, snapshot):
+        # from the snapshot being drawn, the simulation thread may be partway through the next tick
+        now = time.perf_counter()
+        frame_ms = 0.0 if self.last_frame_time is None else (now - self.last_frame_time) * 1000
+        self.last_frame_time = now
+        state = snapshot.state
+        self.telemetry.record(state.time, state.pos, state.rot, state.move_speed, frame_ms, snapshot.tick_ms)
+
+        # the label repaints over the GL widget, so only refresh it a few times a second
+        if now - self.overlay_time < 0.25:
+            return
+        self.overlay_time = now
+        pos, rot = state.pos, state.rot
+        stats = f"Position: ({pos[0]:.2f}, {pos[1]:.2f}, {pos[2]:.2f})\n"
+        stats += f"Rotation: ({rot[0]:.2f}, {rot[1]:.2f})  Speed: {state.move_speed:.2f}\n"
+        stats += f"Frame: {frame_ms:.2f} ms  Tick: {snapshot.tick_ms:.3f} ms\n"
+        stats += f"Chunks: {len(self.world.chunks)} loaded, {len(self.visible_chunks)} visible\n"
+        stats += f"Sprites: {self.sprites.hits} hits, {self.sprites.misses} misses  {self.hud.stats()}\n"
+        stats += f"{self.audio.stats()}\n{self.input.stats()}\n{self.pacer.stats()}\n{self.tick_stats.stats()}"
+        self.telemetry_label.setText(stats)
+
+    def set_profiler(self, enabled):
+        if enabled:
+            self.profiler = Profiler()
+            self.profiler_label.show()
+        else:
+            self.profiler = None
+            self.profiler_label.hide()
+        profiler = self.profiler
+        self.on_sim(lambda: setattr(self, 'tick_profiler', profiler))
+
+    def export_profile(self):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, time.strftime('trace-%Y%m%d-%H%M%S.json'))
+        count = self.profiler.export_chrome_trace(path)
+        print(f"Wrote {count} trace events to {path}")
+
+    def on_frame_swapped(self):
+        swapped = time.perf_counter()
+        self.input.presented(swapped)
+        self.pacer.presented(swapped)
+        if self.shown is not None:
+            self.tick_stats.presented(swapped, self.shown.published)
+            self.shown = None
+        if not self.paused:
+            self.timer.start(self.pacer.delay_ms(swapped))
+        if self.profiler is None:
+            return
+        now = time.perf_counter_ns()
+        if self.paint_end:
+            self.profiler.add('swap', self.paint_end, now)
+            self.paint_end = 0
+        self.profiler.end_frame()
+        if now - self.profiler_overlay_time > 250000000:
+            self.profiler_overlay_time = now
+            self.profiler_label.setText(self.profiler.summary())
+
+    def event(self, event):
+        # paint requests are timed by paintGL itself. F3 can turn the profiler off while its key event is handled,
+        # the event still goes to the one that timed it
+        profiler = self.profiler
+        if profiler is None or event.type() in (QEvent.Paint, QEvent.UpdateRequest):
+            return super(Scene3D, self).event(event)
+        start = time.perf_counter_ns()
+        result = super(Scene3D, self).event(event)
+        profiler.add('events', start, time.perf_counter_ns())
+        return result
+
+    def paint_loading(self):
+        self.uploads.run()
+        if self.loading:
+            glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+            self.loading_label.setText(f"Loading {self.uploads.next_name()}... {self.uploads.progress():.0%}")
+            self.loading_label.show()
+            return False
+        self.loading_label.hide()
+        return True
 
     def paintGL(self):
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-        glMatrixMode(GL_MODELVIEW)
-        glLoadIdentity()
-        glMatrixMode(GL_PROJECTION)
-        glLoadIdentity()
-        gluPerspective(45, self.width() / (self.height() - 50), 0.1, 1000.0)
-        glMatrixMode(GL_MODELVIEW)
-        glLoadIdentity()
-        
-        if self.is_third_person:
-            glRotatef(self.third_person_camera_rot[0], 1, 0, 0)
-            glRotatef(self.third_person_camera_rot[1], 0, 1, 0)
-            glTranslatef(-self.third_person_camera_pos[0], -self.third_person_camera_pos[1], -self.third_person_camera_pos[2])
-        else:
-            glRotatef(self.camera_rot[0], 1, 0, 0)
-            glRotatef(self.camera_rot[1], 0, 1, 0)
-            glTranslatef(-self.camera_pos[0], -self.camera_pos[1], -self.camera_pos[2])
+        if self.loading and not self.paint_loading():
+            return
+        if self.profiler is not None:
+            paint_start = time.perf_counter_ns()
+        snapshot, alpha = self.latest_state()
+        self.shown = snapshot
+        pos, rot, birb_pos = self.render_state(snapshot, alpha)
+        width, height = self.width(), self.height() - 50
+        scaled = self.scaled_target is not None and self.pacer.scale < 1
+        if scaled:
+            self.scaled_target.begin(width, height, self.pacer.scale)
+        elif self.viewport_scaled:
+            glViewport(0, 50, width, height)
+        self.viewport_scaled = scaled
+        self.camera.set(pos, rot, width / height, self.world.far)
+        self.pipeline.begin_frame(self.camera)
         
+        self.visible_chunks = self.world.cull(self.camera.view_projection, snapshot.boxes)
+        self.geometry.begin()
         if self.floor_texture:
-            glBindTexture(GL_TEXTURE_2D, self.floor_texture)
-            glBegin(GL_QUADS)
-            glTexCoord2f(0, 0); glVertex3f(-1000, 0, -1000)
-            glTexCoord2f(100, 0); glVertex3f(1000, 0, -1000)
-            glTexCoord2f(100, 100); glVertex3f(1000, 0, 1000)
-            glTexCoord2f(0, 100); glVertex3f(-1000, 0, 1000)
-            glEnd()
+            self.pipeline.draw_chunks(self.visible_chunks, self.floor_texture)
         
-        if self.is_third_person and self.third_person_textures:
-            current_texture = self.third_person_textures[self.third_person_current_frame]
-            glBindTexture(GL_TEXTURE_2D, current_texture)
-            glBegin(GL_QUADS)
-            glTexCoord2f(0, 0); glVertex3f(self.camera_pos[0] - 5, 20, self.camera_pos[2])
-            glTexCoord2f(1, 0); glVertex3f(self.camera_pos[0] + 5, 20, self.camera_pos[2])
-            glTexCoord2f(1, 1); glVertex3f(self.camera_pos[0] + 5, 0, self.camera_pos[2])
-            glTexCoord2f(0, 1); glVertex3f(self.camera_pos[0] - 5, 0, self.camera_pos[2])
-            glEnd()
-
-        self.update_stats()
+        if self.is_third_person and self.atlas_texture:
+            glBindTexture(GL_TEXTURE_2D, self.atlas_texture)
+            self.pipeline.draw(f'birb/{self.third_person_current_frame}', birb_pos[0], 0, birb_pos[2])
+        self.geometry.end()
+
+        if self.enemy_billboards is not None:
+            enemies = [(entity.x + entity.width / 2, 0, entity.z + entity.depth / 2)
+                       for chunk in self.visible_chunks for entity in chunk.entities if entity.kind == ENEMY]
+            self.enemy_billboards.set(enemies, np.full(len(enemies), self.third_person_current_frame))
+            self.enemy_billboards.draw(self.atlas_texture, self.camera)
+
+        if scaled:
+            self.scaled_target.end(self.defaultFramebufferObject(), 0, 50, width, height)
+
+        if self.telemetry is not None:
+            self.record_telemetry(snapshot)
+
+        if self.profiler is not None:
+            self.paint_end = time.perf_counter_ns()
+            self.profiler.add('gl', paint_start, self.paint_end)
+
+    def store_previous_state(self):
+        self.prev_camera_pos = self.camera_pos.copy()
+        self.prev_camera_rot = self.camera_rot.copy()
+        self.prev_third_person_camera_pos = self.third_person_camera_pos.copy()
+        self.prev_third_person_camera_rot = self.third_person_camera_rot.copy()
+
+    def render_state(self, snapshot, alpha):
+        if self.is_third_person:
+            pos = lerp(snapshot.prev_view_pos, snapshot.view_pos, alpha, snap=1000)
+            rot = lerp(snapshot.prev_view_rot, snapshot.view_rot, alpha)
+        else:
+            pos = lerp(snapshot.prev_pos, snapshot.pos, alpha, snap=1000)
+            rot = lerp(snapshot.prev_rot, snapshot.rot, alpha)
+        birb_pos = lerp(snapshot.prev_pos, snapshot.pos, alpha, snap=1000)
+        return pos, rot, birb_pos
 
     def update_scene(self):
-        current_time = time.time()
-        
-        if self.last_move_time > 0 and current_time - self.last_move_time >= 5:
-            self.combo_score = 0
-            self.last_move = None
-            self.last_move_time = 0
-            self.update_score_label()
-
-        if not self.hasFocus():
+        if self.paused:
+            return
+        idle = not self.hasFocus() or self.loading
+        if self.sim_thread is not None and self.sim_thread.failed:
+            # it printed what went wrong, the game carries on ticking here on the GUI thread
+            self.sim_thread.stop()
+            self.sim_thread = None
+        if self.sim_thread is not None:
+            self.sim_thread.active = not idle
+        if idle:
+            # nothing to skate in until paintGL has finished the GL setup, it only needs repainting until then
+            if self.sim_thread is None:
+                self.loop.reset()
+            self.pacer.reset()
+            self.tick_stats.reset()
+            if self.loading:
+                self.update()
+            self.timer.start(100)
             return
 
-        angle = math.radians(-self.camera_rot[1])
-        forward = np.array([-math.sin(angle), 0, -math.cos(angle)])
-        right = np.array([math.cos(angle), 0, -math.sin(angle)])
-        
-        new_pos = self.camera_pos.copy()
-        
-        if Qt.Key_W in self.keys and Qt.Key_S not in self.keys:
-            if self.move_speed == 0:
-                self.move_speed = 0.5
-            self.move_speed = min(self.move_speed + self.acceleration, self.max_move_speed)
-            new_pos += forward * self.move_speed
-        elif Qt.Key_S in self.keys:
-            self.move_speed = max(self.move_speed - self.deceleration, 0)
-        else:
-            if self.move_speed == self.max_move_speed:
-                new_pos += forward * self.auto_forward_speed
-            else:
-                self.move_speed = max(self.move_speed - self.deceleration, 0)
-                if self.move_speed > 0:
-                    new_pos += forward * self.move_speed
-        
-        if self.is_ollying:
-            self.ollie_timer += 1
-            if self.ollie_timer <= self.ollie_duration // 2:
-                new_pos[1] = 20 + (self.ollie_height - 20) * (self.ollie_timer / (self.ollie_duration // 2))
-            elif self.ollie_timer <= self.ollie_duration // 2 + 30:
-                new_pos[1] = self.ollie_height
-            else:
-                new_pos[1] = self.ollie_height - (self.ollie_height - 20) * ((self.ollie_timer - (self.ollie_duration // 2 + 30)) / (self.ollie_duration // 2))
-            
-            if self.ollie_timer >= self.ollie_duration + 30:
-                self.is_ollying = False
-                self.ollie_timer = 0
-                new_pos[1] = 20
-                pixmap = QPixmap(self.preview_image_path)
-                pixmap = pixmap.scaled(128, 128, Qt.KeepAspectRatio, Qt.FastTransformation)
-                self.preview_image.setPixmap(pixmap)
-        
-        if Qt.Key_A in self.keys:
-            new_pos -= right * self.side_move_speed
-            self.camera_rot[1] -= 0.1
-            pixmap = QPixmap(os.path.join(os.path.dirname(__file__), 'tex', 'birb', 'left.png'))
-            pixmap = pixmap.scaled(128, 128, Qt.KeepAspectRatio, Qt.FastTransformation)
-            self.preview_image.setPixmap(pixmap)
-            self.side_timer.start(500)
-        
-        if Qt.Key_D in self.keys:
-            new_pos += right * self.side_move_speed
-            self.camera_rot[1] += 0.1
-            pixmap = QPixmap(os.path.join(os.path.dirname(__file__), 'tex', 'birb', 'right.png'))
-            pixmap = pixmap.scaled(128, 128, Qt.KeepAspectRatio, Qt.FastTransformation)
-            self.preview_image.setPixmap(pixmap)
-            self.side_timer.start(500)
-
-        if new_pos[0] > 1000:
-            new_pos[0] = -1000
-        elif new_pos[0] < -1000:
-            new_pos[0] = 1000
-        
-        if new_pos[2] > 1000:
-            new_pos[2] = -1000
-        elif new_pos[2] < -1000:
-            new_pos[2] = 1000
-
-        self.camera_pos = new_pos
-        
-        if self.is_third_person:
-            self.third_person_camera_pos = np.array([
-                self.camera_pos[0], 
-                self.camera_pos[1] + 5, 
-                self.camera_pos[2] + 10
-            ])
-            self.third_person_camera_rot = self.camera_rot.copy()
-
-        if Qt.Key_Left in self.keys or Qt.Key_J in self.keys:
-            self.camera_rot[1] -= self.rot_speed
-        if Qt.Key_Right in self.keys or Qt.Key_L in self.keys:
-            self.camera_rot[1] += self.rot_speed
-        if Qt.Key_Up in self.keys or Qt.Key_I in self.keys:
-            self.camera_rot[0] = max(-89, self.camera_rot[0] - self.rot_speed)
-        if Qt.Key_Down in self.keys or Qt.Key_K in self.keys:
-            self.camera_rot[0] = min(89, self.camera_rot[0] + self.rot_speed)
+        if self.gamepad is not None:
+            self.gamepad.poll(self.input, time.perf_counter())
 
+        # with the simulation thread running the ticks happen there, this frame only shows what it published
+        if self.sim_thread is None:
+            self.loop.advance(self.tick)
+        # every tick this frame has had its say, the widgets only see the result
+        if self.profiler is None:
+            self.hud.apply()
+        else:
+            start = time.perf_counter_ns()
+            self.hud.apply()
+            self.profiler.add('widgets', start, time.perf_counter_ns())
         self.update()
+        # normally restarted sooner by on_frame_swapped, this only fires when Qt skips the paint, e.g. while minimised
+        self.timer.start(100)
+
+    def read_inputs(self):
+        # only the presses and releases that happened before this tick's end, later ones wait for their own tick
+        return self.input.drain(self.loop.tick_end)
+
+    def restart_run(self, params=None):
+        self.state = SkaterState(params or self.params)
+        self.course.reset(self.state)
+        self.scoring.reset()
+        self.loop.reset()
+        self.store_previous_state()
+        self.side_until = 0.0
+        self.update_score_label()
+        self.hud.set('preview', pose='forward')
+
+    def start_recording(self):
+        self.stop_replay()
+        self.restart_run()
+        self.recorder = Recorder(self.loop.tick_rate, self.params, self.world.seed)
+
+    def stop_recording(self):
+        os.makedirs(REPLAY_DIR, exist_ok=True)
+        path = os.path.join(REPLAY_DIR, time.strftime('%Y%m%d-%H%M%S') + '.skr')
+        self.recorder.save(path)
+        self.recorder = None
+        self.last_recording = path
+        return path
+
+    def start_replay(self, replay, speed=1.0):
+        if self.recorder is not None:
+            self.stop_recording()
+        if replay.seed != self.world.seed:
+            self.set_world_seed(replay.seed)
+        self.restart_run(replay.params)
+        self.loop.set_tick_rate(replay.tick_rate)
+        self.loop.speed = min(speed, MAX_REPLAY_SPEED)
+        self.replay_inputs = replay.inputs()
+
+    def stop_replay(self):
+        self.replay_inputs = None
+        self.loop.speed = 1.0
+        self.loop.set_tick_rate(self.tick_rate)
+
+    def tick(self, dt):
+        started = time.perf_counter()
+        # read once, a profiler turned on or off takes effect from the next tick
+        profiler = self.tick_profiler
+        self.tick_stats.tick(started, self.loop.tick_end)
+        self.store_previous_state()
+        inputs = self.read_inputs()
+        if self.replay_inputs is not None:
+            inputs = next(self.replay_inputs, None)
+            if inputs is None:
+                self.stop_replay()
+                return
+        if self.recorder is not None:
+            self.recorder.record(inputs)
+        if profiler is None:
+            events = self.step_physics(inputs, dt)
+            self.update_hud(events)
+        else:
+            start = time.perf_counter_ns()
+            events = self.step_physics(inputs, dt)
+            middle = time.perf_counter_ns()
+            self.update_hud(events)
+            profiler.add('physics', start, middle)
+            profiler.add('widgets', middle, time.perf_counter_ns())
+
+        self.update_third_person_camera()
+        self.tick_done = time.perf_counter()
+        if self.tick_timing:
+            self.last_tick_ms = (self.tick_done - started) * 1000
+        if self.sim_thread is not None:
+            self.snapshots.publish(self.snapshot())
+
+    def snapshot(self):
+        # the arrays are replaced every tick rather than changed, so they can be shared without copying
+        return Snapshot(self.loop.tick_end, self.loop.dt / self.loop.speed, self.tick_done,
+                        self.prev_camera_pos, self.camera_pos, self.prev_camera_rot, self.camera_rot,
+                        self.prev_third_person_camera_pos, self.third_person_camera_pos,
+                        self.prev_third_person_camera_rot, self.third_person_camera_rot, self.world.boxes(),
+                        self.state.copy(), self.last_tick_ms)
+
+    def latest_state(self):
+        # the snapshot to draw and how far to interpolate from its previous tick towards it
+        if self.sim_thread is None:
+            return self.snapshot(), self.loop.alpha
+        snapshot = self.snapshots.latest()
+        if snapshot is None:
+            return self.snapshot(), 0.0
+        # drawn one tick behind, like the single-threaded loop, so the frame never has to guess ahead
+        return snapshot, min(1.0, max(0.0, (time.perf_counter() - snapshot.time) / snapshot.dt))
+
+    def update_third_person_camera(self):
+        self.third_person_camera_pos = np.array([
+            self.state.pos[0], 
+            self.state.pos[1] + 5, 
+            self.state.pos[2] + 10
+        ])
+        self.third_person_camera_rot = self.camera_rot
+
+    def set_world_seed(self, seed):
+        self.world = World(self.world.chunk_size, self.world.view_distance, seed)
+        self.course = Course(world=self.world)
+        self.visible_chunks = []
+
+    def step_physics(self, inputs, dt):
+        events = self.course.step(self.state, inputs, dt)
+        # scoring adds combo_end and any trick sequence the table matched
+        events += self.scoring.feed(self.state.time, events)
+        return events
+
+    def update_hud(self, events):
+        for event in events:
+            if event == 'Ollie':
+                # timed from the key press when there was one, ramps launch ollies without one
+                self.audio.play('ollie', self.input.pressed_at.pop(sim.OLLIE, None))
+            elif event == 'Manual':
+                self.audio.play('manual')
+        if self.scoring.combo_score > self.scoring.score and any(event in self.scoring.points for event in events):
+            self.audio.play('combo')
+        if events:
+            self.update_score_label()
+
+        if self.state.inputs & (sim.LEFT | sim.RIGHT):
+            self.side_pose = 'right' if self.state.inputs & sim.RIGHT else 'left'
+            self.side_until = self.state.time + SIDE_POSE_SECONDS
+        if self.state.time < self.side_until:
+            pose = self.side_pose
+        else:
+            pose = 'ollie' if self.state.is_ollying else 'forward'
+        self.hud.set('preview', pose=pose)
 
     def keyPressEvent(self, event):
+        pressed = time.perf_counter()
         if event.key() == Qt.Key_Escape:
             pause_dialog = PauseDialog(self)
+            # otherwise every pause leaves a hidden dialog behind as a child of the scene
+            pause_dialog.setAttribute(Qt.WA_DeleteOnClose)
             pause_dialog.exec_()
             return
 
-        self.keys.add(event.key())
-        
-        current_time = time.time()
-        
-        # Track last move key for manual detection
-        if event.key() in [Qt.Key_A, Qt.Key_D]:
-            if self.last_move_key in [Qt.Key_A, Qt.Key_D] and event.key() != self.last_move_key and current_time - self.last_move_key_time < 1:
-                current_time = time.time()
-                if self.last_move == 'Manual' and current_time - self.last_move_time < 5:
-                    self.combo_score += 50
-                else:
-                    self.combo_score = 50
-                
-                self.score = 50
-                self.last_move = 'Manual'
-                self.last_move_time = current_time
-                self.update_score_label()
-            
-            self.last_move_key = event.key()
-            self.last_move_key_time = current_time
-        
-        if event.key() == Qt.Key_Space and not self.is_ollying:
-            self.is_ollying = True
-            self.ollie_timer = 0
-            pixmap = QPixmap(self.ollie_preview_path)
-            pixmap = pixmap.scaled(128, 128, Qt.KeepAspectRatio, Qt.FastTransformation)
-            self.preview_image.setPixmap(pixmap)
-            
-            current_time = time.time()
-            if self.last_move == 'Ollie' and current_time - self.last_move_time < 5:
-                self.combo_score += 100
-            else:
-                self.combo_score = 100
-            
-            self.score = 100
-            self.last_move = 'Ollie'
-            self.last_move_time = current_time
-            self.update_score_label()
+        if not event.isAutoRepeat():
+            self.input.press(event.key(), pressed)
         
         if event.key() == Qt.Key_P:
-            if not self.is_music_playing:
-                pygame.mixer.music.load(os.path.join(os.path.dirname(__file__), 'bgm', 'theme.wav'))
-                pygame.mixer.music.play(-1)
-                self.is_music_playing = True
-            else:
-                pygame.mixer.music.stop()
-                self.is_music_playing = False
+            self.audio.toggle_music(MUSIC, pressed)
         
         if event.key() == Qt.Key_T:
             self.is_third_person = not self.is_third_person
 
+        if event.key() in (Qt.Key_BracketLeft, Qt.Key_BracketRight):
+            step = 1 if event.key() == Qt.Key_BracketRight else -1
+            self.on_sim(lambda: self.change_view_distance(step))
+
+        if event.key() == Qt.Key_F2:
+            self.set_telemetry(self.telemetry is None)
+
+        if event.key() == Qt.Key_F3:
+            self.set_profiler(self.profiler is None)
+
+        if event.key() == Qt.Key_F4 and self.profiler is not None:
+            self.export_profile()
+
+        if event.key() == Qt.Key_F5:
+            self.on_sim(self.toggle_recording)
+
+        if event.key() == Qt.Key_F6 and self.last_recording:
+            speed = MAX_REPLAY_SPEED if event.modifiers() & Qt.ShiftModifier else 1.0
+            replay = Replay.load(self.last_recording)
+            self.on_sim(lambda: self.start_replay(replay, speed))
+
+    def on_sim(self, command):
+        # anything that changes simulation state runs between ticks, on the simulation thread when there is one
+        if self.sim_thread is None:
+            command()
+        else:
+            self.sim_thread.call(command)
+
+    def change_view_distance(self, step):
+        self.world.set_view_distance(self.world.view_distance + step)
+        self.world.update(self.state.pos)
+
+    def toggle_recording(self):
+        if self.recorder is None:
+            self.start_recording()
+        else:
+            print(f"Saved replay to {self.stop_recording()}")
+
     def keyReleaseEvent(self, event):
-        self.keys.discard(event.key())
+        if not event.isAutoRepeat():
+            self.input.release(event.key(), time.perf_counter())
 
     def focusOutEvent(self, event):
-        self.keys.clear()
+        self.input.release_all(time.perf_counter())
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, web_title=False, threaded_sim=False, pacing=('vsync', None)):
         super(MainWindow, self).__init__()
         self.setWindowTitle("SkatePy")
+        self.web_title = web_title
+        self.threaded_sim = threaded_sim
+        self.pacing = pacing
+        self.web_view = None
+        self.title_screen = None
+        self.scene = None
+        self.lifecycle = SceneLifecycle(self.create_scene)
+        # textures, sprites and sound effects decode in the background from here on, Play only waits for what is left
+        self.loader = AssetLoader(startup_jobs())
+        self.loading_timer = QTimer(self)
+        self.loading_timer.timeout.connect(self.check_loading)
         
         self.showFullScreen()
         
@@ -432,14 +853,8 @@ class MainWindow(QMainWindow):
         self.layout = QVBoxLayout(self.central_widget)
         self.layout.setContentsMargins(0, 0, 0, 0)
         self.setCentralWidget(self.central_widget)
-        self.show_title_screen()
 
-    def show_title_screen(self):
-        self.web_view = QWebEngineView()
-        self.web_view.setUrl(QUrl.fromLocalFile(os.path.join(os.path.dirname(__file__), 'html', 'title.html')))
-        self.layout.addWidget(self.web_view)
-        self.web_view.installEventFilter(self)
-        
+        # made once, the title screen and web view go in above it and the scene below it
         play_layout = QHBoxLayout()
         self.play_button = QPushButton("Play")
         self.play_button.setFixedSize(100, 50)
@@ -450,10 +865,55 @@ class MainWindow(QMainWindow):
             }
         """)
         self.play_button.clicked.connect(self.start_game)
+        self.progress = QProgressBar()
+        self.progress.setFixedSize(300, 30)
+        self.progress.setStyleSheet("color: white;")
+        self.progress.hide()
         play_layout.addStretch(1)
         play_layout.addWidget(self.play_button)
+        play_layout.addWidget(self.progress)
         play_layout.addStretch(1)
         self.layout.addLayout(play_layout)
+        self.show_title_screen()
+
+    def show_title_screen(self):
+        if self.web_title:
+            self.show_web_page('title.html')
+        else:
+            if self.title_screen is None:
+                self.title_screen = TitleScreen()
+                self.title_screen.help_button.clicked.connect(lambda: self.show_web_page('help.html'))
+                self.title_screen.installEventFilter(self)
+                self.layout.insertWidget(0, self.title_screen)
+            self.title_screen.show()
+            self.title_screen.setFocus()
+        self.play_button.show()
+
+    def show_web_page(self, page):
+        # QtWebEngine starts a Chromium process, so it is only imported once a page is actually needed
+        from PyQt5.QtWebEngineWidgets import QWebEngineView
+        if self.web_view is None:
+            self.web_view = QWebEngineView()
+            self.web_view.urlChanged.connect(self.web_url_changed)
+            self.web_view.installEventFilter(self)
+            self.layout.insertWidget(0, self.web_view)
+        self.web_view.setUrl(QUrl.fromLocalFile(resolver.path(f'html/{page}')))
+        self.web_view.show()
+        if self.title_screen is not None:
+            self.title_screen.hide()
+
+    def web_url_changed(self, url):
+        # help.html links back to title.html, go back to the native title screen instead
+        if url.fileName() == 'title.html' and not self.web_title:
+            self.close_web_view()
+            self.title_screen.show()
+            self.title_screen.setFocus()
+
+    def close_web_view(self):
+        if self.web_view is not None:
+            self.layout.removeWidget(self.web_view)
+            self.web_view.deleteLater()
+            self.web_view = None
 
     def eventFilter(self, source, event):
         if event.type() == QEvent.KeyPress and event.key() == Qt.Key_Return:
@@ -461,23 +921,52 @@ class MainWindow(QMainWindow):
             return True
         return super(MainWindow, self).eventFilter(source, event)
 
+    def create_scene(self):
+        scene = Scene3D(self, loader=self.loader, threaded=self.threaded_sim, pacing=self.pacing)
+        self.layout.addWidget(scene)
+        return scene
+
+    def check_loading(self):
+        self.progress.setValue(int(self.loader.progress() * 100))
+        if self.loader.done:
+            self.loading_timer.stop()
+            self.progress.hide()
+            self.start_game()
+
     def start_game(self):
-        self.web_view.hide()
+        if self.lifecycle.scene is None and not self.loader.done:
+            # the title screen stays up and keeps running, check_loading comes back here when the loader is done
+            self.play_button.hide()
+            self.progress.show()
+            if not self.loading_timer.isActive():
+                self.loading_timer.start(30)
+            return
+        self.close_web_view()
+        if self.title_screen is not None:
+            self.title_screen.hide()
         self.play_button.hide()
-        self.scene = Scene3D(self)
-        self.layout.addWidget(self.scene)
+        self.scene = self.lifecycle.acquire()
+        self.scene.show()
         self.scene.setFocus()
 
     def return_to_title_screen(self):
-        self.scene.stop_music()
+        # the scene stays in the layout, hidden and paused, with its GL context and textures ready for the next run
+        self.lifecycle.release()
         self.scene.hide()
-        self.layout.removeWidget(self.scene)
-        self.scene.deleteLater()
         self.show_title_screen()
 
+    def closeEvent(self, event):
+        self.lifecycle.shutdown()
+        super(MainWindow, self).closeEvent(event)
+
 if __name__ == '__main__':
+    # has to be set before the first GL widget exists
+    pacing = pacing_mode(sys.argv)
+    QSurfaceFormat.setDefaultFormat(surface_format(legacy='--legacy-gl' in sys.argv, swap_interval=FramePacer(*pacing).swap_interval))
+    # QtWebEngine is imported only when a page is opened, which it allows only if this is set before the app exists
+    QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
     app = QApplication(sys.argv)
-    window = MainWindow()
+    window = MainWindow(web_title='--web-title' in sys.argv, threaded_sim='--threaded-sim' in sys.argv, pacing=pacing)
     window.show()
     sys.exit(app.exec_())
 # comment at the end of the file or something but do not delete it :3. Also give full code all the way to the end.
\ No newline at end of file
@@ -0,0 +1,45 @@
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPixmap
+from assets import resolver
+
+BIRB_POSES = {
+    'forward': 'tex/birb/forward.png',
+    'left': 'tex/birb/left.png',
+    'right': 'tex/birb/right.png',
+    'ollie': 'tex/birb/ollie.png',
+}
+
+
+def decode_sprites(poses=BIRB_POSES, size=128):
+    # runs on a loader thread, SpriteCache turns the images into pixmaps on the GUI thread
+    return {pose: resolver.image(path).scaled(size, size, Qt.KeepAspectRatio, Qt.FastTransformation) for pose, path in poses.items()}
+
+
+class SpriteCache:
+    def __init__(self, poses=BIRB_POSES, size=128, images=None):
+        self.paths = dict(poses)
+        self.size = size
+        self.images = dict(images or {})
+        self.pixmaps = {}
+        self.hits = 0
+        self.misses = 0
+        for pose in self.paths:
+            self.load(pose)
+
+    def load(self, pose):
+        self.misses += 1
+        image = self.images.pop(pose, None)
+        if image is not None:
+            pixmap = QPixmap.fromImage(image)
+        else:
+            pixmap = resolver.pixmap(self.paths[pose])
+            pixmap = pixmap.scaled(self.size, self.size, Qt.KeepAspectRatio, Qt.FastTransformation)
+        self.pixmaps[pose] = pixmap
+        return pixmap
+
+    def get(self, pose):
+        pixmap = self.pixmaps.get(pose)
+        if pixmap is None:
+            return self.load(pose)
+        self.hits += 1
+        return pixmap
@@ -0,0 +1,46 @@
+import os
+import numpy as np
+
+FIELDS = ('time', 'x', 'y', 'z', 'pitch', 'yaw', 'speed', 'frame_ms', 'tick_ms')
+
+
+class Telemetry:
+    def __init__(self, capacity=4096, path=None, flush_every=1024):
+        self.buffer = np.zeros((capacity, len(FIELDS)))
+        self.capacity = capacity
+        self.index = 0
+        self.count = 0
+        self.path = path
+        self.flush_every = min(flush_every, capacity)
+        self.unflushed = 0
+
+    def record(self, time, pos, rot, speed, frame_ms, tick_ms):
+        row = self.buffer[self.index]
+        row[0] = time
+        row[1:4] = pos
+        row[4] = rot[0]
+        row[5] = rot[1]
+        row[6] = speed
+        row[7] = frame_ms
+        row[8] = tick_ms
+        self.index = (self.index + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.unflushed += 1
+        if self.path and self.unflushed >= self.flush_every:
+            self.flush()
+
+    def rows(self, n=None):
+        n = self.count if n is None else min(n, self.count)
+        start = (self.index - n) % self.capacity
+        if start + n <= self.capacity:
+            return self.buffer[start:start + n]
+        return np.concatenate((self.buffer[start:], self.buffer[:self.index]))
+
+    def flush(self):
+        if not self.path or not self.unflushed:
+            return
+        rows = self.rows(self.unflushed)
+        new_file = not os.path.exists(self.path)
+        with open(self.path, 'a') as f:
+            np.savetxt(f, rows, fmt='%.4f', delimiter=',', header=','.join(FIELDS) if new_file else '', comments='')
+        self.unflushed = 0
@@ -0,0 +1,67 @@
+import hashlib
+import os
+import numpy as np
+from PIL import Image
+
+# bump when the decode steps below change so old cache files are ignored
+CACHE_VERSION = 1
+CACHE_DIR = os.environ.get('SKATEPY_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'skatepy', 'textures'))
+
+memory_cache = {}
+stats = {'memory': 0, 'disk': 0, 'decoded': 0}
+
+
+def cache_key(path, size, composite):
+    path = os.path.abspath(path)
+    return (path, os.stat(path).st_mtime_ns, tuple(size), composite, CACHE_VERSION)
+
+
+def cache_file(key):
+    return os.path.join(CACHE_DIR, hashlib.sha1(repr(key).encode()).hexdigest() + '.npy')
+
+
+def decode(path, size, composite=False):
+    img = Image.open(path)
+    frames = []
+    for frame in range(getattr(img, 'n_frames', 1)):
+        img.seek(frame)
+        rgba = img.convert("RGBA")
+        rgba = rgba.resize(size, Image.NEAREST)
+        if composite:
+            background = Image.new('RGBA', rgba.size, (0, 0, 0, 0))
+            background.paste(rgba, (0, 0), rgba)
+            rgba = background
+        frames.append(np.asarray(rgba, dtype=np.uint8))
+    return np.stack(frames)
+
+
+def load_frames(path, size, composite=False):
+    # returns (frames, height, width, 4) uint8 RGBA, memory-mapped when it comes from the disk cache
+    key = cache_key(path, size, composite)
+    frames = memory_cache.get(key)
+    if frames is not None:
+        stats['memory'] += 1
+        return frames
+
+    filename = cache_file(key)
+    try:
+        frames = np.load(filename, mmap_mode='r')
+        stats['disk'] += 1
+    except (OSError, ValueError):
+        frames = decode(path, size, composite)
+        stats['decoded'] += 1
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp = filename + f'.{os.getpid()}.tmp'
+            with open(tmp, 'wb') as f:
+                np.save(f, frames)
+            os.replace(tmp, filename)
+        except OSError as e:
+            print(f"Could not write texture cache: {e}")
+
+    memory_cache[key] = frames
+    return frames
+
+
+def clear_memory_cache():
+    memory_cache.clear()
@@ -0,0 +1,152 @@
+import math
+import random
+import numpy as np
+from geometry import quad
+from matrices import perspective, view_matrix
+from entities import Entity, SpatialHash, OBSTACLE, RAIL, RAMP, ENEMY
+
+# the floor texture repeats every TEXTURE_REPEAT units, CHUNK_SIZE is a multiple so tiles line up
+CHUNK_SIZE = 200
+TEXTURE_REPEAT = 20
+CRATE_SIZE = 10
+RAIL_LENGTH = 40
+RAIL_HEIGHT = 4
+RAMP_SIZE = 20
+RAMP_HEIGHT = 6
+ENEMY_WIDTH = 8
+ENEMY_DEPTH = 6
+ENEMY_HEIGHT = 14
+# enemy sprites are drawn taller than their hitbox, chunk bounds have to cover the tallest thing drawn
+TALLEST = 16
+MAX_CRATES = 3
+MAX_ENEMIES = 2
+# keeps entities off chunk edges, so the spawn point at a chunk corner is always clear
+MARGIN = 10
+
+
+def tile_mesh(size=CHUNK_SIZE):
+    repeats = size / TEXTURE_REPEAT
+    return quad(0, 0, 0, size, 0, size, uv=(0, 0, repeats, repeats))
+
+
+def crate_mesh(size=CRATE_SIZE):
+    return (quad(0, size, 0, size, 0, 0) + quad(size, size, 0, size, 0, size) +
+            quad(size, size, size, 0, 0, size) + quad(0, size, size, 0, 0, 0) +
+            quad(0, size, 0, size, size, size))
+
+
+def rail_mesh(along_x=True, length=RAIL_LENGTH, height=RAIL_HEIGHT):
+    width, depth = (length, 2) if along_x else (2, length)
+    return (quad(0, height, 0, width, 0, 0) + quad(width, height, 0, width, 0, depth) +
+            quad(width, height, depth, 0, 0, depth) + quad(0, height, depth, 0, 0, 0) +
+            quad(0, height, 0, width, height, depth, uv=(0, 0, width / TEXTURE_REPEAT, depth / TEXTURE_REPEAT)))
+
+
+def ramp_mesh(size=RAMP_SIZE, height=RAMP_HEIGHT):
+    # rises towards -z, the triangular sides are quads with a repeated corner
+    return [
+        (0, 0, size, 0, 1), (size, 0, size, 1, 1), (size, height, 0, 1, 0), (0, height, 0, 0, 0),
+    ] + quad(0, height, 0, size, 0, 0) + [
+        (0, 0, size, 1, 1), (0, 0, 0, 0, 1), (0, height, 0, 0, 0), (0, height, 0, 0, 0),
+        (size, 0, 0, 1, 1), (size, 0, size, 0, 1), (size, height, 0, 1, 0), (size, height, 0, 1, 0),
+    ]
+
+
+def frustum_planes(matrix):
+    # rows are (a, b, c, d) with a*x + b*y + c*z + d >= 0 inside: left, right, bottom, top, near, far
+    rows = matrix
+    return np.array([rows[3] + rows[0], rows[3] - rows[0], rows[3] + rows[1],
+                     rows[3] - rows[1], rows[3] + rows[2], rows[3] - rows[2]])
+
+
+class Chunk:
+    def __init__(self, cx, cz, size, seed):
+        self.cx = cx
+        self.cz = cz
+        self.x = cx * size
+        self.z = cz * size
+        # entities are generated from the chunk coordinates, so an unloaded chunk comes back the same
+        rng = random.Random(hash((seed, cx, cz)))
+
+        def place(width, depth):
+            return (self.x + rng.uniform(MARGIN, size - MARGIN - width),
+                    self.z + rng.uniform(MARGIN, size - MARGIN - depth))
+
+        self.entities = []
+        for _ in range(rng.randint(0, MAX_CRATES)):
+            self.entities.append(Entity(OBSTACLE, *place(CRATE_SIZE, CRATE_SIZE), CRATE_SIZE, CRATE_SIZE, CRATE_SIZE, 'crate'))
+        if rng.random() < 0.5:
+            along_x = rng.random() < 0.5
+            width, depth = (RAIL_LENGTH, 2) if along_x else (2, RAIL_LENGTH)
+            self.entities.append(Entity(RAIL, *place(width, depth), width, depth, RAIL_HEIGHT, 'rail/x' if along_x else 'rail/z'))
+        if rng.random() < 0.3:
+            self.entities.append(Entity(RAMP, *place(RAMP_SIZE, RAMP_SIZE), RAMP_SIZE, RAMP_SIZE, RAMP_HEIGHT, 'ramp'))
+        for _ in range(rng.randint(0, MAX_ENEMIES)):
+            self.entities.append(Entity(ENEMY, *place(ENEMY_WIDTH, ENEMY_DEPTH), ENEMY_WIDTH, ENEMY_DEPTH, ENEMY_HEIGHT, 'enemy'))
+
+
+class World:
+    def __init__(self, chunk_size=CHUNK_SIZE, view_distance=4, seed=0):
+        self.chunk_size = chunk_size
+        self.view_distance = view_distance
+        self.seed = seed
+        self.chunks = {}
+        self.entities = SpatialHash()
+        self.center = None
+        self.loaded = 0
+        self.unloaded = 0
+        self.mins = np.zeros((0, 3))
+        self.maxs = np.zeros((0, 3))
+        self.order = []
+
+    @property
+    def far(self):
+        return self.view_distance * self.chunk_size
+
+    def set_view_distance(self, view_distance):
+        self.view_distance = max(1, view_distance)
+        self.center = None
+
+    def update(self, pos):
+        center = (math.floor(pos[0] / self.chunk_size), math.floor(pos[2] / self.chunk_size))
+        if center == self.center:
+            return
+        self.center = center
+        radius = self.view_distance
+        wanted = {(center[0] + dx, center[1] + dz)
+                  for dx in range(-radius, radius + 1) for dz in range(-radius, radius + 1)
+                  if dx * dx + dz * dz <= radius * radius}
+        for key in list(self.chunks):
+            if key not in wanted:
+                for entity in self.chunks.pop(key).entities:
+                    self.entities.remove(entity)
+                self.unloaded += 1
+        for key in wanted:
+            if key not in self.chunks:
+                chunk = self.chunks[key] = Chunk(key[0], key[1], self.chunk_size, self.seed)
+                for entity in chunk.entities:
+                    self.entities.insert(entity)
+                self.loaded += 1
+
+        self.order = list(self.chunks.values())
+        corners = np.array([(chunk.x, chunk.z) for chunk in self.order], dtype=np.float64).reshape(-1, 2)
+        self.mins = np.column_stack((corners[:, 0], np.zeros(len(corners)), corners[:, 1]))
+        self.maxs = self.mins + (self.chunk_size, TALLEST, self.chunk_size)
+
+    def visible(self, pos, rot, fovy, aspect, near=0.1):
+        return self.cull(perspective(fovy, aspect, near, self.far) @ view_matrix(pos, rot))
+
+    def boxes(self):
+        # update() replaces these rather than changing them, so the tuple stays consistent after the next update
+        return self.order, self.mins, self.maxs
+
+    def cull(self, view_projection, boxes=None):
+        order, mins, maxs = boxes or self.boxes()
+        if not order:
+            return []
+        planes = frustum_planes(view_projection)
+        normals = planes[:, None, :3]
+        # test the box corner furthest along each plane normal, if even that is outside the whole box is
+        corners = np.where(normals >= 0, maxs[None], mins[None])
+        inside = ((corners * normals).sum(axis=2) + planes[:, 3:4] >= 0).all(axis=0)
+        return [order[i] for i in np.flatnonzero(inside)]